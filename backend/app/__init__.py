@@ -2,7 +2,9 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from app.config import Config
 from app.extensions import db, migrate, jwt
+from app.json_provider import FastJSONProvider
 from app import models  # noqa: F401
+from app.services import exit_load, lifecycle  # noqa: F401  (status_events listeners keep exit_load / request_lifecycle current)
 
 from app.routes.health import bp as health_bp
 from app.routes.core import bp as core_bp
@@ -16,11 +18,12 @@ from app.cli import register_cli
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(Config)
 
     # CORS: set CORS_ORIGINS in production; dev allows * (we’ll lock down later)
     origins = app.config.get("CORS_ORIGINS")
-    CORS(app, origins=origins if isinstance(origins, list) else "*")
+    CORS(app, origins=origins if isinstance(origins, list) else "*", expose_headers=["X-Next-Cursor", "Idempotent-Replayed"])
 
     db.init_app(app)
     migrate.init_app(app, db)
@@ -1,16 +1,60 @@
+"""
+Staff auth. Access tokens carry role, venue_id and email as claims, so require_role
+authorizes from the token alone (no users query per API call). Claims are a snapshot taken
+at login and live as long as the access token (JWT_ACCESS_TOKEN_EXPIRES, 15 min by default).
+get_current_user() returns the stored user record, cached per worker for USER_CACHE_TTL.
+"""
 from functools import wraps
+from typing import NamedTuple
 
 from flask import abort, g
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
 
-from app.models import User
+from app.models import Role, User
+from app.services.cache import MISSING, TTLCache
 
+USER_CACHE_TTL = 60
 
-def get_current_user():
+
+class Principal(NamedTuple):
+    """Authenticated staff member as seen by route handlers (g.user)."""
+    id: int
+    role: Role
+    venue_id: int | None
+    email: str
+
+
+_users = TTLCache(maxsize=2048, ttl=USER_CACHE_TTL)
+
+
+def token_claims(user) -> dict:
+    """Extra JWT claims for create_access_token(additional_claims=...)."""
+    return {"role": str(user.role), "venue_id": user.venue_id, "email": user.email}
+
+
+def _load_user(user_id: int) -> Principal | None:
+    cached = _users.get(user_id)
+    if cached is not MISSING:
+        return cached
+    user = User.query.get(user_id)
+    principal = Principal(user.id, Role(user.role), user.venue_id, user.email) if user else None
+    _users.set(user_id, principal)
+    return principal
+
+
+def get_current_user() -> Principal | None:
     user_id = get_jwt_identity()
     if not user_id:
         return None
-    return User.query.get(int(user_id))
+    return _load_user(int(user_id))
+
+
+def _principal_from_token() -> Principal | None:
+    claims = get_jwt()
+    if "role" not in claims:
+        # Token issued before role claims existed: fall back to the (cached) user record.
+        return get_current_user()
+    return Principal(int(claims["sub"]), Role(claims["role"]), claims.get("venue_id"), claims.get("email") or "")
 
 
 def require_role(*roles):
@@ -18,7 +62,7 @@ def require_role(*roles):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
-            user = get_current_user()
+            user = _principal_from_token()
             if not user or user.role not in roles:
                 abort(403, "forbidden")
             g.user = user
@@ -5,11 +5,14 @@ Run: flask worker   (or: python -m flask worker with FLASK_APP=wsgi:app)
 import os
 import sys
 import time
+from datetime import datetime, timedelta
 
 import click
 
+from app.extensions import db
 from app.routes.scheduler import run_scheduler_tick
 from app.routes.notifs import run_drain
+from app.services import eta_model, exit_load, idempotency, latency, rollups
 
 
 def register_cli(app):
@@ -35,12 +38,20 @@ def register_cli(app):
         type=int,
         help="Max outbox items per drain (default 50).",
     )
-    def worker(tick_interval: int, drain_interval: int, drain_limit: int):
+    @click.option(
+        "--rollup-interval",
+        envvar="WORKER_ROLLUP_INTERVAL_SECONDS",
+        default=60,
+        type=int,
+        help="Compact analytics rollups and purge expired idempotency keys every N seconds (default 60).",
+    )
+    def worker(tick_interval: int, drain_interval: int, drain_limit: int, rollup_interval: int):
         """
-        Run scheduler tick and notification drain on a loop (production worker).
+        Run scheduler tick, notification drain and rollup compaction (plus idempotency-key cleanup)
+        on a loop (production worker).
         Use with a process manager (e.g. Render worker, systemd) or cron.
         """
-        if tick_interval < 1 or drain_interval < 1:
+        if tick_interval < 1 or drain_interval < 1 or rollup_interval < 1:
             click.echo("Intervals must be >= 1 second.", err=True)
             sys.exit(1)
 
@@ -50,6 +61,7 @@ def register_cli(app):
 
         last_tick = -tick_interval  # run first tick immediately
         last_drain = -drain_interval  # run first drain immediately
+        last_rollup = -rollup_interval
         step = 1  # check every second
 
         with app.app_context():
@@ -66,7 +78,54 @@ def register_cli(app):
                         if result["queued"]:
                             click.echo(f"[drain] queued={result['queued']} sent={result['sent']}")
                         last_drain = now
+                    if now - last_rollup >= rollup_interval:
+                        result = rollups.run_compaction()
+                        if result["five_minute"] or result["hourly"]:
+                            click.echo(f"[rollup] 5m={result['five_minute']} 1h={result['hourly']}")
+                        purged = idempotency.purge_expired()
+                        if purged:
+                            click.echo(f"[idempotency] purged {purged} expired keys")
+                        last_rollup = now
                 except Exception as e:
+                    db.session.rollback()  # keep the session usable for the next job
                     click.echo(f"[worker] error: {e}", err=True)
 
                 time.sleep(step)
+
+    @app.cli.command("recount-exit-load")
+    @click.option("--venue-id", type=int, default=None, help="Only this venue (default: all).")
+    def recount_exit_load(venue_id):
+        """Re-derive live exit queue depths from the requests table (repairs counter drift)."""
+        with app.app_context():
+            updated = exit_load.recount(venue_id)
+        click.echo(f"exit_load: {updated} exit(s) corrected")
+
+    @app.cli.command("rebuild-latency")
+    @click.option("--days", type=int, default=None, help="Only the last N days (default: all history).")
+    def rebuild_latency(days):
+        """Recount latency histograms from request_lifecycle (backfill after deploy, or repair)."""
+        since = datetime.utcnow() - timedelta(days=days) if days else None
+        with app.app_context():
+            samples = latency.rebuild(since)
+        click.echo(f"latency_bins: {samples} sample(s) counted")
+
+    @app.cli.command("fit-eta")
+    @click.option("--days", type=int, default=365, show_default=True, help="History to fit on.")
+    @click.option("--holdout-days", type=int, default=7, show_default=True,
+                  help="Replay the last N days against a fit without them (0: skip).")
+    @click.option("--dry-run", is_flag=True, help="Fit and report, keep the current model.")
+    def fit_eta(days, holdout_days, dry_run):
+        """Fit per-exit, per-hour-of-week ETA parameters for recommendations (run nightly)."""
+        started = time.monotonic()
+        with app.app_context():
+            summary = eta_model.fit(
+                datetime.utcnow() - timedelta(days=days), holdout_days=holdout_days, save=not dry_run
+            )
+        click.echo(f"eta_models: {summary} in {time.monotonic() - started:.1f}s")
+
+    @app.cli.command("compact-rollups")
+    def compact_rollups():
+        """Run one rollup compaction pass (what the worker does every --rollup-interval)."""
+        with app.app_context():
+            result = rollups.run_compaction()
+        click.echo(f"rollups: {result}")
@@ -13,4 +13,7 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-secret-change-me")
+    # Signed guest links (<ticket_id>.<venue_id>.<mac>); secret defaults to JWT_SECRET_KEY
+    GUEST_TOKEN_SIGNING = os.getenv("GUEST_TOKEN_SIGNING", "").lower() in ("1", "true", "yes")
+    GUEST_TOKEN_SECRET = os.getenv("GUEST_TOKEN_SECRET")
     CORS_ORIGINS = _cors_origins()
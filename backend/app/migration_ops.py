@@ -0,0 +1,142 @@
+"""
+Online schema-change helpers for Alembic migrations (import from migration scripts).
+
+`flask db upgrade` runs in a single transaction against the live database. On Postgres a
+plain CREATE INDEX holds a SHARE lock (blocks every INSERT/UPDATE) for the whole build, and
+one big UPDATE backfill holds row locks until commit. These helpers step out of the
+migration transaction instead:
+
+- create_index_concurrently / drop_index_concurrently: CREATE/DROP INDEX CONCURRENTLY in an
+  autocommit block (plain create_index/drop_index on other dialects, e.g. SQLite).
+- batched_backfill: UPDATE in id-range batches, each its own short transaction, with a
+  pause between batches and progress logged to the alembic logger.
+- batched_insert: the same for INSERT ... SELECT fills of new tables (rollups, fact tables).
+
+All are safe to re-run after an interrupted deploy.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+import sqlalchemy as sa
+from alembic import op
+
+log = logging.getLogger("alembic.online")
+
+BATCH_SIZE = 5000
+BATCH_PAUSE_SECONDS = 0.05
+# lock_timeout also bounds CONCURRENTLY's waits for every older transaction to finish, so it
+# must outlast the longest expected transaction: a timeout there aborts the build and leaves an
+# INVALID index. Its own lock (SHARE UPDATE EXCLUSIVE) doesn't block writes while it waits.
+CONCURRENT_LOCK_TIMEOUT = "30min"
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _drop_invalid_index(name: str) -> None:
+    """A failed CONCURRENTLY build leaves an INVALID index behind; drop it so a retry can rebuild."""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        log.info("dropping invalid index %s left by an earlier build", name)
+        op.execute(sa.text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+
+def create_index_concurrently(name: str, table: str, columns: list, unique: bool = False, where: str | None = None):
+    """Build an index without blocking writes. `where` makes it a partial index (Postgres only)."""
+    if not _is_postgres():
+        op.create_index(name, table, columns, unique=unique)
+        return
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(f"SET lock_timeout = '{CONCURRENT_LOCK_TIMEOUT}'"))
+        try:
+            _drop_invalid_index(name)
+            log.info("creating index %s on %s concurrently", name, table)
+            op.create_index(
+                name, table, columns, unique=unique, if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+            )
+        finally:
+            op.execute(sa.text("RESET lock_timeout"))
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    if not _is_postgres():
+        op.drop_index(name, table_name=table)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def _run_batches(label: str, stmt: str, max_id: int, batch_size: int, pause: float) -> int:
+    """Execute stmt (with :start/:end id bounds) over (0, max_id] in autocommit batches."""
+    conn = op.get_bind()
+    done = 0
+    started = time.monotonic()
+    start = 0
+    while start < max_id:
+        end = start + batch_size
+        done += conn.execute(sa.text(stmt), {"start": start, "end": end}).rowcount or 0
+        start = end
+        log.info(
+            "%s: ids %d/%d (%d%%), %d rows, %.1fs",
+            label, min(end, max_id), max_id, 100 * min(end, max_id) // max_id, done,
+            time.monotonic() - started,
+        )
+        if pause:
+            time.sleep(pause)
+    return done
+
+
+def _max_id(table: str) -> int:
+    return op.get_bind().execute(sa.text(f"SELECT COALESCE(MAX(id), 0) FROM {table}")).scalar()
+
+
+def batched_backfill(
+    table: str,
+    set_sql: str,
+    where_sql: str | None = None,
+    from_sql: str | None = None,
+    batch_size: int = BATCH_SIZE,
+    pause: float = BATCH_PAUSE_SECONDS,
+) -> int:
+    """
+    UPDATE {table} SET {set_sql} [FROM {from_sql}] WHERE {where_sql} in id ranges of batch_size,
+    committing each batch. where_sql should exclude already-done rows so re-runs are cheap.
+    Returns the number of rows updated.
+    """
+    stmt = f"UPDATE {table} SET {set_sql}"
+    if from_sql:
+        stmt += f" FROM {from_sql}"
+    stmt += f" WHERE {table}.id > :start AND {table}.id <= :end"
+    if where_sql:
+        stmt += f" AND ({where_sql})"
+    with op.get_context().autocommit_block():
+        return _run_batches(f"backfill {table}", stmt, _max_id(table), batch_size, pause)
+
+
+def batched_insert(
+    table: str,
+    select_sql: str,
+    source_table: str,
+    batch_size: int = BATCH_SIZE,
+    pause: float = BATCH_PAUSE_SECONDS,
+) -> int:
+    """
+    INSERT INTO {table} {select_sql} once per id range of source_table. select_sql must
+    restrict source ids with :start (exclusive) and :end (inclusive) and should skip rows
+    already present (ON CONFLICT DO NOTHING or NOT EXISTS) so re-runs are cheap.
+    Returns the number of rows inserted.
+    """
+    stmt = f"INSERT INTO {table} {select_sql}"
+    with op.get_context().autocommit_block():
+        return _run_batches(f"fill {table}", stmt, _max_id(source_table), batch_size, pause)
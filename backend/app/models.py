@@ -2,6 +2,8 @@ from datetime import datetime
 import enum
 import secrets
 
+from sqlalchemy import event, select, text
+
 from app.extensions import db
 
 
@@ -21,6 +23,10 @@ class RequestStatus(enum.StrEnum):
     CANCELED = "CANCELED"
 
 
+# Statuses that hold a place in an exit's queue
+ACTIVE_STATUSES = ["SCHEDULED", "REQUESTED", "ASSIGNED", "RETRIEVING", "READY"]
+
+
 class NotificationChannel(enum.StrEnum):
     STUB = "STUB"
     EMAIL = "EMAIL"
@@ -33,6 +39,8 @@ class Venue(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     slug = db.Column(db.String(80), unique=True, nullable=True, index=True)  # for /v/<slug> claim flow
+    # bumped on every exit/zone change; per-worker reference-data caches compare against it
+    ref_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     exits = db.relationship("Exit", backref="venue", lazy=True)
@@ -77,6 +85,9 @@ class User(db.Model):
 
 class Ticket(db.Model):
     __tablename__ = "tickets"
+    __table_args__ = (
+        db.Index("ix_tickets_venue_updated_at", "venue_id", "updated_at"),  # /api/sync deltas
+    )
     id = db.Column(db.Integer, primary_key=True)
     venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=False)
 
@@ -89,6 +100,9 @@ class Ticket(db.Model):
     claimed_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     closed_at = db.Column(db.DateTime, nullable=True)
+    # set on every UPDATE (ORM or query.update()) that doesn't pass it; NULL for rows untouched
+    # since the column was added
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
 
     requests = db.relationship("Request", backref="ticket", lazy=True)
 
@@ -99,8 +113,17 @@ class Ticket(db.Model):
 
 class Request(db.Model):
     __tablename__ = "requests"
+    __table_args__ = (
+        db.Index("ix_requests_venue_status_id", "venue_id", "status", "id"),
+        db.Index("ix_requests_venue_created_at", "venue_id", "created_at"),
+        db.Index("ix_requests_ticket_id_id", "ticket_id", "id"),  # latest request per ticket (/t/<token>)
+        db.Index("ix_requests_venue_updated_at", "venue_id", "updated_at"),  # /api/sync deltas
+        # scheduler tick: only SCHEDULED rows are indexed (partial on Postgres)
+        db.Index("ix_requests_scheduled_due", "scheduled_for", postgresql_where=text("status = 'SCHEDULED'")),
+    )
     id = db.Column(db.Integer, primary_key=True)
     ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=True)  # denormalized from ticket
     exit_id = db.Column(db.Integer, db.ForeignKey("exits.id"), nullable=False)
 
     status = db.Column(db.String(30), default=RequestStatus.REQUESTED.value, nullable=False)
@@ -111,7 +134,9 @@ class Request(db.Model):
     delivered_by_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
     delivered_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # bumped by every transition; the compare-and-set guard in app.services.transitions
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     exit = db.relationship("Exit")
     zone = db.relationship("Zone", foreign_keys=[zone_id])
@@ -123,8 +148,14 @@ class Request(db.Model):
 
 class StatusEvent(db.Model):
     __tablename__ = "status_events"
+    __table_args__ = (
+        db.Index("ix_status_events_venue_created_at", "venue_id", "created_at", "id"),
+        db.Index("ix_status_events_ticket_id_id", "ticket_id", "id"),  # SSE: events after last_id
+        db.Index("ix_status_events_request_id_created_at", "request_id", "created_at"),  # reschedule/cancel
+    )
     id = db.Column(db.BigInteger().with_variant(db.Integer(), "sqlite"), primary_key=True, autoincrement=True)  # grows safely
     ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=True)  # denormalized from ticket
     request_id = db.Column(db.Integer, db.ForeignKey("requests.id"), nullable=False)
 
     from_status = db.Column(db.String(30), nullable=True)
@@ -134,6 +165,17 @@ class StatusEvent(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
 
+@event.listens_for(Request, "before_insert")
+@event.listens_for(StatusEvent, "before_insert")
+def _fill_venue_id(mapper, connection, target):
+    """Write paths pass venue_id; anything that doesn't gets the ticket's venue (one PK lookup)."""
+    if target.venue_id is None and target.ticket_id is not None:
+        tickets = Ticket.__table__
+        target.venue_id = connection.execute(
+            select(tickets.c.venue_id).where(tickets.c.id == target.ticket_id)
+        ).scalar()
+
+
 class Tip(db.Model):
     """Tip record. Status PENDING for now; can add PAID when Stripe is wired."""
     __tablename__ = "tips"
@@ -144,6 +186,128 @@ class Tip(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
 
+class TipRollup(db.Model):
+    """Per-valet, per-day tip totals. Bumped in the same transaction as each Tip insert."""
+    __tablename__ = "tip_rollups"
+    __table_args__ = (db.UniqueConstraint("venue_id", "user_id", "day", name="uq_tip_rollups_venue_user_day"),)
+    id = db.Column(db.Integer, primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    day = db.Column(db.Date, nullable=False)  # UTC date of Tip.created_at
+    total_cents = db.Column(db.BigInteger, default=0, nullable=False)
+    tip_count = db.Column(db.Integer, default=0, nullable=False)
+
+
+class ExitLoad(db.Model):
+    """
+    Live per-exit queue depth and EWMA retrieval time (REQUESTED -> READY), maintained from
+    status_events inserts in the same transaction (app.services.exit_load).
+    """
+    __tablename__ = "exit_load"
+    exit_id = db.Column(db.Integer, db.ForeignKey("exits.id"), primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=False, index=True)
+    queue_depth = db.Column(db.Integer, default=0, nullable=False)
+    eta_seconds = db.Column(db.Float, nullable=True)
+    eta_samples = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class RequestLifecycle(db.Model):
+    """
+    One row per request with the first time it reached each stage and the derived durations,
+    written on every status transition (app.services.lifecycle). Analytics read this instead
+    of pivoting status_events.
+    """
+    __tablename__ = "request_lifecycle"
+    __table_args__ = (
+        db.Index("ix_request_lifecycle_venue_requested_at", "venue_id", "requested_at"),
+        db.Index("ix_request_lifecycle_requested_at", "requested_at"),  # rollup compaction
+    )
+    request_id = db.Column(db.Integer, db.ForeignKey("requests.id"), primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=True)
+    exit_id = db.Column(db.Integer, db.ForeignKey("exits.id"), nullable=True)
+    requested_at = db.Column(db.DateTime, nullable=True)
+    assigned_at = db.Column(db.DateTime, nullable=True)
+    ready_at = db.Column(db.DateTime, nullable=True)
+    picked_at = db.Column(db.DateTime, nullable=True)
+    ready_seconds = db.Column(db.Float, nullable=True)   # requested_at -> ready_at
+    picked_seconds = db.Column(db.Float, nullable=True)  # requested_at -> picked_at
+
+
+class ExitRollup(db.Model):
+    """
+    Per-exit time buckets (5 min and 1 h) compacted from request_lifecycle by the worker
+    (app.services.rollups). Requests are bucketed by requested_at; duration sums only count
+    samples up to ROLLUP_MAX_SECONDS, matching the default max_seconds of the analytics.
+    """
+    __tablename__ = "exit_rollups"
+    __table_args__ = (
+        db.UniqueConstraint("bucket_seconds", "venue_id", "exit_id", "bucket_start", name="uq_exit_rollups_bucket"),
+        db.Index("ix_exit_rollups_venue_bucket", "venue_id", "bucket_seconds", "bucket_start"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    bucket_seconds = db.Column(db.Integer, nullable=False)  # 300 or 3600
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=False)
+    exit_id = db.Column(db.Integer, db.ForeignKey("exits.id"), nullable=False)
+    requests = db.Column(db.Integer, default=0, nullable=False)
+    completions = db.Column(db.Integer, default=0, nullable=False)  # reached READY
+    ready_seconds_sum = db.Column(db.Float, default=0, nullable=False)
+    ready_seconds_count = db.Column(db.Integer, default=0, nullable=False)
+    picked_seconds_sum = db.Column(db.Float, default=0, nullable=False)
+    picked_seconds_count = db.Column(db.Integer, default=0, nullable=False)
+    peak_queue = db.Column(db.Integer, default=0, nullable=False)
+
+
+class LatencyBin(db.Model):
+    """
+    One bin of a per-hour latency histogram (app.services.latency): how many requester->ready
+    or requester->picked durations for one exit or valet fell into bin `bin` during the hour.
+    Histograms merge by summing counts per bin, so any window of hours is one GROUP BY.
+    """
+    __tablename__ = "latency_bins"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "venue_id", "metric", "dimension", "bucket_start", "key_id", "bin", name="uq_latency_bins_key"
+        ),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=False)
+    metric = db.Column(db.String(10), nullable=False)      # ready | picked
+    dimension = db.Column(db.String(10), nullable=False)   # exit | valet
+    key_id = db.Column(db.Integer, nullable=False)          # exits.id or users.id
+    bucket_start = db.Column(db.DateTime, nullable=False)   # hour
+    bin = db.Column(db.SmallInteger, nullable=False)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+
+class EtaModel(db.Model):
+    """
+    Fitted ETA parameters per exit and UTC hour of week (app.services.eta_model, `flask fit-eta`):
+    eta = base_seconds + queue_slope_seconds * queue. hour_of_week -1 is the exit-wide fallback.
+    """
+    __tablename__ = "eta_models"
+    __table_args__ = (
+        db.UniqueConstraint("exit_id", "hour_of_week", name="uq_eta_models_exit_hour"),
+        db.Index("ix_eta_models_venue_id", "venue_id"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=False)
+    exit_id = db.Column(db.Integer, db.ForeignKey("exits.id"), nullable=False)
+    hour_of_week = db.Column(db.SmallInteger, nullable=False)  # 0 = Monday 00:00 UTC .. 167, or -1
+    base_seconds = db.Column(db.Float, nullable=False)
+    queue_slope_seconds = db.Column(db.Float, nullable=False)
+    samples = db.Column(db.Integer, nullable=False)
+    fitted_at = db.Column(db.DateTime, nullable=False)
+
+
+class RollupWatermark(db.Model):
+    """End of the last compacted bucket per granularity."""
+    __tablename__ = "rollup_watermarks"
+    bucket_seconds = db.Column(db.Integer, primary_key=True)
+    compacted_until = db.Column(db.DateTime, nullable=False)
+
+
 class NotificationSubscription(db.Model):
     __tablename__ = "notification_subscriptions"
     id = db.Column(db.Integer, primary_key=True)
@@ -158,6 +322,10 @@ class NotificationSubscription(db.Model):
 
 class NotificationOutbox(db.Model):
     __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # drain/retry: oldest first within a state; SENT rows (the bulk) stay out of the index on Postgres
+        db.Index("ix_notification_outbox_state_id", "state", "id", postgresql_where=text("state IN ('PENDING', 'FAILED')")),
+    )
     id = db.Column(db.BigInteger().with_variant(db.Integer(), "sqlite"), primary_key=True, autoincrement=True)
 
     ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=False, index=True)
@@ -175,3 +343,19 @@ class NotificationOutbox(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     sent_at = db.Column(db.DateTime, nullable=True)
+
+
+class IdempotencyKey(db.Model):
+    """Stored result per client idempotency key (app.services.idempotency); expired rows are purged."""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        db.UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+        db.Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+    id = db.Column(db.BigInteger().with_variant(db.Integer(), "sqlite"), primary_key=True, autoincrement=True)
+    scope = db.Column(db.String(80), nullable=False)   # e.g. "sync:<user id>"
+    key = db.Column(db.String(120), nullable=False)    # client-generated
+    status_code = db.Column(db.SmallInteger, nullable=False)
+    body = db.Column(db.Text, nullable=False)          # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
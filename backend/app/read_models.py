@@ -0,0 +1,485 @@
+"""
+ORM-free read path for hot, read-only endpoints (/api/requests, /api/audit, /api/tips, /t/<token>).
+Core selects map rows straight into slotted dataclasses; no identity map, no instance state.
+Timestamps stay datetimes (app.json_provider encodes them natively). Writes stay on the ORM models.
+The JSON produced here is identical to app.serializers for the same rows.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import Exit, Zone, Ticket, Request as CarRequest, StatusEvent, Tip
+from app.serializers import mask_phone
+
+_requests = CarRequest.__table__
+_tickets = Ticket.__table__
+_exits = Exit.__table__
+_zones = Zone.__table__
+_events = StatusEvent.__table__
+
+
+@dataclass(slots=True)
+class RequestRow:
+    id: int
+    ticket_id: int
+    ticket_token: str | None
+    car_number: str | None
+    vehicle_description: str | None
+    claimed_at: datetime | None
+    claimed_phone_masked: str | None
+    exit_id: int
+    exit: dict | None
+    status: str
+    scheduled_for: str | None
+    assigned_to: str | None
+    assigned_at: datetime | None
+    zone_id: int | None
+    zone: dict | None
+    created_at: datetime
+    updated_at: datetime
+    delivered_by_user_id: int | None
+
+    @classmethod
+    def from_row(cls, row) -> "RequestRow":
+        return cls(
+            id=row.id,
+            ticket_id=row.ticket_id,
+            ticket_token=row.token,
+            car_number=row.car_number,
+            vehicle_description=row.vehicle_description,
+            claimed_at=row.claimed_at,
+            claimed_phone_masked=mask_phone(row.claimed_phone),
+            exit_id=row.exit_id,
+            exit={
+                "id": row.exit_id,
+                "venue_id": row.exit_venue_id,
+                "name": row.exit_name,
+                "code": row.exit_code,
+                "is_active": row.exit_is_active,
+            } if row.exit_code is not None else None,
+            status=row.status,
+            scheduled_for=(row.scheduled_for.isoformat() + "Z") if row.scheduled_for else None,
+            assigned_to=row.assigned_to,
+            assigned_at=row.assigned_at,
+            zone_id=row.zone_id,
+            zone={"id": row.zone_id, "name": row.zone_name} if row.zone_name is not None else None,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            delivered_by_user_id=row.delivered_by_user_id,
+        )
+
+    def as_json(self) -> dict:
+        return {
+            "id": self.id,
+            "ticket_id": self.ticket_id,
+            "ticket_token": self.ticket_token,
+            "car_number": self.car_number,
+            "vehicle_description": self.vehicle_description,
+            "claimed_at": self.claimed_at,
+            "claimed_phone_masked": self.claimed_phone_masked,
+            "exit_id": self.exit_id,
+            "exit": self.exit,
+            "status": self.status,
+            "scheduled_for": self.scheduled_for,
+            "assigned_to": self.assigned_to,
+            "assigned_at": self.assigned_at,
+            "zone_id": self.zone_id,
+            "zone": self.zone,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "delivered_by_user_id": self.delivered_by_user_id,
+            "tip_eligible": self.status in ("CLOSED", "PICKED_UP") and self.delivered_by_user_id is not None,
+        }
+
+
+@dataclass(slots=True)
+class StatusEventRow:
+    id: int
+    ticket_id: int
+    request_id: int
+    from_status: str | None
+    to_status: str
+    note: str | None
+    created_at: datetime
+
+    @classmethod
+    def from_row(cls, row) -> "StatusEventRow":
+        return cls(
+            id=int(row.id),
+            ticket_id=row.ticket_id,
+            request_id=row.request_id,
+            from_status=row.from_status,
+            to_status=row.to_status,
+            note=row.note,
+            created_at=row.created_at,
+        )
+
+    def as_json(self) -> dict:
+        return {
+            "id": self.id,
+            "ticket_id": self.ticket_id,
+            "request_id": self.request_id,
+            "from_status": self.from_status,
+            "to_status": self.to_status,
+            "note": self.note,
+            "created_at": self.created_at,
+        }
+
+
+@dataclass(slots=True)
+class TicketRow:
+    id: int
+    venue_id: int
+    token: str
+    car_number: str | None
+    vehicle_description: str | None
+    claim_code: str | None
+    claimed_phone: str | None
+    claimed_at: datetime | None
+    created_at: datetime
+    closed_at: datetime | None
+    updated_at: datetime | None = None  # not in as_json
+
+    @classmethod
+    def from_row(cls, row) -> "TicketRow":
+        return cls(
+            id=row.id,
+            venue_id=row.venue_id,
+            token=row.token,
+            car_number=row.car_number,
+            vehicle_description=row.vehicle_description,
+            claim_code=row.claim_code,
+            claimed_phone=row.claimed_phone,
+            claimed_at=row.claimed_at,
+            created_at=row.created_at,
+            closed_at=row.closed_at,
+            updated_at=row.updated_at,
+        )
+
+    def as_json(self) -> dict:
+        return {
+            "id": self.id,
+            "venue_id": self.venue_id,
+            "token": self.token,
+            "car_number": self.car_number,
+            "vehicle_description": self.vehicle_description,
+            "claim_code": self.claim_code,
+            "claimed_phone": self.claimed_phone,
+            "claimed_at": self.claimed_at,
+            "created_at": self.created_at,
+        }
+
+
+def _request_columns() -> list:
+    return [
+        _requests.c.id,
+        _requests.c.ticket_id,
+        _tickets.c.token,
+        _tickets.c.car_number,
+        _tickets.c.vehicle_description,
+        _tickets.c.claimed_at,
+        _tickets.c.claimed_phone,
+        _requests.c.exit_id,
+        _exits.c.venue_id.label("exit_venue_id"),
+        _exits.c.name.label("exit_name"),
+        _exits.c.code.label("exit_code"),
+        _exits.c.is_active.label("exit_is_active"),
+        _requests.c.status,
+        _requests.c.scheduled_for,
+        _requests.c.assigned_to,
+        _requests.c.assigned_at,
+        _requests.c.zone_id,
+        _zones.c.name.label("zone_name"),
+        _requests.c.created_at,
+        _requests.c.updated_at,
+        _requests.c.delivered_by_user_id,
+    ]
+
+
+def select_requests():
+    """Request rows joined to ticket, exit and zone. Callers add filters/order/limit."""
+    return select(*_request_columns()).select_from(
+        _requests
+        .join(_tickets, _tickets.c.id == _requests.c.ticket_id)
+        .outerjoin(_exits, _exits.c.id == _requests.c.exit_id)
+        .outerjoin(_zones, _zones.c.id == _requests.c.zone_id)
+    )
+
+
+def fetch_requests(stmt) -> list[RequestRow]:
+    return [RequestRow.from_row(row) for row in db.session.execute(stmt)]
+
+
+def select_status_events():
+    return select(
+        _events.c.id,
+        _events.c.ticket_id,
+        _events.c.request_id,
+        _events.c.from_status,
+        _events.c.to_status,
+        _events.c.note,
+        _events.c.created_at,
+    )
+
+
+def fetch_status_events(stmt) -> list[StatusEventRow]:
+    return [StatusEventRow.from_row(row) for row in db.session.execute(stmt)]
+
+
+def ticket_by_id(ticket_id: int) -> TicketRow | None:
+    """By primary key: guest routes resolve the token (cached) first, then read the row."""
+    row = db.session.execute(
+        select(
+            _tickets.c.id,
+            _tickets.c.venue_id,
+            _tickets.c.token,
+            _tickets.c.car_number,
+            _tickets.c.vehicle_description,
+            _tickets.c.claim_code,
+            _tickets.c.claimed_phone,
+            _tickets.c.claimed_at,
+            _tickets.c.created_at,
+            _tickets.c.closed_at,
+            _tickets.c.updated_at,
+        ).where(_tickets.c.id == ticket_id)
+    ).first()
+    return TicketRow.from_row(row) if row else None
+
+
+def select_ticket_with_latest_request(ticket_id: int):
+    """The ticket row outer-joined to its newest request (correlated max(id), served by ix_requests_ticket_id_id)."""
+    latest_id = (
+        select(func.max(_requests.c.id))
+        .where(_requests.c.ticket_id == _tickets.c.id)
+        .correlate(_tickets)
+        .scalar_subquery()
+    )
+    return select(
+        *_request_columns(),
+        _requests.c.version,
+        _tickets.c.id.label("t_id"),
+        _tickets.c.venue_id.label("t_venue_id"),
+        _tickets.c.claim_code,
+        _tickets.c.created_at.label("t_created_at"),
+        _tickets.c.closed_at,
+        _tickets.c.updated_at.label("t_updated_at"),
+    ).select_from(
+        _tickets
+        .outerjoin(_requests, _requests.c.id == latest_id)
+        .outerjoin(_exits, _exits.c.id == _requests.c.exit_id)
+        .outerjoin(_zones, _zones.c.id == _requests.c.zone_id)
+    ).where(_tickets.c.id == ticket_id)
+
+
+def ticket_with_latest_request(ticket_id: int) -> tuple[TicketRow, RequestRow | None, int | None] | None:
+    """(ticket, latest request, its version) for a ticket id in one query."""
+    row = db.session.execute(select_ticket_with_latest_request(ticket_id)).first()
+    if row is None:
+        return None
+    ticket = TicketRow(
+        id=row.t_id,
+        venue_id=row.t_venue_id,
+        token=row.token,
+        car_number=row.car_number,
+        vehicle_description=row.vehicle_description,
+        claim_code=row.claim_code,
+        claimed_phone=row.claimed_phone,
+        claimed_at=row.claimed_at,
+        created_at=row.t_created_at,
+        closed_at=row.closed_at,
+        updated_at=row.t_updated_at,
+    )
+    if row.id is None:
+        return ticket, None, None
+    return ticket, RequestRow.from_row(row), row.version
+
+
+def select_latest_request(ticket_id: int):
+    return select_requests().where(_requests.c.ticket_id == ticket_id).order_by(_requests.c.id.desc()).limit(1)
+
+
+def latest_request_for_ticket(ticket_id: int) -> RequestRow | None:
+    rows = fetch_requests(select_latest_request(ticket_id))
+    return rows[0] if rows else None
+
+
+# --- Field projection (?fields=..., ?format=compact) ---
+# Each catalog maps public field names to the columns they need; a projection selects only
+# those columns (and only the joins they need) and returns plain lists or dicts per row.
+
+
+class Field:
+    """One output field: the columns it reads and how to build its value from them."""
+
+    def __init__(self, name: str, columns, build=None):
+        self.name = name
+        self.columns = tuple(columns)
+        self.build = build  # None: value of the single column as-is
+
+
+class Join:
+    def __init__(self, table, onclause, outer: bool = True, always: bool = False):
+        self.table = table
+        self.onclause = onclause
+        self.outer = outer
+        self.always = always
+
+
+class FieldCatalog:
+    def __init__(self, base, keys, fields: list[Field], joins: list[Join] = (), default: list[str] | None = None):
+        self.base = base
+        self.keys = tuple(keys)  # keyset columns: always selected, even when not output fields
+        self.fields = {f.name: f for f in fields}
+        self.joins = list(joins)
+        self.default = default or [f.name for f in fields]
+
+    def project(self, names: list[str] | None = None) -> "Projection":
+        names = names or self.default
+        unknown = [n for n in names if n not in self.fields]
+        if unknown:
+            raise KeyError(unknown[0])
+        return Projection(self, [self.fields[n] for n in dict.fromkeys(names)])
+
+
+class Projection:
+    def __init__(self, catalog: FieldCatalog, fields: list[Field]):
+        self.columns = [f.name for f in fields]
+        selected, index, tables = [], {}, set()
+
+        def position(column) -> int:
+            ref = (column.table.name, column.name)
+            if ref not in index:
+                index[ref] = len(selected)
+                selected.append(column.label(f"c{len(selected)}"))
+                tables.add(column.table.name)
+            return index[ref]
+
+        self._builders = []
+        for f in fields:
+            positions = [position(c) for c in f.columns]
+            if f.build is None:
+                self._builders.append(lambda row, i=positions[0]: row[i])
+            else:
+                self._builders.append(lambda row, ps=positions, b=f.build: b(*[row[p] for p in ps]))
+        self._key_positions = [position(c) for c in catalog.keys]
+
+        from_clause = catalog.base
+        for j in catalog.joins:
+            if j.always or j.table.name in tables:
+                from_clause = from_clause.join(j.table, j.onclause, isouter=j.outer)
+        self._stmt = select(*selected).select_from(from_clause)
+
+    def select(self):
+        return self._stmt
+
+    def fetch(self, stmt) -> list:
+        return db.session.execute(stmt).all()
+
+    def key(self, row) -> tuple:
+        return tuple(row[p] for p in self._key_positions)
+
+    def dump(self, rows, compact: bool = False) -> list:
+        builders = self._builders
+        if compact:
+            return [[b(row) for b in builders] for row in rows]
+        names = self.columns
+        return [dict(zip(names, [b(row) for b in builders])) for row in rows]
+
+
+def _exit_obj(exit_id, venue_id, name, code, is_active):
+    if code is None:
+        return None
+    return {"id": exit_id, "venue_id": venue_id, "name": name, "code": code, "is_active": is_active}
+
+
+REQUEST_FIELDS = FieldCatalog(
+    base=_requests,
+    keys=[_requests.c.id],
+    joins=[
+        Join(_tickets, _tickets.c.id == _requests.c.ticket_id, outer=False),
+        Join(_exits, _exits.c.id == _requests.c.exit_id),
+        Join(_zones, _zones.c.id == _requests.c.zone_id),
+    ],
+    fields=[
+        Field("id", [_requests.c.id]),
+        Field("ticket_id", [_requests.c.ticket_id]),
+        Field("ticket_token", [_tickets.c.token]),
+        Field("car_number", [_tickets.c.car_number]),
+        Field("vehicle_description", [_tickets.c.vehicle_description]),
+        Field("claimed_at", [_tickets.c.claimed_at]),
+        Field("claimed_phone_masked", [_tickets.c.claimed_phone], mask_phone),
+        Field("exit_id", [_requests.c.exit_id]),
+        Field("exit", [_exits.c.id, _exits.c.venue_id, _exits.c.name, _exits.c.code, _exits.c.is_active], _exit_obj),
+        Field("exit_code", [_exits.c.code]),
+        Field("status", [_requests.c.status]),
+        Field("scheduled_for", [_requests.c.scheduled_for], lambda dt: (dt.isoformat() + "Z") if dt else None),
+        Field("assigned_to", [_requests.c.assigned_to]),
+        Field("assigned_at", [_requests.c.assigned_at]),
+        Field("zone_id", [_requests.c.zone_id]),
+        Field("zone", [_zones.c.id, _zones.c.name], lambda zid, name: {"id": zid, "name": name} if zid else None),
+        Field("created_at", [_requests.c.created_at]),
+        Field("updated_at", [_requests.c.updated_at]),
+        Field("delivered_by_user_id", [_requests.c.delivered_by_user_id]),
+        Field("version", [_requests.c.version]),
+        Field(
+            "tip_eligible",
+            [_requests.c.status, _requests.c.delivered_by_user_id],
+            lambda status, uid: status in ("CLOSED", "PICKED_UP") and uid is not None,
+        ),
+    ],
+    default=[
+        "id", "ticket_id", "ticket_token", "car_number", "vehicle_description", "claimed_at",
+        "claimed_phone_masked", "exit_id", "exit", "status", "scheduled_for", "assigned_to",
+        "assigned_at", "zone_id", "zone", "created_at", "updated_at", "delivered_by_user_id", "tip_eligible",
+    ],
+)
+
+TICKET_FIELDS = FieldCatalog(
+    base=_tickets,
+    keys=[_tickets.c.id],
+    fields=[
+        Field("id", [_tickets.c.id]),
+        Field("car_number", [_tickets.c.car_number]),
+        Field("vehicle_description", [_tickets.c.vehicle_description]),
+        Field("claimed_at", [_tickets.c.claimed_at]),
+        Field("claimed_phone_masked", [_tickets.c.claimed_phone], mask_phone),
+        Field("closed_at", [_tickets.c.closed_at]),
+        Field("updated_at", [_tickets.c.updated_at]),
+    ],
+)
+
+STATUS_EVENT_FIELDS = FieldCatalog(
+    base=_events,
+    keys=[_events.c.created_at, _events.c.id],
+    fields=[
+        Field("id", [_events.c.id], int),
+        Field("ticket_id", [_events.c.ticket_id]),
+        Field("request_id", [_events.c.request_id]),
+        Field("from_status", [_events.c.from_status]),
+        Field("to_status", [_events.c.to_status]),
+        Field("note", [_events.c.note]),
+        Field("created_at", [_events.c.created_at]),
+    ],
+)
+
+_tips = Tip.__table__
+
+TIP_FIELDS = FieldCatalog(
+    base=_tips,
+    keys=[_tips.c.created_at, _tips.c.id],
+    joins=[
+        Join(_requests, _requests.c.id == _tips.c.request_id, outer=False, always=True),
+        Join(_tickets, _tickets.c.id == _requests.c.ticket_id, outer=False),
+    ],
+    fields=[
+        Field("id", [_tips.c.id]),
+        Field("request_id", [_tips.c.request_id]),
+        Field("amount_cents", [_tips.c.amount_cents]),
+        Field("status", [_tips.c.status]),
+        Field("created_at", [_tips.c.created_at]),
+        Field("vehicle_description", [_tickets.c.vehicle_description]),
+        Field("car_number", [_tickets.c.car_number]),
+    ],
+)
@@ -4,7 +4,8 @@ from werkzeug.security import generate_password_hash, check_password_hash
 
 from app.extensions import db
 from app.models import User, Venue, Role
-from app.auth import require_role, get_current_user
+from app.auth import require_role, token_claims
+from app.routes.claim import invalidate_venue_slug
 
 bp = Blueprint("auth", __name__)
 
@@ -31,6 +32,7 @@ def seed():
     )
     db.session.add(u)
     db.session.commit()
+    invalidate_venue_slug(v.slug)
 
     return jsonify({
         "message": "seeded",
@@ -52,7 +54,7 @@ def login():
     if not user or not check_password_hash(user.password_hash, password):
         abort(401, "invalid credentials")
 
-    token = create_access_token(identity=str(user.id))
+    token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
     return jsonify({
         "access_token": token,
         "user": {
@@ -67,7 +69,7 @@ def login():
 @bp.get("/me")
 @require_role(Role.VALET, Role.MANAGER)
 def me():
-    user = get_current_user()
+    user = g.user  # from token claims; no users query
     return jsonify({
         "id": user.id,
         "email": user.email,
@@ -4,10 +4,12 @@ No auth; rate-limited by IP.
 """
 from datetime import datetime, timedelta
 from collections import defaultdict
+from typing import NamedTuple
 from flask import Blueprint, jsonify, request, abort
 
 from app.extensions import db
 from app.models import Venue, Ticket
+from app.services.cache import TTLCache, MISSING
 
 bp = Blueprint("claim", __name__)
 
@@ -27,11 +29,47 @@ def _rate_limit():
     _attempts[ip].append(now)
 
 
+class CachedVenue(NamedTuple):
+    id: int
+    name: str
+    slug: str
+
+
+# Slug -> CachedVenue (or None for unknown slugs). Public QR traffic hits this on every claim.
+_VENUE_CACHE_TTL = 300       # seconds; venues are created/renamed rarely
+_VENUE_NEGATIVE_TTL = 30     # unknown slugs: short, so a venue created on another worker shows up quickly
+_venue_by_slug = TTLCache(maxsize=1024, ttl=_VENUE_CACHE_TTL)
+
+
+def venue_by_slug(slug: str) -> CachedVenue | None:
+    cached = _venue_by_slug.get(slug)
+    if cached is not MISSING:
+        return cached
+    row = (
+        db.session.query(Venue.id, Venue.name, Venue.slug)
+        .filter(Venue.slug == slug)
+        .first()
+    )
+    if row is None:
+        _venue_by_slug.set(slug, None, ttl=_VENUE_NEGATIVE_TTL)
+        return None
+    venue = CachedVenue(id=row.id, name=row.name, slug=row.slug)
+    _venue_by_slug.set(slug, venue)
+    return venue
+
+
+def invalidate_venue_slug(*slugs: str | None) -> None:
+    """Call after a venue is created or its slug changes (old and new slug)."""
+    for slug in slugs:
+        if slug:
+            _venue_by_slug.pop(slug)
+
+
 @bp.post("/v/<venue_slug>/claim/start")
 def claim_start(venue_slug: str):
     """Optional: store phone for next step. For now just accept and return ok."""
     _rate_limit()
-    venue = Venue.query.filter_by(slug=venue_slug).first()
+    venue = venue_by_slug(venue_slug)
     if not venue:
         abort(404, "venue not found")
     data = request.get_json(silent=True) or {}
@@ -54,7 +92,7 @@ def claim_confirm(venue_slug: str):
     if not phone or not claim_code:
         abort(400, "phone and claim_code are required")
 
-    venue = Venue.query.filter_by(slug=venue_slug).first()
+    venue = venue_by_slug(venue_slug)
     if not venue:
         abort(404, "venue not found")
 
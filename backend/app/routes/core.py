@@ -1,17 +1,32 @@
 import re
 import random
+import base64
+import hashlib
 from datetime import datetime, timedelta, timezone
-from flask import Blueprint, jsonify, request, abort, g
-from sqlalchemy import func, case
+from flask import Blueprint, Response, jsonify, request, abort, g, stream_with_context
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import selectinload
+from werkzeug.exceptions import HTTPException
 from werkzeug.security import generate_password_hash
 
 from app.extensions import db
 from app.models import (
     Venue, Exit, Zone, Ticket, Request as CarRequest, StatusEvent,
-    RequestStatus, Role, User, NotificationSubscription, NotificationOutbox, Tip,
+    RequestStatus, Role, User, NotificationSubscription, NotificationOutbox, Tip, TipRollup,
+    ExitLoad, ExitRollup, LatencyBin, RequestLifecycle, ACTIVE_STATUSES,
 )
 from app.auth import require_role, get_current_user
-from app.routes.notifs import queue_and_send, _render_message
+from app.serializers import to_json as _json, RECEIVED_TICKET, TIP
+from app import read_models
+from app.json_provider import dumps
+from app.services.upsert import upsert_add
+from app.services.cache import SingleFlightCache
+from app.services import refdata, eta_model, exit_load, idempotency, latency, rollups
+from app.services.idempotency import idempotent
+from app.services.guest_tokens import ticket_for_token, invalidate_tokens, issue_token
+from app.services.transitions import transition
+from app.routes.notifs import queue_and_send, queue_notifications, send_queued, _render_message
+from app.routes.claim import invalidate_venue_slug
 
 bp = Blueprint("core", __name__)
 
@@ -30,135 +45,41 @@ def _generate_claim_code(venue_id: int) -> str:
             return code
     abort(500, "could not generate unique claim code")
 
-ALLOWED_TRANSITIONS = {
-    "SCHEDULED": {"REQUESTED", "CANCELED"},
-    "REQUESTED": {"ASSIGNED", "RETRIEVING"},
-    "ASSIGNED": {"RETRIEVING"},
-    "RETRIEVING": {"READY"},
-    "READY": {"PICKED_UP"},
-    "PICKED_UP": {"CLOSED"},
-    "CLOSED": set(),
-    "CANCELED": set(),
-}
-
-ACTIVE_STATUSES = ["SCHEDULED", "REQUESTED", "ASSIGNED", "RETRIEVING", "READY"]
-
 # Reschedule / cancel rules (ops polish)
 RESCHEDULE_MIN_SECONDS_BEFORE = 30   # no reschedule within this many seconds of scheduled_for
 RESCHEDULE_MAX_PER_REQUEST = 3       # max reschedule count per SCHEDULED request
 RESCHEDULE_COOLDOWN_SECONDS = 10     # min seconds between reschedule/cancel changes
 CANCEL_MIN_SECONDS_BEFORE = 10      # no cancel within this many seconds of scheduled_for (use 30 to match reschedule)
 
-def _json(model):
-    # serialize to JSON for API responses
-    if model is None:
-        return None
-    if isinstance(model, Venue):
-        return {"id": model.id, "name": model.name, "slug": model.slug}
-    if isinstance(model, Exit):
-        return {"id": model.id, "venue_id": model.venue_id, "name": model.name, "code": model.code, "is_active": model.is_active}
-    if isinstance(model, Zone):
-        return {
-            "id": model.id,
-            "venue_id": model.venue_id,
-            "name": model.name,
-            "default_exit_id": model.default_exit_id,
-            "default_exit": _json(model.default_exit),
-        }
-    if isinstance(model, Ticket):
-        return {
-            "id": model.id,
-            "venue_id": model.venue_id,
-            "token": model.token,
-            "car_number": model.car_number,
-            "vehicle_description": model.vehicle_description,
-            "claim_code": model.claim_code,
-            "claimed_phone": model.claimed_phone,
-            "claimed_at": model.claimed_at.isoformat() if model.claimed_at else None,
-            "created_at": model.created_at.isoformat(),
-        }
-    if isinstance(model, CarRequest):
-        ticket = model.ticket
-        claimed_phone_masked = None
-        if ticket and ticket.claimed_phone:
-            p = ticket.claimed_phone
-            if len(p) >= 4:
-                claimed_phone_masked = "***-***-" + p[-4:]
-            else:
-                claimed_phone_masked = "***"
-        out = {
-            "id": model.id,
-            "ticket_id": model.ticket_id,
-            "ticket_token": ticket.token if ticket else None,
-            "car_number": ticket.car_number if ticket else None,
-            "vehicle_description": ticket.vehicle_description if ticket else None,
-            "claimed_at": ticket.claimed_at.isoformat() if ticket and ticket.claimed_at else None,
-            "claimed_phone_masked": claimed_phone_masked,
-            "exit_id": model.exit_id,
-            "exit": _json(model.exit),
-            "status": model.status,
-            "scheduled_for": (model.scheduled_for.isoformat() + "Z") if model.scheduled_for else None,
-            "assigned_to": model.assigned_to,
-            "assigned_at": model.assigned_at.isoformat() if model.assigned_at else None,
-            "zone_id": model.zone_id,
-            "zone": {"id": model.zone.id, "name": model.zone.name} if model.zone else None,
-            "created_at": model.created_at.isoformat(),
-            "updated_at": model.updated_at.isoformat(),
-            "delivered_by_user_id": model.delivered_by_user_id,
-        }
-        out["tip_eligible"] = (
-            str(model.status) in ("CLOSED", "PICKED_UP") and model.delivered_by_user_id is not None
-        )
-        return out
-    if isinstance(model, StatusEvent):
-        return {
-            "id": int(model.id),
-            "ticket_id": model.ticket_id,
-            "request_id": model.request_id,
-            "from_status": model.from_status,
-            "to_status": model.to_status,
-            "note": model.note,
-            "created_at": model.created_at.isoformat(),
-        }
-    return {"id": getattr(model, "id", None)}
+# Analytics results per (venue, endpoint, params): all viewers within ANALYTICS_TTL share one
+# computation, concurrent misses collapse into one, and expired results are served while one
+# request recomputes them.
+ANALYTICS_TTL = 5
+ANALYTICS_STALE_TTL = 60
+_analytics = SingleFlightCache(maxsize=2048, ttl=ANALYTICS_TTL, stale_ttl=ANALYTICS_STALE_TTL)
 
 
-def _exit_stats_for_venue(venue_id: int, window_hours: int = 24, max_seconds: int = 1800):
-    since = datetime.utcnow() - timedelta(hours=window_hours)
+def _venue_analytics(venue_id: int, kind: str, params: tuple, compute):
+    return _analytics.get_or_compute((venue_id, kind, params), compute)
 
-    requested_ts = func.min(
-        case((StatusEvent.to_status == "REQUESTED", StatusEvent.created_at), else_=None)
-    )
-    ready_ts = func.min(
-        case((StatusEvent.to_status == "READY", StatusEvent.created_at), else_=None)
-    )
 
-    per_req = (
-        db.session.query(
-            StatusEvent.request_id.label("rid"),
-            CarRequest.exit_id.label("exit_id"),
-            requested_ts.label("requested_at"),
-            ready_ts.label("ready_at"),
-        )
-        .join(Ticket, Ticket.id == StatusEvent.ticket_id)
-        .join(CarRequest, CarRequest.id == StatusEvent.request_id)
-        .filter(Ticket.venue_id == venue_id)
-        .filter(StatusEvent.created_at >= since)
-        .group_by(StatusEvent.request_id, CarRequest.exit_id)
-        .subquery()
-    )
+def invalidate_analytics(venue_id: int | None = None) -> None:
+    _analytics.discard(lambda key: venue_id is None or key[0] == venue_id)
 
-    duration = func.extract("epoch", per_req.c.ready_at - per_req.c.requested_at)
+
+def _exit_stats_for_venue(venue_id: int, window_hours: int = 24, max_seconds: int = 1800):
+    since = datetime.utcnow() - timedelta(hours=window_hours)
 
     eta_rows = (
         db.session.query(
-            per_req.c.exit_id,
+            RequestLifecycle.exit_id,
             func.count().label("n"),
-            func.avg(duration).label("avg_seconds"),
+            func.avg(RequestLifecycle.ready_seconds).label("avg_seconds"),
         )
-        .filter(per_req.c.requested_at.isnot(None), per_req.c.ready_at.isnot(None))
-        .filter(duration <= max_seconds)
-        .group_by(per_req.c.exit_id)
+        .filter(RequestLifecycle.venue_id == venue_id)
+        .filter(RequestLifecycle.requested_at >= since)
+        .filter(RequestLifecycle.ready_seconds <= max_seconds)
+        .group_by(RequestLifecycle.exit_id)
         .all()
     )
 
@@ -169,24 +90,24 @@ def _exit_stats_for_venue(venue_id: int, window_hours: int = 24, max_seconds: in
 
     q_rows = (
         db.session.query(CarRequest.exit_id, func.count(CarRequest.id))
-        .join(Ticket, Ticket.id == CarRequest.ticket_id)
-        .filter(Ticket.venue_id == venue_id)
+        .filter(CarRequest.venue_id == venue_id)
         .filter(CarRequest.status.in_(ACTIVE_STATUSES))
         .group_by(CarRequest.exit_id)
         .all()
     )
     queue_by_exit = {int(eid): int(cnt) for eid, cnt in q_rows}
 
-    exits = Exit.query.filter_by(venue_id=venue_id, is_active=True).order_by(Exit.id.asc()).all()
+    ref = refdata.get_refdata(venue_id)
+    exits = ref.exits if ref else ()
 
     out = []
     for ex in exits:
-        eta = eta_by_exit.get(ex.id, {"n": 0, "avg_seconds": 0.0})
+        eta = eta_by_exit.get(ex["id"], {"n": 0, "avg_seconds": 0.0})
         out.append({
-            "exit_id": ex.id,
-            "code": ex.code,
-            "name": ex.name,
-            "queue": queue_by_exit.get(ex.id, 0),
+            "exit_id": ex["id"],
+            "code": ex["code"],
+            "name": ex["name"],
+            "queue": queue_by_exit.get(ex["id"], 0),
             "eta_seconds": eta["avg_seconds"],
             "eta_samples": eta["n"],
         })
@@ -206,6 +127,7 @@ def create_venue():
     v = Venue(name=name, slug=slug)
     db.session.add(v)
     db.session.commit()
+    invalidate_venue_slug(slug)
     return jsonify(_json(v)), 201
 
 
@@ -220,6 +142,7 @@ def create_exit(venue_id: int):
         abort(400, "name and code are required")
     ex = Exit(venue_id=venue_id, name=name, code=code)
     db.session.add(ex)
+    refdata.bump_version(venue_id)
     db.session.commit()
     return jsonify(_json(ex)), 201
 
@@ -240,6 +163,7 @@ def create_zone(venue_id: int):
 
     z = Zone(venue_id=venue_id, name=name, default_exit_id=default_exit.id)
     db.session.add(z)
+    refdata.bump_version(venue_id)
     db.session.commit()
     return jsonify({"id": z.id, "venue_id": z.venue_id, "name": z.name, "default_exit_id": z.default_exit_id}), 201
 
@@ -247,24 +171,35 @@ def create_zone(venue_id: int):
 @bp.get("/api/venues/<int:venue_id>/zones")
 @require_role(Role.VALET, Role.MANAGER)
 def list_zones(venue_id: int):
-    zones = Zone.query.filter_by(venue_id=venue_id).order_by(Zone.id.asc()).all()
-    return jsonify([{"id": z.id, "name": z.name, "default_exit_id": z.default_exit_id} for z in zones])
+    ref = refdata.get_refdata(venue_id)
+    if not ref:
+        return jsonify([])
+    return _cacheable(list(ref.zones), ref.etag("zones"), private=True)
+
 
+# Reference data changes rarely; clients revalidate with If-None-Match after this.
+REF_DATA_MAX_AGE = 60
 
-# Canonical exit code order for dropdown (A, B, C)
-EXIT_CODE_ORDER = ("A", "B", "C")
+
+def _cacheable(payload, etag: str, private: bool, max_age: int = REF_DATA_MAX_AGE):
+    """JSON response with ETag + Cache-Control; 304 when the client's If-None-Match matches."""
+    resp = jsonify(payload)
+    resp.set_etag(etag)
+    resp.cache_control.max_age = max_age
+    if private:
+        resp.cache_control.private = True
+    else:
+        resp.cache_control.public = True
+    return resp.make_conditional(request)
 
 
 @bp.get("/api/venues/<int:venue_id>/exits")
 def list_exits(venue_id: int):
-    exits = Exit.query.filter_by(venue_id=venue_id, is_active=True).order_by(Exit.id.asc()).all()
-    # One exit per code (keep first by id), then return in order A, B, C
-    by_code = {}
-    for e in exits:
-        if e.code not in by_code:
-            by_code[e.code] = e
-    ordered = [by_code[c] for c in EXIT_CODE_ORDER if c in by_code]
-    return jsonify([_json(e) for e in ordered])
+    # One exit per code (keep first by id), in order A, B, C
+    ref = refdata.get_refdata(venue_id)
+    if not ref:
+        return jsonify([])
+    return _cacheable(ref.exits_by_code, ref.etag("exits"), private=False)
 
 
 def _ensure_venue_has_abc_exits(venue_id: int) -> list:
@@ -320,13 +255,16 @@ def seed_demo_venue():
         db.session.add(v)
         db.session.flush()
     # Ensure first venue has demo slug for static QR /v/demo-venue
+    renamed_slugs = []
     if v.slug != "demo-venue":
+        renamed_slugs = [v.slug]
         v.slug = "demo-venue"
         db.session.flush()
 
     # Fix ALL venues: each gets exactly A, B, C (one active per code)
-    for venue in Venue.query.order_by(Venue.id.asc()).all():
-        _ensure_venue_has_abc_exits(venue.id)
+    venue_ids = [venue.id for venue in Venue.query.order_by(Venue.id.asc()).all()]
+    for venue_id in venue_ids:
+        _ensure_venue_has_abc_exits(venue_id)
 
     # Re-fetch first venue for zones and response
     v = Venue.query.order_by(Venue.id.asc()).first()
@@ -362,7 +300,9 @@ def seed_demo_venue():
         db.session.flush()
         valet_out = {"id": u.id, "email": u.email}
 
+    refdata.bump_version(*venue_ids)
     db.session.commit()
+    invalidate_venue_slug("demo-venue", *renamed_slugs)
     return jsonify({
         "venue_id": v.id,
         "exits": exits_created,
@@ -383,6 +323,7 @@ def create_demo_ticket():
     expires = datetime.utcnow() + timedelta(hours=CLAIM_CODE_EXPIRY_HOURS)
     t = Ticket(venue_id=venue.id, token=token, claim_code=claim_code, claim_code_expires_at=expires)
     db.session.add(t)
+    issue_token(t)
     db.session.commit()
     return jsonify({"token": t.token, "claim_code": claim_code}), 201
 
@@ -409,6 +350,7 @@ def create_demo_tickets():
         expires = datetime.utcnow() + timedelta(hours=CLAIM_CODE_EXPIRY_HOURS)
         t = Ticket(venue_id=venue.id, token=token, claim_code=claim_code, claim_code_expires_at=expires)
         db.session.add(t)
+        issue_token(t)
         db.session.flush()
         results.append({"token": t.token, "guest_url": f"/t/{t.token}", "claim_code": claim_code, "venue_slug": venue.slug})
     db.session.commit()
@@ -430,11 +372,26 @@ def reset_demo():
 
     if venue_id is not None:
         Venue.query.get_or_404(venue_id)
-        ticket_ids = [r[0] for r in db.session.query(Ticket.id).filter(Ticket.venue_id == venue_id).all()]
+        ticket_rows = db.session.query(Ticket.id, Ticket.token).filter(Ticket.venue_id == venue_id).all()
     else:
-        ticket_ids = [r[0] for r in db.session.query(Ticket.id).all()]
+        ticket_rows = db.session.query(Ticket.id, Ticket.token).all()
+    ticket_ids = [r[0] for r in ticket_rows]
+
+    # Tip rollups are per venue, not per ticket: clear them with the tips they summarize
+    tip_rollups = TipRollup.query if venue_id is None else TipRollup.query.filter(TipRollup.venue_id == venue_id)
+    tip_rollups.delete(synchronize_session=False)
+    # Rollups summarize the deleted requests; active requests go with the tickets
+    rollup_rows = ExitRollup.query if venue_id is None else ExitRollup.query.filter(ExitRollup.venue_id == venue_id)
+    rollup_rows.delete(synchronize_session=False)
+    # queue depths drop to zero, ETAs are kept
+    loads = ExitLoad.query if venue_id is None else ExitLoad.query.filter(ExitLoad.venue_id == venue_id)
+    loads.update({"queue_depth": 0}, synchronize_session=False)
+    bins = LatencyBin.query if venue_id is None else LatencyBin.query.filter(LatencyBin.venue_id == venue_id)
+    bins.delete(synchronize_session=False)
 
     if not ticket_ids:
+        db.session.commit()
+        invalidate_analytics(venue_id)
         return jsonify({"ok": True, "deleted": {"tickets": 0, "requests": 0, "status_events": 0, "notification_subscriptions": 0, "outbox": 0, "tips": 0}}), 200
 
     # Child tables first (FK constraints). Tips reference requests, so delete tips before requests.
@@ -443,10 +400,14 @@ def reset_demo():
     n_outbox = NotificationOutbox.query.filter(NotificationOutbox.ticket_id.in_(ticket_ids)).delete(synchronize_session=False)
     n_subs = NotificationSubscription.query.filter(NotificationSubscription.ticket_id.in_(ticket_ids)).delete(synchronize_session=False)
     n_events = StatusEvent.query.filter(StatusEvent.ticket_id.in_(ticket_ids)).delete(synchronize_session=False)
+    if request_ids:
+        RequestLifecycle.query.filter(RequestLifecycle.request_id.in_(request_ids)).delete(synchronize_session=False)
     n_requests = CarRequest.query.filter(CarRequest.ticket_id.in_(ticket_ids)).delete(synchronize_session=False)
     n_tickets = Ticket.query.filter(Ticket.id.in_(ticket_ids)).delete(synchronize_session=False)
 
     db.session.commit()
+    invalidate_tokens(*(r[1] for r in ticket_rows))
+    invalidate_analytics(venue_id)
     return jsonify({
         "ok": True,
         "deleted": {
@@ -473,6 +434,7 @@ def create_ticket():
     expires = datetime.utcnow() + timedelta(hours=CLAIM_CODE_EXPIRY_HOURS)
     t = Ticket(venue_id=int(venue_id), token=token, claim_code=claim_code, claim_code_expires_at=expires)
     db.session.add(t)
+    issue_token(t)
     db.session.commit()
     return jsonify({"ticket": _json(t), "guest_path": f"/t/{t.token}", "claim_code": claim_code, "venue_slug": venue.slug}), 201
 
@@ -494,6 +456,7 @@ def valet_create_ticket():
         expires = datetime.utcnow() + timedelta(hours=CLAIM_CODE_EXPIRY_HOURS)
         t = Ticket(venue_id=venue.id, token=token, claim_code=claim_code, claim_code_expires_at=expires)
         db.session.add(t)
+        issue_token(t)
         db.session.flush()
         results.append({
             "ticket": _json(t),
@@ -512,25 +475,26 @@ def valet_create_ticket():
 def set_ticket_car_number(ticket_id: int):
     """Valet/manager: set car number (plate) and vehicle description (e.g. McLaren 720) on ticket."""
     t = Ticket.query.get_or_404(ticket_id)
-    user = g.user
-    if user.role == Role.VALET and t.venue_id != user.venue_id:
-        abort(403, "ticket not in your venue")
-    data = request.get_json(silent=True) or {}
-    car_number = (data.get("car_number") or "").strip() or None
-    vehicle_description = (data.get("vehicle_description") or "").strip() or None
-    t.car_number = car_number
-    t.vehicle_description = vehicle_description
+    _set_car_number(t, g.user, request.get_json(silent=True) or {})
     db.session.commit()
     return jsonify({"ticket": _json(t)}), 200
 
 
+def _set_car_number(t: Ticket, user, data: dict) -> None:
+    if user.role == Role.VALET and t.venue_id != user.venue_id:
+        abort(403, "ticket not in your venue")
+    t.car_number = (data.get("car_number") or "").strip() or None
+    t.vehicle_description = (data.get("vehicle_description") or "").strip() or None
+
+
 @bp.get("/api/received-tickets")
 @require_role(Role.VALET, Role.MANAGER)
 def list_received_tickets():
     """
     List tickets that have been claimed (customer used OTP) but not yet closed.
     Valet/manager can enter car details here when the car is received.
-    Query: venue_id (required for MANAGER; VALET uses their venue).
+    Query: venue_id (required for MANAGER; VALET uses their venue), limit=50 (max 100),
+    cursor=<next_cursor>. Newest claim first (keyset on claimed_at, id).
     """
     venue_id = request.args.get("venue_id", type=int)
     user = g.user
@@ -538,75 +502,137 @@ def list_received_tickets():
         venue_id = user.venue_id
     if not venue_id:
         abort(400, "venue_id is required")
+    limit = _page_limit(50, 100)
     q = (
         Ticket.query.filter(Ticket.venue_id == venue_id)
         .filter(Ticket.claimed_at.isnot(None))
         .filter(Ticket.closed_at.is_(None))
-        .order_by(Ticket.claimed_at.desc())
-        .limit(50)
     )
-    tickets = q.all()
-    out = []
-    for t in tickets:
-        obj = _json(t)
-        claimed_phone_masked = None
-        if t.claimed_phone and len(t.claimed_phone) >= 4:
-            claimed_phone_masked = "***-***-" + t.claimed_phone[-4:]
-        elif t.claimed_phone:
-            claimed_phone_masked = "***"
-        obj["claimed_phone_masked"] = claimed_phone_masked
-        out.append(obj)
-    return jsonify({"tickets": out})
+    tickets = RECEIVED_TICKET.apply(_keyset(q, Ticket.claimed_at, Ticket.id).limit(limit + 1)).all()
+    return jsonify({
+        "tickets": RECEIVED_TICKET.many(tickets[:limit]),
+        "next_cursor": _next_cursor(tickets, limit, lambda t: (t.claimed_at, t.id)),
+    })
 
 
 GUEST_LINK_EXPIRY_HOURS = 48
 
 
+def _live_guest_ticket(token: str):
+    gt = ticket_for_token(token)  # unknown/expired links are answered without reading the ticket row
+    if gt.closed_at:
+        age_hours = (datetime.utcnow() - gt.closed_at).total_seconds() / 3600
+        if age_hours > GUEST_LINK_EXPIRY_HOURS:
+            abort(404, "This link has expired.")
+    return gt
+
+
 @bp.get("/t/<token>")
 def get_ticket(token: str):
-    t = Ticket.query.filter_by(token=token).first()
+    gt = _live_guest_ticket(token)
+    t = read_models.ticket_by_id(gt.id)
     if not t:
         abort(404, "ticket not found")
-    if t.closed_at:
-        age_hours = (datetime.utcnow() - t.closed_at).total_seconds() / 3600
-        if age_hours > GUEST_LINK_EXPIRY_HOURS:
-            abort(404, "This link has expired.")
 
-    req = CarRequest.query.filter_by(ticket_id=t.id).order_by(CarRequest.id.desc()).first()
-    return jsonify({"ticket": _json(t), "request": _json(req)})
+    req = read_models.latest_request_for_ticket(t.id)
+    return jsonify({"ticket": t.as_json(), "request": req.as_json() if req else None})
 
 
 @bp.get("/t/<token>/exits")
 def ticket_exits(token: str):
     """Guest: list exits for this ticket's venue (no auth). Use this so guest page can load exits without calling /api/venues/:id."""
-    t = Ticket.query.filter_by(token=token).first()
-    if not t:
+    t = ticket_for_token(token)
+    ref = refdata.get_refdata(t.venue_id)
+    if not ref:
+        return jsonify([])
+    return _cacheable(ref.exits_by_code, ref.etag("exits"), private=True)
+
+
+def _recommendation(venue_id: int, queue_penalty: int = 30, window: tuple[int, int] | None = None):
+    """(best option, scored options) for a venue: live exit load, or status_events over window."""
+    model = {}
+    if window is not None:
+        # explicit window: aggregate status_events for it
+        window_hours, max_seconds = window
+        stats = _venue_analytics(
+            venue_id, "exit-stats", window,
+            lambda: _exit_stats_for_venue(venue_id, window_hours=window_hours, max_seconds=max_seconds),
+        )
+    else:
+        stats = _venue_analytics(venue_id, "exit-load", (), lambda: exit_load.live_exit_stats(venue_id))
+        model = eta_model.model_for_venue(venue_id)
+
+    # cached rows are shared between requests: score copies. Exits with a fitted model
+    # (flask fit-eta) score by predicted seconds at their live queue; others by the heuristic.
+    hour = eta_model.hour_of_week(datetime.utcnow())
+    scored = []
+    for s in stats:
+        predicted = eta_model.predict(model, s["exit_id"], hour, s["queue"])
+        if predicted is None:
+            scored.append(dict(s, score=float(s["eta_seconds"] + queue_penalty * s["queue"])))
+        else:
+            scored.append(dict(s, score=float(predicted), predicted_seconds=round(predicted, 1)))
+
+    best = min(scored, key=lambda x: x["score"]) if scored else None
+    return best, scored
+
+
+@bp.get("/t/<token>/bootstrap")
+def guest_bootstrap(token: str):
+    """
+    Everything the guest page needs for its first render, in one round trip:
+    {"version", "ticket", "request", "exits", "recommendation": {"recommended", "options"},
+     "subscriptions": [{"id", "channel", "is_active"}]}.
+    Two queries when the per-worker caches are warm (ticket + latest request, subscriptions);
+    token, exits and the live recommendation come from the caches /t/<token>/... already use.
+    `version` changes with the ticket, its latest request (requests.version) and its
+    subscriptions; the ETag adds the exits and the recommendation, so If-None-Match
+    revalidation returns 304 until any of them changes.
+    """
+    gt = _live_guest_ticket(token)
+    found = read_models.ticket_with_latest_request(gt.id)
+    if not found:
         abort(404, "ticket not found")
-    exits = Exit.query.filter_by(venue_id=t.venue_id, is_active=True).order_by(Exit.id.asc()).all()
-    by_code = {}
-    for e in exits:
-        if e.code not in by_code:
-            by_code[e.code] = e
-    ordered = [by_code[c] for c in EXIT_CODE_ORDER if c in by_code]
-    return jsonify([_json(e) for e in ordered])
+    t, req, req_version = found
+    subscriptions = [
+        {"id": sid, "channel": channel, "is_active": is_active}
+        for sid, channel, is_active in db.session.execute(
+            db.select(NotificationSubscription.id, NotificationSubscription.channel, NotificationSubscription.is_active)
+            .where(NotificationSubscription.ticket_id == t.id)
+            .order_by(NotificationSubscription.id)
+        )
+    ]
+    ref = refdata.get_refdata(gt.venue_id)
+    exits = ref.exits_by_code if ref else []
+    best, options = _recommendation(gt.venue_id)
+
+    stamp = (t.id, t.updated_at, t.closed_at, req.id if req else None, req_version, req.updated_at if req else None,
+             tuple((s["id"], s["is_active"]) for s in subscriptions))
+    version = hashlib.sha1(repr(stamp).encode()).hexdigest()[:16]
+    payload = {
+        "version": version,
+        "ticket": t.as_json(),
+        "request": req.as_json() if req else None,
+        "exits": exits,
+        "recommendation": {"recommended": best, "options": options},
+        "subscriptions": subscriptions,
+    }
+    live = hashlib.sha1(dumps([ref.version if ref else 0, options]).encode()).hexdigest()[:8]
+    return _cacheable(payload, f"bootstrap-{version}-{live}", private=True, max_age=0)
 
 
 @bp.get("/t/<token>/recommendations")
 def guest_recommendations(token: str):
-    t = Ticket.query.filter_by(token=token).first()
-    if not t:
-        abort(404, "ticket not found")
+    t = ticket_for_token(token)
 
     window_hours = request.args.get("window_hours", default=24, type=int)
     max_seconds = request.args.get("max_seconds", default=1800, type=int)
     queue_penalty = request.args.get("queue_penalty", default=30, type=int)
 
-    stats = _exit_stats_for_venue(t.venue_id, window_hours=window_hours, max_seconds=max_seconds)
-
-    for s in stats:
-        s["score"] = float(s["eta_seconds"] + queue_penalty * s["queue"])
-
-    best = min(stats, key=lambda x: x["score"]) if stats else None
+    explicit = "window_hours" in request.args or "max_seconds" in request.args
+    best, stats = _recommendation(
+        t.venue_id, queue_penalty, window=(window_hours, max_seconds) if explicit else None,
+    )
 
     return jsonify({
         "ticket_token": token,
@@ -620,10 +646,9 @@ def guest_recommendations(token: str):
 
 
 @bp.post("/t/<token>/request")
+@idempotent
 def request_car(token: str):
-    t = Ticket.query.filter_by(token=token).first()
-    if not t:
-        abort(404, "ticket not found")
+    t = ticket_for_token(token)
 
     data = request.get_json(force=True)
     exit_id = data.get("exit_id")
@@ -641,13 +666,11 @@ def request_car(token: str):
             exit_id = chosen_zone.default_exit_id
 
     if auto and not exit_id:
-        stats = _exit_stats_for_venue(t.venue_id)
-        if stats:
-            queue_penalty = 30
-            best = min(stats, key=lambda s: float(s["eta_seconds"] + queue_penalty * s["queue"]))
-            exit_id = best["exit_id"]
-        else:
+        # the same choice /t/<token>/recommendations shows the guest
+        best, _ = _recommendation(t.venue_id)
+        if best is None:
             abort(400, "no exits available for auto selection")
+        exit_id = best["exit_id"]
 
     ex = Exit.query.get_or_404(int(exit_id))
     if ex.venue_id != t.venue_id:
@@ -700,6 +723,7 @@ def request_car(token: str):
         delay_minutes_display = int((scheduled_for_dt - now).total_seconds() / 60)
         r = CarRequest(
             ticket_id=t.id,
+            venue_id=t.venue_id,
             exit_id=ex.id,
             status=RequestStatus.SCHEDULED.value,
             zone_id=chosen_zone.id if chosen_zone else None,
@@ -710,6 +734,7 @@ def request_car(token: str):
 
         ev = StatusEvent(
             ticket_id=t.id,
+            venue_id=t.venue_id,
             request_id=r.id,
             from_status=None,
             to_status=RequestStatus.SCHEDULED.value,
@@ -726,6 +751,7 @@ def request_car(token: str):
     # delay_minutes == 0: normal REQUESTED flow
     r = CarRequest(
         ticket_id=t.id,
+        venue_id=t.venue_id,
         exit_id=ex.id,
         status=RequestStatus.REQUESTED.value,
         zone_id=chosen_zone.id if chosen_zone else None,
@@ -735,6 +761,7 @@ def request_car(token: str):
 
     ev = StatusEvent(
         ticket_id=t.id,
+        venue_id=t.venue_id,
         request_id=r.id,
         from_status=None,
         to_status=RequestStatus.REQUESTED.value,
@@ -748,9 +775,7 @@ def request_car(token: str):
 
 @bp.patch("/t/<token>/request/<int:req_id>/schedule")
 def reschedule(token: str, req_id: int):
-    t = Ticket.query.filter_by(token=token).first()
-    if not t:
-        abort(404, "ticket not found")
+    t = ticket_for_token(token)
 
     r = CarRequest.query.get_or_404(req_id)
     if r.ticket_id != t.id:
@@ -793,18 +818,10 @@ def reschedule(token: str, req_id: int):
     new_scheduled_for = now + timedelta(minutes=delay_minutes)
     if new_scheduled_for <= now:
         abort(400, "scheduled time must be in the future")
-    r.scheduled_for = new_scheduled_for
-    r.updated_at = now
-    db.session.add(r)
-
-    ev = StatusEvent(
-        ticket_id=t.id,
-        request_id=r.id,
-        from_status="SCHEDULED",
-        to_status="SCHEDULED",
-        note=f"Rescheduled to +{delay_minutes} min",
+    transition(
+        r, [("SCHEDULED", f"Rescheduled to +{delay_minutes} min")],
+        values={"scheduled_for": new_scheduled_for}, allow_same=True,
     )
-    db.session.add(ev)
     db.session.commit()
 
     return jsonify({"request": _json(r)})
@@ -812,9 +829,7 @@ def reschedule(token: str, req_id: int):
 
 @bp.post("/t/<token>/request/<int:req_id>/cancel")
 def cancel_scheduled(token: str, req_id: int):
-    t = Ticket.query.filter_by(token=token).first()
-    if not t:
-        abort(404, "ticket not found")
+    t = ticket_for_token(token)
 
     r = CarRequest.query.get_or_404(req_id)
     if r.ticket_id != t.id:
@@ -838,19 +853,7 @@ def cancel_scheduled(token: str, req_id: int):
     if r.scheduled_for and now >= r.scheduled_for - timedelta(seconds=CANCEL_MIN_SECONDS_BEFORE):
         abort(400, f"cannot cancel within {CANCEL_MIN_SECONDS_BEFORE} seconds of scheduled time")
 
-    old = r.status
-    r.status = "CANCELED"
-    r.updated_at = now
-    db.session.add(r)
-
-    ev = StatusEvent(
-        ticket_id=t.id,
-        request_id=r.id,
-        from_status=str(old),
-        to_status="CANCELED",
-        note="Canceled by guest",
-    )
-    db.session.add(ev)
+    transition(r, [("CANCELED", "Canceled by guest")])
     db.session.commit()
 
     return jsonify({"request": _json(r)})
@@ -859,9 +862,7 @@ def cancel_scheduled(token: str, req_id: int):
 @bp.post("/t/<token>/request/<int:req_id>/picked-up")
 def guest_mark_picked_up(token: str, req_id: int):
     """Guest: mark request as picked up when status is READY (car at exit)."""
-    t = Ticket.query.filter_by(token=token).first()
-    if not t:
-        abort(404, "ticket not found")
+    t = ticket_for_token(token)
 
     r = CarRequest.query.get_or_404(req_id)
     if r.ticket_id != t.id:
@@ -869,39 +870,25 @@ def guest_mark_picked_up(token: str, req_id: int):
     if str(r.status) != "READY":
         abort(400, "can only mark picked up when car is ready")
 
-    now = datetime.utcnow()
-    r.status = RequestStatus.PICKED_UP.value
-    r.updated_at = now
-    db.session.add(StatusEvent(
-        ticket_id=t.id,
-        request_id=r.id,
-        from_status="READY",
-        to_status=RequestStatus.PICKED_UP.value,
-        note="Got my car (guest)",
-    ))
-    r.status = "CLOSED"
-    r.updated_at = now
-    db.session.add(StatusEvent(
-        ticket_id=t.id,
-        request_id=r.id,
-        from_status=RequestStatus.PICKED_UP.value,
-        to_status="CLOSED",
-        note="Auto-closed after pickup",
-    ))
+    transition(r, [
+        (RequestStatus.PICKED_UP.value, "Got my car (guest)"),
+        ("CLOSED", "Auto-closed after pickup"),
+    ])
     if not t.closed_at:
-        t.closed_at = now
-        db.session.add(t)
+        Ticket.query.filter(Ticket.id == t.id, Ticket.closed_at.is_(None)).update(
+            {"closed_at": datetime.utcnow()}, synchronize_session=False  # updated_at via onupdate
+        )
     db.session.commit()
+    invalidate_tokens(token)
 
     return jsonify({"request": _json(r)})
 
 
 @bp.post("/t/<token>/request/<int:req_id>/tip")
+@idempotent
 def guest_create_tip(token: str, req_id: int):
     """Record a tip for a request. Request must be closed and have a deliverer."""
-    t = Ticket.query.filter_by(token=token).first()
-    if not t:
-        abort(404, "ticket not found")
+    t = ticket_for_token(token)
     r = CarRequest.query.get_or_404(req_id)
     if r.ticket_id != t.id:
         abort(403, "not your request")
@@ -921,6 +908,12 @@ def guest_create_tip(token: str, req_id: int):
 
     tip = Tip(request_id=r.id, amount_cents=amount_cents, status="PENDING")
     db.session.add(tip)
+    db.session.flush()
+    upsert_add(
+        TipRollup,
+        keys={"venue_id": t.venue_id, "user_id": r.delivered_by_user_id, "day": tip.created_at.date()},
+        amounts={"total_cents": amount_cents, "tip_count": 1},
+    )
     db.session.commit()
     return jsonify({
         "tip": {"id": tip.id, "request_id": tip.request_id, "amount_cents": tip.amount_cents, "status": tip.status},
@@ -931,12 +924,103 @@ def guest_create_tip(token: str, req_id: int):
 HISTORY_STATUSES_LIST = ["CLOSED", "CANCELED"]
 
 
+def _projection(catalog, formats=("json", "compact")):
+    """
+    Optional payload shaping for list endpoints.
+    Query: fields=id,status,... (only these columns are selected), format=json|compact[|ndjson].
+    compact returns rows as arrays in `columns` order; ndjson streams one object per line.
+    Returns (Projection | None, format); Projection is None for plain json without fields.
+    """
+    fields = request.args.get("fields")
+    fmt = (request.args.get("format") or "json").strip().lower()
+    if fmt not in formats:
+        abort(400, f"format must be one of: {', '.join(formats)}")
+    if not fields and fmt == "json":
+        return None, fmt
+    names = [f.strip() for f in (fields or "").split(",") if f.strip()]
+    try:
+        return catalog.project(names), fmt
+    except KeyError as e:
+        abort(400, f"unknown field: {e.args[0]}")
+
+
+# Keyset pagination on (timestamp, id), newest first. Cursors are opaque to clients.
+EXPORT_YIELD_PER = 1000
+
+
+def _encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = f"{ts.isoformat()}|{int(row_id)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(raw: str | None):
+    if not raw:
+        return None
+    try:
+        ts, row_id = base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)).decode().split("|")
+        return datetime.fromisoformat(ts), int(row_id)
+    except ValueError:  # includes binascii.Error, UnicodeDecodeError
+        abort(400, "invalid cursor")
+
+
+def _keyset(q, ts_col, id_col):
+    """Apply ?cursor= (rows strictly older than the cursor) and newest-first ordering."""
+    cursor = _decode_cursor(request.args.get("cursor"))
+    if cursor:
+        q = q.filter(tuple_(ts_col, id_col) < tuple_(*cursor))
+    return q.order_by(ts_col.desc(), id_col.desc())
+
+
+def _time_window(q, ts_col):
+    """Apply optional ?since= / ?until= ISO 8601 bounds (UTC) on ts_col."""
+    for name, op in (("since", ts_col.__ge__), ("until", ts_col.__lt__)):
+        raw = request.args.get(name)
+        if not raw:
+            continue
+        try:
+            ts = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        except ValueError:
+            abort(400, f"{name} must be a valid ISO 8601 datetime string")
+        if ts.tzinfo:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+        q = q.filter(op(ts))
+    return q
+
+
+def _page_limit(default: int, maximum: int) -> int:
+    return min(max(1, request.args.get("limit", default=default, type=int)), maximum)
+
+
+def _next_cursor(rows, limit: int, key) -> str | None:
+    if len(rows) <= limit:
+        return None
+    return _encode_cursor(*key(rows[limit - 1]))
+
+
+def _ndjson(projection, stmt, filename: str) -> Response:
+    """Stream every row of stmt as NDJSON through a server-side cursor (constant memory)."""
+    def gen():
+        result = db.session.execute(stmt.execution_options(yield_per=EXPORT_YIELD_PER))
+        try:
+            for rows in result.partitions():
+                yield "".join(dumps(obj) + "\n" for obj in projection.dump(rows))
+        finally:
+            result.close()
+
+    return Response(
+        stream_with_context(gen()),
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={filename}.ndjson"},
+    )
+
+
 @bp.get("/api/requests")
 @require_role(Role.VALET, Role.MANAGER)
 def list_requests():
     """
     List requests. Ops cleanliness: default view = Active only; History = CLOSED/CANCELED.
-    Query: scope=active|history (default active), limit=50 (max 100), cursor=<id>.
+    Query: scope=active|history (default active), limit=50 (max 100), cursor=<id>,
+    fields=..., format=json|compact (see _projection).
     active = SCHEDULED, REQUESTED, ASSIGNED, RETRIEVING, READY.
     history = CLOSED, CANCELED.
     Pagination: cursor is the last id from previous page; returns next_cursor for "load more".
@@ -956,112 +1040,178 @@ def list_requests():
     if user.role == Role.VALET:
         venue_id = user.venue_id
 
-    q = CarRequest.query
+    projection, fmt = _projection(read_models.REQUEST_FIELDS)
+    compact = fmt == "compact"
+    q = projection.select() if projection else read_models.select_requests()
     if venue_id:
-        q = q.join(Ticket, Ticket.id == CarRequest.ticket_id).filter(Ticket.venue_id == venue_id)
+        q = q.where(CarRequest.venue_id == venue_id)
     if status:
-        q = q.filter(CarRequest.status == status)
+        q = q.where(CarRequest.status == status)
     if exit_id:
-        q = q.filter(CarRequest.exit_id == exit_id)
+        q = q.where(CarRequest.exit_id == exit_id)
     if scope == "active":
-        q = q.filter(CarRequest.status.in_(ACTIVE_STATUSES))
+        q = q.where(CarRequest.status.in_(ACTIVE_STATUSES))
     else:
-        q = q.filter(CarRequest.status.in_(HISTORY_STATUSES_LIST))
+        q = q.where(CarRequest.status.in_(HISTORY_STATUSES_LIST))
     if cursor:
-        q = q.filter(CarRequest.id < cursor)
+        q = q.where(CarRequest.id < cursor)
     q = q.order_by(CarRequest.id.desc()).limit(limit + 1)
-    reqs = q.all()
+    if projection:
+        rows = projection.fetch(q)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        out = {
+            "requests": projection.dump(rows, compact=compact),
+            "next_cursor": projection.key(rows[-1])[0] if rows and has_more else None,
+        }
+        if compact:
+            out["columns"] = projection.columns
+        return jsonify(out)
+    reqs = read_models.fetch_requests(q)
     has_more = len(reqs) > limit
     if has_more:
         reqs = reqs[:limit]
     next_cursor = reqs[-1].id if reqs and has_more else None
     return jsonify({
-        "requests": [_json(r) for r in reqs],
+        "requests": [r.as_json() for r in reqs],
         "next_cursor": next_cursor,
     })
 
 
+def _tip_totals_query(venue_id: int):
+    """All-time tip totals per valet from the per-day rollups (rows = valets x days, not tips)."""
+    return (
+        select(
+            TipRollup.user_id,
+            User.email,
+            func.sum(TipRollup.total_cents),
+            func.sum(TipRollup.tip_count),
+        )
+        .outerjoin(User, User.id == TipRollup.user_id)
+        .where(TipRollup.venue_id == venue_id)
+        .group_by(TipRollup.user_id, User.email)
+        .order_by(func.sum(TipRollup.total_cents).desc())
+    )
+
+
+def _tip_totals_by_valet(venue_id: int) -> list[dict]:
+    rows = db.session.execute(_tip_totals_query(venue_id)).all()
+    return [
+        {"user_id": uid, "email": email, "total_cents": int(total or 0), "count": int(count or 0)}
+        for uid, email, total, count in rows
+    ]
+
+
 @bp.get("/api/tips")
 @require_role(Role.VALET, Role.MANAGER)
 def list_tips():
-    """List tips for a venue. Returns recent tips and totals per valet."""
+    """
+    List tips for a venue. Returns recent tips (paged) and all-time totals per valet.
+    Query: limit=100 (max 200), cursor=<next_cursor>, fields=..., format=json|compact|ndjson.
+    ndjson streams every tip (optionally since=/until= ISO timestamps) and ignores limit.
+    """
     venue_id = request.args.get("venue_id", type=int)
     user = g.user
     if user.role == Role.VALET:
         venue_id = user.venue_id
     if not venue_id:
         abort(400, "venue_id is required")
+    projection, fmt = _projection(read_models.TIP_FIELDS, formats=("json", "compact", "ndjson"))
+    if fmt == "ndjson":
+        q = _time_window(projection.select().where(CarRequest.venue_id == venue_id), Tip.created_at)
+        return _ndjson(projection, _keyset(q, Tip.created_at, Tip.id), f"tips-venue-{venue_id}")
+    limit = _page_limit(100, 200)
+
+    out = {"by_valet": _tip_totals_by_valet(venue_id)}
+    if projection:
+        q = projection.select().where(CarRequest.venue_id == venue_id)
+        rows = projection.fetch(_keyset(q, Tip.created_at, Tip.id).limit(limit + 1))
+        out["next_cursor"] = _next_cursor(rows, limit, projection.key)
+        out["tips"] = projection.dump(rows[:limit], compact=fmt == "compact")
+        if fmt == "compact":
+            out["columns"] = projection.columns
+    else:
+        q = (
+            Tip.query.join(CarRequest, CarRequest.id == Tip.request_id)
+            .filter(CarRequest.venue_id == venue_id)
+        )
+        tips = TIP.apply(_keyset(q, Tip.created_at, Tip.id).limit(limit + 1)).all()
+        out["next_cursor"] = _next_cursor(tips, limit, lambda t: (t.created_at, t.id))
+        out["tips"] = TIP.many(tips[:limit])
+    return jsonify(out)
 
-    tips = (
-        Tip.query.join(CarRequest, CarRequest.id == Tip.request_id)
-        .join(Ticket, Ticket.id == CarRequest.ticket_id)
-        .filter(Ticket.venue_id == venue_id)
-        .order_by(Tip.created_at.desc())
-        .limit(100)
-        .all()
+
+def _assign(r: CarRequest, user, assigned_to: str, pending: list | None = None) -> dict | None:
+    """Assign r to assigned_to; returns the "already assigned" error body instead of assigning."""
+    if user.role == Role.VALET and r.venue_id != user.venue_id:
+        abort(403, "forbidden")
+    if r.assigned_to and r.assigned_to != assigned_to:
+        return {"error": "already assigned", "assigned_to": r.assigned_to}
+    # reassigning to the same valet is allowed (ASSIGNED -> ASSIGNED); a concurrent assign gets 409
+    transition(
+        r, [(RequestStatus.ASSIGNED.value, f"Assigned to {assigned_to}")],
+        values={"assigned_to": assigned_to, "assigned_at": datetime.utcnow()}, allow_same=True, pending=pending,
     )
-    by_valet = {}
-    for tip in tips:
-        r = tip.request
-        uid = r.delivered_by_user_id
-        if uid is None:
-            uid = 0
-        if uid not in by_valet:
-            u = r.delivered_by
-            by_valet[uid] = {"user_id": uid, "email": u.email if u else None, "total_cents": 0, "count": 0}
-        by_valet[uid]["total_cents"] += tip.amount_cents
-        by_valet[uid]["count"] += 1
-
-    tips_out = []
-    for t in tips:
-        ticket = t.request.ticket if t.request else None
-        tips_out.append({
-            "id": t.id,
-            "request_id": t.request_id,
-            "amount_cents": t.amount_cents,
-            "status": t.status,
-            "created_at": t.created_at.isoformat(),
-            "vehicle_description": ticket.vehicle_description if ticket else None,
-            "car_number": ticket.car_number if ticket else None,
-        })
-    return jsonify({
-        "tips": tips_out,
-        "by_valet": list(by_valet.values()),
-    })
+    return None
 
 
-@bp.post("/api/requests/<int:req_id>/assign")
-@require_role(Role.VALET, Role.MANAGER)
-def assign_request(req_id: int):
-    r = CarRequest.query.get_or_404(req_id)
-    data = request.get_json(force=True)
-    user = g.user
-    assigned_to = (data.get("assigned_to") or "").strip()
+def _assignee(user, data: dict) -> str:
     if user.role == Role.VALET:
-        assigned_to = user.email
+        return user.email
+    assigned_to = (data.get("assigned_to") or "").strip()
     if not assigned_to:
         abort(400, "assigned_to is required (string)")
+    return assigned_to
 
-    if user.role == Role.VALET and r.ticket.venue_id != user.venue_id:
+
+def _set_status(r: CarRequest, user, status, pending: list | None = None) -> tuple[StatusEvent, str | None]:
+    """
+    Staff status change; returns the transition's event and the token of a ticket it closed.
+    With `pending` the events are left unflushed there (see transitions.transition).
+    """
+    if not status:
+        abort(400, "status is required")
+    if user.role == Role.VALET and r.venue_id != user.venue_id:
         abort(403, "forbidden")
+    try:
+        new_status = RequestStatus(status)
+    except ValueError:
+        abort(400, "invalid status")
 
-    if r.assigned_to and r.assigned_to != assigned_to:
-        return jsonify({"error": "already assigned", "assigned_to": r.assigned_to}), 409
+    new = str(new_status.value)
+    steps = [(new, None)]
+    values = {}
+    # track who delivered (valet who marked READY, or PICKED_UP if READY was skipped)
+    if new == "READY" or (new == "PICKED_UP" and r.delivered_by_user_id is None):
+        values = {"delivered_by_user_id": user.id, "delivered_at": datetime.utcnow()}
+    if new == "PICKED_UP":
+        steps.append(("CLOSED", "Auto-closed after pickup"))
+    ev = transition(r, steps, values, pending=pending)[0]
+
+    closed_token = None
+    if new == "PICKED_UP":
+        t = r.ticket
+        if t and not t.closed_at:
+            t.closed_at = datetime.utcnow()
+            db.session.add(t)
+            closed_token = t.token
+    return ev, closed_token
+
+
+def _ready_notification(r: CarRequest, ev: StatusEvent) -> tuple:
+    exit_code = r.exit.code if r.exit else None
+    msg = _render_message(ticket_token=r.ticket.token, to_status=ev.to_status, exit_code=exit_code)
+    return (r.ticket_id, r.id, ev.id, msg)
 
-    old = r.status
-    r.assigned_to = assigned_to
-    r.assigned_at = datetime.utcnow()
-    r.updated_at = datetime.utcnow()
-    r.status = RequestStatus.ASSIGNED.value
 
-    ev = StatusEvent(
-        ticket_id=r.ticket_id,
-        request_id=r.id,
-        from_status=str(old),
-        to_status=RequestStatus.ASSIGNED.value,
-        note=f"Assigned to {assigned_to}",
-    )
-    db.session.add(ev)
+@bp.post("/api/requests/<int:req_id>/assign")
+@require_role(Role.VALET, Role.MANAGER)
+def assign_request(req_id: int):
+    r = CarRequest.query.get_or_404(req_id)
+    data = request.get_json(force=True)
+    conflict = _assign(r, g.user, _assignee(g.user, data))
+    if conflict:
+        return jsonify(conflict), 409
     db.session.commit()
 
     return jsonify(_json(r))
@@ -1069,6 +1219,7 @@ def assign_request(req_id: int):
 
 @bp.patch("/api/requests/<int:req_id>/status")
 @require_role(Role.VALET, Role.MANAGER)
+@idempotent
 def update_request_status(req_id: int):
     data = request.get_json(force=True)
     status = data.get("status")
@@ -1076,83 +1227,264 @@ def update_request_status(req_id: int):
         abort(400, "status is required")
 
     r = CarRequest.query.get_or_404(req_id)
-    user = g.user
-    if user.role == Role.VALET and r.ticket.venue_id != user.venue_id:
-        abort(403, "forbidden")
-    try:
-        new_status = RequestStatus(status)
-    except ValueError:
-        abort(400, "invalid status")
+    ev, closed_token = _set_status(r, g.user, status)
+    notification = _ready_notification(r, ev) if ev.to_status == "READY" else None
+    db.session.commit()
+    if closed_token:
+        invalidate_tokens(closed_token)
 
-    old = str(r.status)
-    new = str(new_status.value)
-    if new not in ALLOWED_TRANSITIONS.get(old, set()):
-        abort(400, f"invalid transition: {old} -> {new}")
-
-    ev = None
-    if r.status != new_status.value:
-        previous = r.status
-        r.status = new_status.value
-        r.updated_at = datetime.utcnow()
-        now = datetime.utcnow()
-        # track who delivered (valet who marked READY, or PICKED_UP if READY was skipped)
-        if new == "READY":
-            r.delivered_by_user_id = user.id
-            r.delivered_at = now
-        elif new == "PICKED_UP" and r.delivered_by_user_id is None:
-            r.delivered_by_user_id = user.id
-            r.delivered_at = now
+    if notification:
+        queue_and_send(*notification)
+    return jsonify({"request": _json(r)})
 
-        ev = StatusEvent(
-            ticket_id=r.ticket_id,
-            request_id=r.id,
-            from_status=previous,
-            to_status=new_status.value,
-            note=None,
-        )
-        db.session.add(ev)
 
-        if new == "PICKED_UP":
-            r.status = "CLOSED"
-            r.updated_at = datetime.utcnow()
-            db.session.add(StatusEvent(
-                ticket_id=r.ticket_id,
-                request_id=r.id,
-                from_status="PICKED_UP",
-                to_status="CLOSED",
-                note="Auto-closed after pickup",
-            ))
-
-            t = Ticket.query.get(r.ticket_id)
-            if t and not t.closed_at:
-                t.closed_at = datetime.utcnow()
-                db.session.add(t)
+def _apply_request_op(r: CarRequest, user, action, op: dict, events: list, ready: list, closed_tokens: list) -> dict | None:
+    """
+    One batch / sync item on r ("assign" or "status"); returns _assign's conflict body, if any.
+    Its status events go to `events` and READY ones also to `ready` as (r, event), for
+    _insert_batch_events after the last item.
+    """
+    if action == "assign":
+        return _assign(r, user, _assignee(user, op), pending=events)
+    if action != "status":
+        abort(400, "action must be assign or status")
+    ev, closed_token = _set_status(r, user, op.get("status"), pending=events)
+    if closed_token:
+        closed_tokens.append(closed_token)
+    if ev.to_status == "READY":
+        ready.append((r, ev))
+    return None
+
+
+def _insert_batch_events(events: list, ready: list) -> list:
+    """All of a batch's status events in one flush; returns READY notifications (need event ids)."""
+    db.session.add_all(events)
+    db.session.flush()
+    return [_ready_notification(r, ev) for r, ev in ready]
+
+
+BATCH_MAX_OPERATIONS = 50
+
 
+@bp.post("/api/requests/batch")
+@require_role(Role.VALET, Role.MANAGER)
+def batch_update_requests():
+    """
+    Several assign / status changes in one round trip and one transaction (valet devices).
+    Body: {"operations": [{"id": 12, "action": "assign"}, {"id": 13, "status": "READY"}, ...]}
+    ("action" defaults to "status" when "status" is given; managers pass "assigned_to").
+    Results are per item, in order: {"id", "ok": true, "request"} or {"id", "ok": false, "status", "error"}.
+    A failing item writes nothing (every check and the compare-and-set run before any write),
+    so the other items still commit. Each item is one compare-and-set UPDATE; the status events
+    of all items are inserted in one flush after the last one, then the READY notifications
+    are queued together.
+    """
+    data = request.get_json(force=True)
+    ops = data.get("operations")
+    if not isinstance(ops, list) or not ops:
+        abort(400, "operations must be a non-empty list")
+    if len(ops) > BATCH_MAX_OPERATIONS:
+        abort(400, f"at most {BATCH_MAX_OPERATIONS} operations per batch")
+
+    user = g.user
+    ids = {op["id"] for op in ops if isinstance(op, dict) and isinstance(op.get("id"), int)}
+    by_id = {
+        r.id: r
+        for r in CarRequest.query.options(selectinload(CarRequest.ticket), selectinload(CarRequest.exit))
+        .filter(CarRequest.id.in_(ids)).all()
+    } if ids else {}
+
+    results, events, ready, closed_tokens = [], [], [], []
+    for op in ops:
+        op_id = op.get("id") if isinstance(op, dict) else None
+        try:
+            if not isinstance(op_id, int):
+                abort(400, "each operation needs an integer id")
+            r = by_id.get(op_id)
+            if r is None:
+                abort(404, "request not found")
+            action = op.get("action") or ("status" if "status" in op else None)
+            conflict = _apply_request_op(r, user, action, op, events, ready, closed_tokens)
+            if conflict:
+                results.append({"id": op_id, "ok": False, "status": 409, **conflict})
+                continue
+        except HTTPException as e:
+            results.append({"id": op_id, "ok": False, "status": e.code, "error": e.description})
+            continue
+        results.append({"id": op_id, "ok": True, "request": _json(r)})
+
+    queued = queue_notifications(_insert_batch_events(events, ready))
     db.session.commit()
+    invalidate_tokens(*closed_tokens)
+    send_queued(queued)
+    return jsonify({"results": results})
+
+
+SYNC_MAX_ACTIONS = 200
+SYNC_ACTION_TYPES = ("car_number", "assign", "status")
+# Rows whose transaction committed just after our read can carry an updated_at slightly older
+# than the version we hand out; deltas re-send this much history so they are never skipped.
+SYNC_OVERLAP = timedelta(seconds=5)
+SYNC_REQUEST_COLUMNS = [
+    "id", "ticket_id", "car_number", "vehicle_description", "exit_id", "exit_code", "status",
+    "scheduled_for", "assigned_to", "zone_id", "created_at", "updated_at", "version",
+]
+SYNC_TICKET_COLUMNS = ["id", "car_number", "vehicle_description", "claimed_at", "claimed_phone_masked", "closed_at"]
+
+
+def _sync_version(dt: datetime) -> int:
+    return int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _sync_delta(venue_id: int, since: int | None) -> dict:
+    """Venue rows changed since the client's version, or the open state when since is None."""
+    requests_p = read_models.REQUEST_FIELDS.project(SYNC_REQUEST_COLUMNS)
+    tickets_p = read_models.TICKET_FIELDS.project(SYNC_TICKET_COLUMNS)
+    rq = requests_p.select().where(CarRequest.venue_id == venue_id)
+    tq = tickets_p.select().where(Ticket.venue_id == venue_id)
+    if since is None:
+        rq = rq.where(CarRequest.status.in_(ACTIVE_STATUSES))
+        tq = tq.where(Ticket.claimed_at.isnot(None), Ticket.closed_at.is_(None))
+    else:
+        cutoff = datetime.fromtimestamp(since / 1000, timezone.utc).replace(tzinfo=None) - SYNC_OVERLAP
+        rq = rq.where(CarRequest.updated_at > cutoff)
+        tq = tq.where(Ticket.updated_at > cutoff)
+    return {
+        "requests": {"columns": requests_p.columns,
+                     "rows": requests_p.dump(requests_p.fetch(rq.order_by(CarRequest.id)), compact=True)},
+        "tickets": {"columns": tickets_p.columns,
+                    "rows": tickets_p.dump(tickets_p.fetch(tq.order_by(Ticket.id)), compact=True)},
+    }
 
-    if new_status.value == "READY" and ev:
-        exit_code = r.exit.code if r.exit else None
-        msg = _render_message(ticket_token=r.ticket.token, to_status=str(r.status), exit_code=exit_code)
-        queue_and_send(ticket_id=r.ticket_id, request_id=r.id, status_event_id=ev.id, message=msg)
-    return jsonify({"request": _json(r)})
+
+@bp.post("/api/sync")
+@require_role(Role.VALET, Role.MANAGER)
+def sync_venue():
+    """
+    Offline valet devices: apply the queued actions, then return what changed at the venue.
+    Body: {"since": <version from the last sync> | null, "venue_id" (MANAGER only),
+           "actions": [{"key": "<client id>", "at": <epoch ms>, "type": "car_number" | "assign" | "status", ...}]}
+    car_number takes ticket_id, car_number, vehicle_description; assign / status take id (the
+    request) plus the fields of the single endpoints. Actions run in `at` order (queue order on
+    ties) through the same transition rules, each with its own result:
+    {"key", "ok": true} or {"key", "ok": false, "status", "error"}; a failed action writes nothing.
+    A key seen before (within IDEMPOTENCY_TTL) is not applied again: its first result comes back
+    with "replayed": true, so a device can resend its whole queue after a dropped response.
+    Response: {"version", "full", "results", "requests": {"columns", "rows"}, "tickets": {...}}.
+    Without since it is a full sync (active requests, received tickets); with it, only rows
+    changed since then (closed / canceled ones included, so devices can drop them). Request rows
+    carry the ticket's car number as of their own change; ticket rows carry later edits.
+    """
+    data = request.get_json(force=True)
+    user = g.user
+    venue_id = user.venue_id if user.role == Role.VALET else data.get("venue_id")
+    if not isinstance(venue_id, int):
+        abort(400, "venue_id is required")
+    since = data.get("since")
+    if since is not None and (not isinstance(since, int) or since < 0):
+        abort(400, "since must be a version from a previous sync")
+    actions = data.get("actions") or []
+    if not isinstance(actions, list):
+        abort(400, "actions must be a list")
+    if len(actions) > SYNC_MAX_ACTIONS:
+        abort(400, f"at most {SYNC_MAX_ACTIONS} actions per sync")
+    for a in actions:
+        if not isinstance(a, dict) or not isinstance(a.get("key"), str) or not a["key"]:
+            abort(400, "each action needs a key")
+        if len(a["key"]) > idempotency.MAX_KEY_LENGTH:
+            abort(400, f"key longer than {idempotency.MAX_KEY_LENGTH} characters")
+        if not isinstance(a.get("at"), int):
+            abort(400, "each action needs at (epoch ms)")
+    actions = sorted(actions, key=lambda a: a["at"])  # stable: queue order on ties
+
+    scope = f"sync:{user.id}"
+    done = idempotency.lookup_many(scope, [a["key"] for a in actions])
+    fresh = [a for a in actions if a["key"] not in done]
+    request_ids = {a["id"] for a in fresh if a.get("type") != "car_number" and isinstance(a.get("id"), int)}
+    ticket_ids = {a["ticket_id"] for a in fresh if a.get("type") == "car_number" and isinstance(a.get("ticket_id"), int)}
+    requests_by_id = {
+        r.id: r
+        for r in CarRequest.query.options(selectinload(CarRequest.ticket), selectinload(CarRequest.exit))
+        .filter(CarRequest.id.in_(request_ids)).all()
+    } if request_ids else {}
+    tickets_by_id = {t.id: t for t in Ticket.query.filter(Ticket.id.in_(ticket_ids)).all()} if ticket_ids else {}
+
+    results, recorded, events, ready, closed_tokens = [], [], [], [], []
+    for a in actions:
+        key = a["key"]
+        if key in done:
+            results.append({**done[key][1], "replayed": True})
+            continue
+        try:
+            if a.get("type") not in SYNC_ACTION_TYPES:
+                abort(400, f"type must be one of: {', '.join(SYNC_ACTION_TYPES)}")
+            if a["type"] == "car_number":
+                t = tickets_by_id.get(a.get("ticket_id"))
+                if t is None:
+                    abort(404, "ticket not found")
+                _set_car_number(t, user, a)
+                result = {"key": key, "ok": True}
+            else:
+                r = requests_by_id.get(a.get("id"))
+                if r is None:
+                    abort(404, "request not found")
+                conflict = _apply_request_op(r, user, a["type"], a, events, ready, closed_tokens)
+                result = {"key": key, "ok": False, "status": 409, **conflict} if conflict else {"key": key, "ok": True}
+        except HTTPException as e:
+            result = {"key": key, "ok": False, "status": e.code, "error": e.description}
+        results.append(result)
+        recorded.append((key, result.get("status", 200), result))
+        done[key] = (result.get("status", 200), result)
+
+    idempotency.record_many(scope, recorded)
+    queued = queue_notifications(_insert_batch_events(events, ready))
+    db.session.commit()
+    invalidate_tokens(*closed_tokens)
+    send_queued(queued)
+
+    version = _sync_version(datetime.utcnow())
+    return jsonify({"version": version, "full": since is None, "results": results, **_sync_delta(venue_id, since)})
 
 
 @bp.get("/api/audit")
 @require_role(Role.MANAGER)
 def audit():
+    """
+    Status events for a venue, newest first.
+    Query: limit=200 (max 500), cursor=<next_cursor>, fields=..., format=json|compact|ndjson.
+    json returns a list; the next page cursor is in the X-Next-Cursor header.
+    ndjson streams the full trail (optionally since=/until= ISO timestamps) and ignores limit.
+    """
     venue_id = request.args.get("venue_id", type=int)
     if not venue_id:
         abort(400, "venue_id is required")
 
-    events = (
-        StatusEvent.query
-        .join(Ticket, Ticket.id == StatusEvent.ticket_id)
-        .filter(Ticket.venue_id == venue_id)
-        .order_by(StatusEvent.id.desc())
-        .limit(200)
-        .all()
-    )
-    return jsonify([_json(e) for e in events])
+    projection, fmt = _projection(read_models.STATUS_EVENT_FIELDS, formats=("json", "compact", "ndjson"))
+    if fmt == "ndjson":
+        q = _time_window(projection.select().where(StatusEvent.venue_id == venue_id), StatusEvent.created_at)
+        return _ndjson(projection, _keyset(q, StatusEvent.created_at, StatusEvent.id), f"audit-venue-{venue_id}")
+    limit = _page_limit(200, 500)
+
+    if projection:
+        q = projection.select().where(StatusEvent.venue_id == venue_id)
+        rows = projection.fetch(_keyset(q, StatusEvent.created_at, StatusEvent.id).limit(limit + 1))
+        next_cursor = _next_cursor(rows, limit, projection.key)
+        if fmt == "compact":
+            resp = jsonify({
+                "columns": projection.columns,
+                "events": projection.dump(rows[:limit], compact=True),
+                "next_cursor": next_cursor,
+            })
+        else:
+            resp = jsonify(projection.dump(rows[:limit]))
+    else:
+        q = read_models.select_status_events().where(StatusEvent.venue_id == venue_id)
+        events = read_models.fetch_status_events(_keyset(q, StatusEvent.created_at, StatusEvent.id).limit(limit + 1))
+        next_cursor = _next_cursor(events, limit, lambda e: (e.created_at, e.id))
+        resp = jsonify([e.as_json() for e in events[:limit]])
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp
 
 
 @bp.get("/api/metrics")
@@ -1163,68 +1495,63 @@ def metrics():
         abort(400, "venue_id is required")
 
     window_hours = request.args.get("window_hours", type=int) or 24
-    cutoff = datetime.utcnow() - timedelta(hours=window_hours)
     max_seconds = request.args.get("max_seconds", type=int) or 1800
+    return jsonify(_venue_analytics(
+        venue_id, "metrics", (window_hours, max_seconds),
+        lambda: _metrics_for_venue(venue_id, window_hours, max_seconds),
+    ))
+
 
+def _metrics_for_venue(venue_id: int, window_hours: int, max_seconds: int) -> dict:
+    cutoff = datetime.utcnow() - timedelta(hours=window_hours)
     active_statuses = ["REQUESTED", "ASSIGNED", "RETRIEVING", "READY"]
     active_count = (
         db.session.query(func.count(CarRequest.id))
-        .join(Ticket, Ticket.id == CarRequest.ticket_id)
-        .filter(Ticket.venue_id == venue_id)
+        .filter(CarRequest.venue_id == venue_id)
         .filter(CarRequest.status.in_(active_statuses))
         .scalar()
     )
 
-    requested_ts = func.min(
-        case((StatusEvent.to_status == "REQUESTED", StatusEvent.created_at), else_=None)
-    )
-    ready_ts = func.min(
-        case((StatusEvent.to_status == "READY", StatusEvent.created_at), else_=None)
-    )
-    picked_ts = func.min(
-        case((StatusEvent.to_status == "PICKED_UP", StatusEvent.created_at), else_=None)
-    )
-
-    per_req = (
-        db.session.query(
-            StatusEvent.request_id.label("rid"),
-            requested_ts.label("requested_at"),
-            ready_ts.label("ready_at"),
-            picked_ts.label("picked_at"),
-        )
-        .join(Ticket, Ticket.id == StatusEvent.ticket_id)
-        .filter(Ticket.venue_id == venue_id)
-        .filter(StatusEvent.created_at >= cutoff)
-        .group_by(StatusEvent.request_id)
-        .subquery()
-    )
-
-    ready_duration = func.extract("epoch", per_req.c.ready_at - per_req.c.requested_at)
-    picked_duration = func.extract("epoch", per_req.c.picked_at - per_req.c.requested_at)
-
-    avg_req_to_ready = db.session.query(
-        func.avg(ready_duration)
-    ).filter(
-        per_req.c.ready_at.isnot(None),
-        per_req.c.requested_at.isnot(None),
-        ready_duration <= max_seconds,
-    ).scalar()
-
-    avg_req_to_picked = db.session.query(
-        func.avg(picked_duration)
-    ).filter(
-        per_req.c.picked_at.isnot(None),
-        per_req.c.requested_at.isnot(None),
-        picked_duration <= max_seconds,
-    ).scalar()
+    # compacted hours from exit_rollups + request_lifecycle for the edges of the window
+    totals = rollups.window_totals(venue_id, cutoff, max_seconds=max_seconds)
+    avg_req_to_ready = totals["ready_sum"] / totals["ready_n"] if totals["ready_n"] else None
+    avg_req_to_picked = totals["picked_sum"] / totals["picked_n"] if totals["picked_n"] else None
 
-    return jsonify({
+    return {
         "venue_id": venue_id,
         "active_queue": int(active_count or 0),
         "window_hours": window_hours,
         "max_seconds": max_seconds,
         "avg_req_to_ready_seconds": float(avg_req_to_ready or 0.0),
         "avg_req_to_picked_seconds": float(avg_req_to_picked or 0.0),
+    }
+
+
+TREND_DEFAULT_WINDOW_HOURS = {"hour": 24, "day": 30 * 24}
+
+
+@bp.get("/api/trends")
+@require_role(Role.MANAGER)
+def trends():
+    """
+    Hourly or daily series for charts from compacted rollups.
+    Query: venue_id (required), granularity=hour|day, window_hours (default 24 / 720), exit_id (optional).
+    """
+    venue_id = request.args.get("venue_id", type=int)
+    if not venue_id:
+        abort(400, "venue_id is required")
+    granularity = request.args.get("granularity", default="hour")
+    if granularity not in TREND_DEFAULT_WINDOW_HOURS:
+        abort(400, "granularity must be hour or day")
+    window_hours = request.args.get("window_hours", type=int) or TREND_DEFAULT_WINDOW_HOURS[granularity]
+    since = datetime.utcnow() - timedelta(hours=window_hours)
+    exit_id = request.args.get("exit_id", type=int)
+    return jsonify({
+        "venue_id": venue_id,
+        "granularity": granularity,
+        "window_hours": window_hours,
+        "exit_id": exit_id,
+        "points": rollups.trend(venue_id, granularity, since, exit_id=exit_id),
     })
 
 
@@ -1238,44 +1565,29 @@ def simple_stats():
     user = g.user
     if user.role == Role.VALET:
         venue_id = user.venue_id
+    return jsonify(_venue_analytics(venue_id, "stats", (), lambda: _simple_stats_for_venue(venue_id)))
+
+
+def _simple_stats_for_venue(venue_id: int) -> dict:
     cutoff = datetime.utcnow() - timedelta(hours=24)
     requests_today = (
         db.session.query(func.count(CarRequest.id))
-        .join(Ticket, Ticket.id == CarRequest.ticket_id)
-        .filter(Ticket.venue_id == venue_id)
+        .filter(CarRequest.venue_id == venue_id)
         .filter(CarRequest.created_at >= cutoff)
         .scalar()
     )
-    req_ts = func.min(
-        case((StatusEvent.to_status == "REQUESTED", StatusEvent.created_at), else_=None)
-    )
-    rdy_ts = func.min(
-        case((StatusEvent.to_status == "READY", StatusEvent.created_at), else_=None)
-    )
-    subq = (
-        db.session.query(
-            StatusEvent.request_id.label("rid"),
-            req_ts.label("requested_at"),
-            rdy_ts.label("ready_at"),
-        )
-        .join(Ticket, Ticket.id == StatusEvent.ticket_id)
-        .filter(Ticket.venue_id == venue_id)
-        .filter(StatusEvent.created_at >= cutoff)
-        .group_by(StatusEvent.request_id)
-        .subquery()
+    avg_sec = (
+        db.session.query(func.avg(RequestLifecycle.ready_seconds))
+        .filter(RequestLifecycle.venue_id == venue_id)
+        .filter(RequestLifecycle.requested_at >= cutoff)
+        .scalar()
     )
-    avg_sec = db.session.query(
-        func.avg(func.extract("epoch", subq.c.ready_at - subq.c.requested_at))
-    ).filter(
-        subq.c.ready_at.isnot(None),
-        subq.c.requested_at.isnot(None),
-    ).scalar()
     avg_time_to_ready_min = round(float(avg_sec or 0) / 60, 1) if avg_sec else None
-    return jsonify({
+    return {
         "venue_id": venue_id,
         "requests_today": int(requests_today or 0),
         "avg_time_to_ready_min": avg_time_to_ready_min,
-    })
+    }
 
 
 @bp.get("/api/exit-stats")
@@ -1288,10 +1600,46 @@ def exit_stats():
     window_hours = request.args.get("window_hours", default=24, type=int)
     max_seconds = request.args.get("max_seconds", default=1800, type=int)
 
-    stats = _exit_stats_for_venue(venue_id, window_hours=window_hours, max_seconds=max_seconds)
+    stats = _venue_analytics(
+        venue_id, "exit-stats", (window_hours, max_seconds),
+        lambda: _exit_stats_for_venue(venue_id, window_hours=window_hours, max_seconds=max_seconds),
+    )
     return jsonify({
         "venue_id": venue_id,
         "window_hours": window_hours,
         "max_seconds": max_seconds,
         "exits": stats,
     })
+
+
+@bp.get("/api/latency")
+@require_role(Role.VALET, Role.MANAGER)
+def latency_percentiles():
+    """
+    p50/p90/p99 seconds from the hourly latency histograms.
+    Query: venue_id (managers), window_hours=24, metric=ready|picked, by=exit|valet.
+    """
+    venue_id = getattr(g.user, "venue_id", None) or request.args.get("venue_id", type=int)
+    if not venue_id:
+        abort(400, "venue_id required")
+    window_hours = request.args.get("window_hours", default=24, type=int)
+    metric = request.args.get("metric", default="ready")
+    by = request.args.get("by", default="exit")
+    if metric not in latency.METRICS:
+        abort(400, "metric must be ready or picked")
+    if by not in latency.DIMENSIONS:
+        abort(400, "by must be exit or valet")
+
+    def compute():
+        since = datetime.utcnow() - timedelta(hours=window_hours)
+        by_key = latency.percentiles(venue_id, since, metric=metric, dimension=by)
+        key_name = "exit_id" if by == "exit" else "user_id"
+        return [dict(stats, **{key_name: key_id}) for key_id, stats in sorted(by_key.items())]
+
+    return jsonify({
+        "venue_id": venue_id,
+        "window_hours": window_hours,
+        "metric": metric,
+        "by": by,
+        "items": _venue_analytics(venue_id, "latency", (window_hours, metric, by), compute),
+    })
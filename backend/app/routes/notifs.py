@@ -1,3 +1,4 @@
+from collections import defaultdict
 from datetime import datetime
 from flask import Blueprint, jsonify, request, abort
 
@@ -7,6 +8,7 @@ from app.models import (
     NotificationSubscription, NotificationOutbox
 )
 from app.services.notifier import send_outbox_item
+from app.services.guest_tokens import ticket_for_token
 from app.auth import require_role
 from app.models import Role
 
@@ -26,12 +28,22 @@ def _render_message(ticket_token: str, to_status: str, exit_code: str | None = N
     return f"CurbKey: Status update → {to_status}"
 
 
-def queue_and_send(ticket_id: int, request_id: int | None, status_event_id: int | None, message: str) -> list[dict]:
-    subs = NotificationSubscription.query.filter_by(ticket_id=ticket_id, is_active=True).all()
-    created = []
-
-    for s in subs:
-        ob = NotificationOutbox(
+def queue_notifications(items: list[tuple[int, int | None, int | None, str]]) -> list[NotificationOutbox]:
+    """
+    Outbox rows for (ticket_id, request_id, status_event_id, message) items, one per active
+    subscription: one subscription query and one flush for the whole list. Caller commits.
+    """
+    if not items:
+        return []
+    ticket_ids = {item[0] for item in items}
+    subs_by_ticket = defaultdict(list)
+    for s in NotificationSubscription.query.filter(
+        NotificationSubscription.ticket_id.in_(ticket_ids), NotificationSubscription.is_active.is_(True)
+    ).all():
+        subs_by_ticket[s.ticket_id].append(s)
+
+    rows = [
+        NotificationOutbox(
             ticket_id=ticket_id,
             request_id=request_id,
             status_event_id=status_event_id,
@@ -40,17 +52,25 @@ def queue_and_send(ticket_id: int, request_id: int | None, status_event_id: int
             message=message,
             state="PENDING",
         )
-        db.session.add(ob)
-        db.session.flush()  # get ob.id
-        created.append({"id": int(ob.id), "channel": ob.channel, "target": ob.target, "state": ob.state})
+        for ticket_id, request_id, status_event_id, message in items
+        for s in subs_by_ticket[ticket_id]
+    ]
+    db.session.add_all(rows)
+    db.session.flush()  # ids
+    return rows
 
-    db.session.commit()
 
-    # send immediately (simple + fine for MVP)
-    for c in created:
-        ob = NotificationOutbox.query.get(c["id"])
+def send_queued(rows: list[NotificationOutbox]) -> None:
+    """Send committed outbox rows now (simple + fine for MVP); the worker drain retries failures."""
+    for ob in rows:
         send_outbox_item(ob)
 
+
+def queue_and_send(ticket_id: int, request_id: int | None, status_event_id: int | None, message: str) -> list[dict]:
+    rows = queue_notifications([(ticket_id, request_id, status_event_id, message)])
+    created = [{"id": int(ob.id), "channel": ob.channel, "target": ob.target, "state": ob.state} for ob in rows]
+    db.session.commit()
+    send_queued(rows)
     return created
 
 
@@ -60,9 +80,7 @@ def subscribe(token: str):
     Guest subscribes to updates.
     Body: { "channel": "SMS"|"EMAIL"|"WHATSAPP"|"STUB", "target": "...", "active": true }
     """
-    t = Ticket.query.filter_by(token=token).first()
-    if not t:
-        abort(404, "ticket not found")
+    t = ticket_for_token(token)
 
     data = request.get_json(force=True)
     channel = (data.get("channel") or "STUB").upper()
@@ -86,9 +104,7 @@ def guest_outbox(token: str):
     """
     Demo/debug: show notifications sent for this ticket.
     """
-    t = Ticket.query.filter_by(token=token).first()
-    if not t:
-        abort(404, "ticket not found")
+    t = ticket_for_token(token)
 
     items = (NotificationOutbox.query
              .filter(NotificationOutbox.ticket_id == t.id)
@@ -102,8 +118,8 @@ def guest_outbox(token: str):
         "state": i.state,
         "retry_count": i.retry_count,
         "message": i.message,
-        "created_at": i.created_at.isoformat(),
-        "sent_at": i.sent_at.isoformat() if i.sent_at else None,
+        "created_at": i.created_at,
+        "sent_at": i.sent_at,
     } for i in items])
 
 
@@ -2,9 +2,10 @@ from datetime import datetime
 from flask import Blueprint, jsonify
 
 from app.extensions import db
-from app.models import Request as CarRequest, StatusEvent, Role
+from app.models import Request as CarRequest, Role
 from app.routes.notifs import queue_and_send
 from app.auth import require_role
+from app.services.transitions import TransitionConflict, transition
 
 bp = Blueprint("scheduler", __name__)
 
@@ -31,21 +32,10 @@ def run_scheduler_tick() -> int:
     for r in due:
         if r.status != "SCHEDULED":
             continue
-        old = r.status
-        r.status = "REQUESTED"
-        r.updated_at = now
-        db.session.add(r)
-        db.session.flush()
-
-        ev = StatusEvent(
-            ticket_id=r.ticket_id,
-            request_id=r.id,
-            from_status=str(old),
-            to_status="REQUESTED",
-            note="Auto-triggered from schedule",
-        )
-        db.session.add(ev)
-        db.session.flush()
+        try:
+            ev = transition(r, [("REQUESTED", "Auto-triggered from schedule")])[0]
+        except TransitionConflict:
+            continue  # canceled or rescheduled by the guest since the SELECT
 
         msg = "CurbKey: Scheduled request started. We'll notify you when ready."
         queue_and_send(ticket_id=r.ticket_id, request_id=r.id, status_event_id=ev.id, message=msg)
@@ -1,9 +1,10 @@
-import json
 import time
-from flask import Blueprint, Response, request, stream_with_context, abort
+from flask import Blueprint, Response, request, stream_with_context
 
-from app.models import Ticket, StatusEvent
+from app.models import StatusEvent
 from app.extensions import db
+from app.json_provider import dumps
+from app.services.guest_tokens import ticket_for_token
 
 bp = Blueprint("sse", __name__)
 
@@ -13,9 +14,7 @@ SSE_MAX_DURATION = 50
 
 @bp.get("/t/<token>/events")
 def ticket_events(token: str):
-    t = Ticket.query.filter_by(token=token).first()
-    if not t:
-        abort(404, "ticket not found")
+    t = ticket_for_token(token)
 
     last_id = request.args.get("last_id", default=0, type=int)
     ticket_id = t.id
@@ -44,12 +43,12 @@ def ticket_events(token: str):
                         "from_status": ev.from_status,
                         "to_status": ev.to_status,
                         "note": ev.note,
-                        "created_at": ev.created_at.isoformat(),
+                        "created_at": ev.created_at,
                     }
                     last_id = int(ev.id)
                     yield f"id: {payload['id']}\n"
                     yield "event: status\n"
-                    yield f"data: {json.dumps(payload)}\n\n"
+                    yield f"data: {dumps(payload)}\n\n"
 
             finally:
                 db.session.remove()
@@ -0,0 +1,163 @@
+"""
+API serialization. Datetimes are left as-is; app.json_provider encodes them as ISO 8601.
+Each list endpoint declares the Shape it returns; the Shape carries the
+loader options its query needs, so dumping a page never lazy-loads per row (no N+1).
+"""
+from sqlalchemy.orm import joinedload
+
+from app.models import Venue, Exit, Zone, Ticket, Request as CarRequest, StatusEvent, Tip
+
+
+def mask_phone(phone: str | None) -> str | None:
+    if not phone:
+        return None
+    if len(phone) >= 4:
+        return "***-***-" + phone[-4:]
+    return "***"
+
+
+def venue_json(v: Venue) -> dict:
+    return {"id": v.id, "name": v.name, "slug": v.slug}
+
+
+def exit_json(e: Exit) -> dict:
+    return {"id": e.id, "venue_id": e.venue_id, "name": e.name, "code": e.code, "is_active": e.is_active}
+
+
+def zone_json(z: Zone) -> dict:
+    return {
+        "id": z.id,
+        "venue_id": z.venue_id,
+        "name": z.name,
+        "default_exit_id": z.default_exit_id,
+        "default_exit": to_json(z.default_exit),
+    }
+
+
+def ticket_json(t: Ticket) -> dict:
+    return {
+        "id": t.id,
+        "venue_id": t.venue_id,
+        "token": t.token,
+        "car_number": t.car_number,
+        "vehicle_description": t.vehicle_description,
+        "claim_code": t.claim_code,
+        "claimed_phone": t.claimed_phone,
+        "claimed_at": t.claimed_at,
+        "created_at": t.created_at,
+    }
+
+
+def received_ticket_json(t: Ticket) -> dict:
+    out = ticket_json(t)
+    out["claimed_phone_masked"] = mask_phone(t.claimed_phone)
+    return out
+
+
+def request_json(r: CarRequest) -> dict:
+    ticket = r.ticket
+    return {
+        "id": r.id,
+        "ticket_id": r.ticket_id,
+        "ticket_token": ticket.token if ticket else None,
+        "car_number": ticket.car_number if ticket else None,
+        "vehicle_description": ticket.vehicle_description if ticket else None,
+        "claimed_at": ticket.claimed_at if ticket else None,
+        "claimed_phone_masked": mask_phone(ticket.claimed_phone) if ticket else None,
+        "exit_id": r.exit_id,
+        "exit": to_json(r.exit),
+        "status": r.status,
+        "scheduled_for": (r.scheduled_for.isoformat() + "Z") if r.scheduled_for else None,
+        "assigned_to": r.assigned_to,
+        "assigned_at": r.assigned_at,
+        "zone_id": r.zone_id,
+        "zone": {"id": r.zone.id, "name": r.zone.name} if r.zone else None,
+        "created_at": r.created_at,
+        "updated_at": r.updated_at,
+        "delivered_by_user_id": r.delivered_by_user_id,
+        "tip_eligible": str(r.status) in ("CLOSED", "PICKED_UP") and r.delivered_by_user_id is not None,
+    }
+
+
+def status_event_json(ev: StatusEvent) -> dict:
+    return {
+        "id": int(ev.id),
+        "ticket_id": ev.ticket_id,
+        "request_id": ev.request_id,
+        "from_status": ev.from_status,
+        "to_status": ev.to_status,
+        "note": ev.note,
+        "created_at": ev.created_at,
+    }
+
+
+def tip_json(tip: Tip) -> dict:
+    ticket = tip.request.ticket if tip.request else None
+    return {
+        "id": tip.id,
+        "request_id": tip.request_id,
+        "amount_cents": tip.amount_cents,
+        "status": tip.status,
+        "created_at": tip.created_at,
+        "vehicle_description": ticket.vehicle_description if ticket else None,
+        "car_number": ticket.car_number if ticket else None,
+    }
+
+
+_DUMPERS = [
+    (Venue, venue_json),
+    (Exit, exit_json),
+    (Zone, zone_json),
+    (Ticket, ticket_json),
+    (CarRequest, request_json),
+    (StatusEvent, status_event_json),
+    (Tip, tip_json),
+]
+
+
+def to_json(model):
+    # serialize to JSON for API responses
+    if model is None:
+        return None
+    for cls, dump in _DUMPERS:
+        if isinstance(model, cls):
+            return dump(model)
+    return {"id": getattr(model, "id", None)}
+
+
+class Shape:
+    """
+    What an endpoint returns: a dump function plus the loader options that make every
+    relationship it touches come back with the page query.
+    `loaders` is a callable so backref attributes (e.g. Tip.request) resolve after mapper setup.
+    """
+
+    def __init__(self, dump, loaders=None):
+        self.dump = dump
+        self._loaders = loaders
+        self._options = None
+
+    @property
+    def options(self) -> tuple:
+        if self._options is None:
+            self._options = tuple(self._loaders()) if self._loaders else ()
+        return self._options
+
+    def apply(self, query):
+        return query.options(*self.options) if self.options else query
+
+    def many(self, rows) -> list[dict]:
+        return [self.dump(row) for row in rows]
+
+
+REQUEST = Shape(request_json, lambda: (
+    joinedload(CarRequest.ticket),
+    joinedload(CarRequest.exit),
+    joinedload(CarRequest.zone),
+))
+STATUS_EVENT = Shape(status_event_json)
+RECEIVED_TICKET = Shape(received_ticket_json)
+TIP = Shape(tip_json, lambda: (
+    joinedload(Tip.request).joinedload(CarRequest.ticket),
+    joinedload(Tip.request).joinedload(CarRequest.delivered_by),
+))
@@ -0,0 +1,141 @@
+"""
+Small in-process caches for hot read paths.
+Per worker process only: every cache is bounded (LRU) and every entry expires (TTL),
+so other workers converge within one TTL even when they miss an explicit invalidation.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+import threading
+import time
+
+# Returned by TTLCache.get on a miss. None is a valid cached value (negative caching).
+MISSING = object()
+
+_registry: list = []
+
+
+class TTLCache:
+    """Thread-safe LRU mapping with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def get(self, key, default=MISSING):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlightCache:
+    """
+    Cache for expensive computed results: get_or_compute(key, compute).
+
+    - fresh (younger than ttl): returned as is
+    - stale (younger than ttl + stale_ttl): returned immediately; the first caller to see it
+      recomputes (stale-while-revalidate) while concurrent callers keep getting the stale value
+    - missing: one caller computes, concurrent callers for the same key wait for its result
+      (single flight) instead of running the same query
+    Collapsing is per worker process; DB load is bounded by workers, not by viewers.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 5.0, stale_ttl: float = 60.0, wait_timeout: float = 10.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.wait_timeout = wait_timeout
+        self._data: OrderedDict = OrderedDict()  # key -> (fresh_until, stale_until, value)
+        self._inflight: dict = {}                # key -> threading.Event
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._data[key]
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+                if now < entry[0]:
+                    return entry[2]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = threading.Event()
+            elif entry is not None:
+                return entry[2]  # someone is already revalidating
+        if not leader:
+            flight.wait(self.wait_timeout)
+            with self._lock:
+                entry = self._data.get(key)
+            if entry is not None:
+                return entry[2]
+            return compute()  # leader failed or timed out; don't fail with it
+        try:
+            value = compute()
+            self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.set()
+
+    def _store(self, key, value) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now + self.ttl, now + self.ttl + self.stale_ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, predicate) -> None:
+        """Drop every entry whose key matches predicate(key)."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def clear_all() -> None:
+    """Drop every cached entry in this process (tests, demo reset)."""
+    for cache in _registry:
+        cache.clear()
@@ -0,0 +1,256 @@
+"""
+Fitted ETA model for exit recommendations: eta = base_seconds + queue_slope_seconds * queue,
+per exit and UTC hour of week, fitted offline by `flask fit-eta` (nightly) into eta_models.
+
+Training rows come from request_lifecycle, streamed with a server-side cursor. A request's
+queue is the number of earlier requests at the same exit that were still active (not yet
+picked up, or ready when there is no pickup) when it was made, which is what exit_load's
+live queue_depth counts. Each (exit, hour of week) cell is an ordinary least-squares fit from
+per-cell sums. Cells with fewer than MIN_CELL_SAMPLES fall back to the exit-wide row
+(hour_of_week = ALL_HOURS). The inner loops are vectorized with NumPy (a requirement); a
+pure-Python fallback computes the same sums if it is missing, just slower.
+
+Readers load one venue's table into a per-worker cache, so predict() is a dict lookup.
+"""
+from __future__ import annotations
+
+import bisect
+from collections import defaultdict
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import EtaModel, RequestLifecycle
+from app.services.cache import MISSING, TTLCache
+
+try:
+    import numpy as np
+except ImportError:  # listed in requirements.txt; pure-Python fit if a deploy lacks it
+    np = None
+
+ALL_HOURS = -1
+MIN_CELL_SAMPLES = 20
+MIN_EXIT_SAMPLES = 10
+MAX_SECONDS = 1800              # same outlier cut as the live ETA
+HEURISTIC_QUEUE_PENALTY = 30    # what guest_recommendations uses without a model
+STREAM_BATCH = 10000
+MODEL_CACHE_TTL = 600           # refits are nightly; workers pick them up within this
+
+_EPOCH = datetime(1970, 1, 1)
+_models = TTLCache(maxsize=512, ttl=MODEL_CACHE_TTL)
+
+
+class Params(NamedTuple):
+    base_seconds: float
+    queue_slope_seconds: float
+    samples: int
+
+
+def hour_of_week(ts: datetime) -> int:
+    return ts.weekday() * 24 + ts.hour
+
+
+class History:
+    """Columns of one training pull (lists; converted to arrays when NumPy is available)."""
+
+    def __init__(self):
+        self.venue_id: list[int] = []
+        self.exit_id: list[int] = []
+        self.hour: list[int] = []
+        self.requested: list[float] = []   # epoch seconds
+        self.left: list[float | None] = []  # left the active queue (picked, else ready)
+        self.seconds: list[float | None] = []  # requested -> ready
+
+    def __len__(self) -> int:
+        return len(self.requested)
+
+
+def load_history(since: datetime) -> History:
+    lc = RequestLifecycle
+    stmt = (
+        select(lc.venue_id, lc.exit_id, lc.requested_at, func.coalesce(lc.picked_at, lc.ready_at), lc.ready_seconds)
+        .where(lc.requested_at >= since, lc.venue_id.is_not(None), lc.exit_id.is_not(None))
+        .execution_options(stream_results=True, yield_per=STREAM_BATCH)
+    )
+    h = History()
+    for rows in db.session.execute(stmt).partitions():
+        for venue_id, exit_id, requested_at, left_at, seconds in rows:
+            h.venue_id.append(venue_id)
+            h.exit_id.append(exit_id)
+            h.hour.append(hour_of_week(requested_at))
+            h.requested.append((requested_at - _EPOCH).total_seconds())
+            h.left.append((left_at - _EPOCH).total_seconds() if left_at else None)
+            h.seconds.append(seconds)
+    return h
+
+
+def _queue_at_request(h: History):
+    """Per row: earlier requests at the same exit still active at its request time."""
+    if np is not None:
+        exits = np.asarray(h.exit_id)
+        requested = np.asarray(h.requested, dtype=float)
+        left = np.asarray([np.nan if t is None else t for t in h.left], dtype=float)
+        if not len(requested):
+            return np.zeros(0)
+        # one sorted pass for all exits: shift each exit's times into its own band
+        # [group * span, (group + 1) * span), so sorting the keys sorts by (exit, time)
+        _, group = np.unique(exits, return_inverse=True)
+        origin = requested.min()
+        span = np.nanmax(np.concatenate([requested, left])) - origin + 1.0
+        offset = group * span - origin
+        done = ~np.isnan(left)
+        starts, ends = np.sort((requested + offset)[done]), np.sort((left + offset)[done])
+        t = requested + offset
+        queue = np.searchsorted(starts, t, "left") - np.searchsorted(ends, t, "right")
+        return np.maximum(queue, 0)
+
+    starts, ends = defaultdict(list), defaultdict(list)
+    for exit_id, t, t_left in zip(h.exit_id, h.requested, h.left):
+        if t_left is not None:
+            starts[exit_id].append(t)
+            ends[exit_id].append(t_left)
+    for exit_id in starts:
+        starts[exit_id].sort()
+        ends[exit_id].sort()
+    return [
+        max(bisect.bisect_left(starts[e], t) - bisect.bisect_right(ends[e], t), 0)
+        for e, t in zip(h.exit_id, h.requested)
+    ]
+
+
+def _group_sums(keys, x, y) -> dict:
+    """{key: (n, sum x, sum y, sum x^2, sum xy)} over rows."""
+    if not keys:
+        return {}
+    if np is not None:
+        groups, inverse = np.unique(np.asarray(keys), return_inverse=True, axis=0)
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        sums = [np.bincount(inverse, weights=w, minlength=len(groups)) for w in (None, x, y, x * x, x * y)]
+        return {tuple(int(v) for v in g): tuple(float(s[i]) for s in sums) for i, g in enumerate(groups)}
+    out = defaultdict(lambda: [0.0] * 5)
+    for key, xi, yi in zip(keys, x, y):
+        s = out[tuple(key)]
+        s[0] += 1
+        s[1] += xi
+        s[2] += yi
+        s[3] += xi * xi
+        s[4] += xi * yi
+    return {k: tuple(v) for k, v in out.items()}
+
+
+def _solve(sums, fallback_slope: float | None = None) -> Params:
+    """Least squares y = base + slope * x; flat queues (no spread) borrow fallback_slope."""
+    n, sx, sy, sxx, sxy = sums
+    spread = n * sxx - sx * sx
+    if spread > 1e-9:
+        slope = max((n * sxy - sx * sy) / spread, 0.0)
+    else:
+        slope = fallback_slope or 0.0
+    base = max((sy - slope * sx) / n, 0.0)
+    return Params(base, slope, int(n))
+
+
+def _fit_rows(h: History, queue, rows: list[int]) -> dict[tuple[int, int], Params]:
+    """{(exit_id, hour_of_week | ALL_HOURS): Params} from the given row indexes."""
+    rows = [i for i in rows if h.seconds[i] is not None and 0 <= h.seconds[i] <= MAX_SECONDS]
+    x = [queue[i] for i in rows]
+    y = [h.seconds[i] for i in rows]
+    exit_sums = _group_sums([(h.exit_id[i],) for i in rows], x, y)
+    cell_sums = _group_sums([(h.exit_id[i], h.hour[i]) for i in rows], x, y)
+
+    params = {}
+    for (exit_id,), sums in exit_sums.items():
+        if sums[0] >= MIN_EXIT_SAMPLES:
+            params[(exit_id, ALL_HOURS)] = _solve(sums)
+    for (exit_id, hour), sums in cell_sums.items():
+        exit_wide = params.get((exit_id, ALL_HOURS))
+        if exit_wide and sums[0] >= MIN_CELL_SAMPLES:
+            params[(exit_id, hour)] = _solve(sums, fallback_slope=exit_wide.queue_slope_seconds)
+    return params
+
+
+def predict(params: dict, exit_id: int, hour: int, queue: float) -> float | None:
+    p = params.get((exit_id, hour)) or params.get((exit_id, ALL_HOURS))
+    if p is None:
+        return None
+    return p.base_seconds + p.queue_slope_seconds * queue
+
+
+def _mean_absolute_errors(h: History, queue, train: list[int], test: list[int]) -> dict:
+    """Replay test rows against a fit on train rows and against the queue-penalty heuristic."""
+    params = _fit_rows(h, queue, train)
+    fitted = {exit_id for exit_id, hour in params if hour == ALL_HOURS}
+    exit_means: dict[int, list[float]] = defaultdict(lambda: [0.0, 0])
+    for i in train:
+        if h.seconds[i] is not None and 0 <= h.seconds[i] <= MAX_SECONDS:
+            m = exit_means[h.exit_id[i]]
+            m[0] += h.seconds[i]
+            m[1] += 1
+    model_err = heuristic_err = 0.0
+    n = 0
+    for i in test:
+        actual = h.seconds[i]
+        if actual is None or not 0 <= actual <= MAX_SECONDS or h.exit_id[i] not in fitted:
+            continue
+        mean_sum, mean_n = exit_means[h.exit_id[i]]
+        model_err += abs(predict(params, h.exit_id[i], h.hour[i], queue[i]) - actual)
+        heuristic_err += abs(mean_sum / mean_n + HEURISTIC_QUEUE_PENALTY * queue[i] - actual)
+        n += 1
+    if not n:
+        return {"holdout_samples": 0, "model_mae": None, "heuristic_mae": None}
+    return {"holdout_samples": n, "model_mae": round(model_err / n, 1), "heuristic_mae": round(heuristic_err / n, 1)}
+
+
+def fit(since: datetime, holdout_days: int = 7, save: bool = True) -> dict:
+    """
+    Fit on request_lifecycle since `since`. With holdout_days, first fit on everything but the
+    last holdout_days and report replay errors for the model and the heuristic; the saved
+    model is then fitted on all rows. Returns a summary.
+    """
+    h = load_history(since)
+    queue = _queue_at_request(h)
+    everything = list(range(len(h)))
+    summary = {"rows": len(h), "numpy": np is not None}
+    if holdout_days and len(h):
+        cutoff = max(h.requested) - holdout_days * 86400
+        train = [i for i in everything if h.requested[i] < cutoff]
+        test = [i for i in everything if h.requested[i] >= cutoff]
+        summary.update(_mean_absolute_errors(h, queue, train, test))
+
+    params = _fit_rows(h, queue, everything)
+    summary["exits"] = sum(1 for _, hour in params if hour == ALL_HOURS)
+    summary["cells"] = len(params) - summary["exits"]
+    if save:
+        venue_by_exit = dict(zip(h.exit_id, h.venue_id))
+        now = datetime.utcnow()
+        EtaModel.query.delete(synchronize_session=False)
+        db.session.add_all(
+            EtaModel(venue_id=venue_by_exit[exit_id], exit_id=exit_id, hour_of_week=hour,
+                     base_seconds=p.base_seconds, queue_slope_seconds=p.queue_slope_seconds,
+                     samples=p.samples, fitted_at=now)
+            for (exit_id, hour), p in params.items()
+        )
+        db.session.commit()
+        _models.clear()
+    return summary
+
+
+def model_for_venue(venue_id: int) -> dict:
+    """{(exit_id, hour_of_week | ALL_HOURS): Params} for a venue; empty until the first fit."""
+    cached = _models.get(venue_id)
+    if cached is not MISSING:
+        return cached
+    rows = db.session.execute(
+        select(EtaModel.exit_id, EtaModel.hour_of_week, EtaModel.base_seconds,
+               EtaModel.queue_slope_seconds, EtaModel.samples)
+        .where(EtaModel.venue_id == venue_id)
+    ).all()
+    params = {(r.exit_id, r.hour_of_week): Params(r.base_seconds, r.queue_slope_seconds, r.samples) for r in rows}
+    _models.set(venue_id, params)
+    return params
+
+
+def predict_now(venue_id: int, exit_id: int, queue: int, now: datetime | None = None) -> float | None:
+    return predict(model_for_venue(venue_id), exit_id, hour_of_week(now or datetime.utcnow()), queue)
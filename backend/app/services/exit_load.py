@@ -0,0 +1,128 @@
+"""
+Live per-exit load for recommendations: queue depth and an exponentially weighted
+retrieval time (REQUESTED -> READY), one exit_load row per exit.
+
+Every status transition writes a StatusEvent, so the counters are maintained from an
+after_insert listener on status_events, in the same transaction as the transition:
+- queue_depth moves by +1/-1 when a request enters/leaves ACTIVE_STATUSES
+- on READY, the request's REQUESTED -> READY time is folded into eta_seconds
+Reading is one indexed query per venue (live_exit_stats).
+`flask recount-exit-load` re-derives queue depth from requests if counters ever drift.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import case, event, func, select
+
+from app.extensions import db
+from app.models import ACTIVE_STATUSES, ExitLoad, Request as CarRequest, StatusEvent
+from app.services import refdata
+from app.services.upsert import insert_for
+
+EWMA_ALPHA = 0.2
+ETA_MAX_SECONDS = 1800  # same outlier cut as the windowed stats (_exit_stats_for_venue max_seconds)
+
+_ACTIVE = frozenset(ACTIVE_STATUSES)
+
+
+def _queue_delta(from_status: str | None, to_status: str) -> int:
+    return (to_status in _ACTIVE) - (from_status in _ACTIVE)
+
+
+def _retrieval_seconds(connection, ev) -> float | None:
+    events = StatusEvent.__table__
+    requested_at = connection.execute(
+        select(func.min(events.c.created_at))
+        .where(events.c.request_id == ev.request_id, events.c.to_status == "REQUESTED")
+    ).scalar()
+    if requested_at is None:
+        return None
+    seconds = ((ev.created_at or datetime.utcnow()) - requested_at).total_seconds()
+    return seconds if 0 <= seconds <= ETA_MAX_SECONDS else None
+
+
+def record_transition(connection, ev) -> None:
+    delta = _queue_delta(ev.from_status, ev.to_status)
+    sample = _retrieval_seconds(connection, ev) if ev.to_status == "READY" and ev.from_status != "READY" else None
+    if not delta and sample is None:
+        return
+
+    requests = CarRequest.__table__
+    exit_id, venue_id = connection.execute(
+        select(requests.c.exit_id, requests.c.venue_id).where(requests.c.id == ev.request_id)
+    ).one()
+
+    table = ExitLoad.__table__
+    c = table.c
+    now = datetime.utcnow()
+    set_ = {"updated_at": now}
+    if delta:
+        set_["queue_depth"] = case((c.queue_depth + delta < 0, 0), else_=c.queue_depth + delta)
+    if sample is not None:
+        set_["eta_seconds"] = case(
+            (c.eta_seconds.is_(None), sample),
+            else_=c.eta_seconds + EWMA_ALPHA * (sample - c.eta_seconds),
+        )
+        set_["eta_samples"] = c.eta_samples + 1
+    stmt = insert_for(table, bind=connection).values(
+        exit_id=exit_id,
+        venue_id=venue_id or ev.venue_id,
+        queue_depth=max(delta, 0),
+        eta_seconds=sample,
+        eta_samples=1 if sample is not None else 0,
+        updated_at=now,
+    )
+    connection.execute(stmt.on_conflict_do_update(index_elements=["exit_id"], set_=set_))
+
+
+@event.listens_for(StatusEvent, "after_insert")
+def _track_exit_load(mapper, connection, target):
+    record_transition(connection, target)
+
+
+def live_exit_stats(venue_id: int) -> list[dict]:
+    """Active exits with live queue depth and EWMA ETA; same shape as _exit_stats_for_venue."""
+    ref = refdata.get_refdata(venue_id)
+    if not ref:
+        return []
+    loads = {row.exit_id: row for row in ExitLoad.query.filter_by(venue_id=venue_id).all()}
+    out = []
+    for ex in ref.exits:
+        load = loads.get(ex["id"])
+        out.append({
+            "exit_id": ex["id"],
+            "code": ex["code"],
+            "name": ex["name"],
+            "queue": load.queue_depth if load else 0,
+            "eta_seconds": float(load.eta_seconds or 0.0) if load else 0.0,
+            "eta_samples": load.eta_samples if load else 0,
+        })
+    return out
+
+
+def recount(venue_id: int | None = None) -> int:
+    """Reset queue_depth from the requests table (drift repair). Returns exits updated."""
+    counts = (
+        db.session.query(CarRequest.exit_id, CarRequest.venue_id, func.count(CarRequest.id))
+        .filter(CarRequest.status.in_(ACTIVE_STATUSES))
+        .group_by(CarRequest.exit_id, CarRequest.venue_id)
+    )
+    loads = ExitLoad.query
+    if venue_id is not None:
+        counts = counts.filter(CarRequest.venue_id == venue_id)
+        loads = loads.filter(ExitLoad.venue_id == venue_id)
+    by_exit = {exit_id: (v_id, int(n)) for exit_id, v_id, n in counts.all()}
+    now = datetime.utcnow()
+    updated = 0
+    for load in loads.all():
+        _, depth = by_exit.pop(load.exit_id, (None, 0))
+        if load.queue_depth != depth:
+            load.queue_depth = depth
+            load.updated_at = now
+            updated += 1
+    for exit_id, (v_id, depth) in by_exit.items():
+        db.session.add(ExitLoad(exit_id=exit_id, venue_id=v_id, queue_depth=depth, eta_samples=0, updated_at=now))
+        updated += 1
+    db.session.commit()
+    return updated
@@ -0,0 +1,107 @@
+"""
+Guest token resolution: token -> (ticket id, venue id, closed_at), cached per worker.
+Every /t/<token>/... endpoint starts here. Unknown tokens are cached as misses (briefly), so
+repeated requests with a bad or guessed token do not reach the database.
+Callers that close or delete tickets invalidate the tokens they touched.
+
+Signed tokens (GUEST_TOKEN_SIGNING=1): "<ticket_id>.<venue_id>.<mac>", where mac is a
+truncated HMAC-SHA256 of the ids. Forged or mangled signed tokens are rejected without a
+query (and without a cache entry, so guessing traffic cannot evict real ones); valid ones
+resolve by primary key. Random tokens from Ticket.new_token() never contain "." and keep
+going through the token lookup, so existing links work whichever mode is on.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+from datetime import datetime
+from typing import NamedTuple
+
+from flask import abort, current_app
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Ticket
+from app.services.cache import MISSING, TTLCache
+
+TOKEN_CACHE_TTL = 300      # closed_at on another worker shows up within this
+TOKEN_NEGATIVE_TTL = 30
+
+
+class GuestTicket(NamedTuple):
+    id: int
+    venue_id: int
+    closed_at: datetime | None
+
+
+MAC_BYTES = 16
+
+_tokens = TTLCache(maxsize=10000, ttl=TOKEN_CACHE_TTL)
+
+
+def _mac(ticket_id: int, venue_id: int) -> str:
+    secret = current_app.config.get("GUEST_TOKEN_SECRET") or current_app.config["JWT_SECRET_KEY"]
+    digest = hmac.new(secret.encode(), f"guest-token:{ticket_id}.{venue_id}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:MAC_BYTES]).rstrip(b"=").decode()
+
+
+def sign_token(ticket_id: int, venue_id: int) -> str:
+    return f"{ticket_id}.{venue_id}.{_mac(ticket_id, venue_id)}"
+
+
+def verify_signed_token(token: str) -> tuple[int, int] | None:
+    """(ticket_id, venue_id) if token is a correctly signed token, else None."""
+    parts = token.split(".")
+    # isascii: isdigit() also accepts e.g. "²", which int() rejects
+    if len(parts) != 3 or not all(p.isascii() and p.isdecimal() for p in parts[:2]):
+        return None
+    ticket_id, venue_id = int(parts[0]), int(parts[1])
+    if not hmac.compare_digest(parts[2], _mac(ticket_id, venue_id)):
+        return None
+    return ticket_id, venue_id
+
+
+def issue_token(ticket: Ticket) -> None:
+    """Give a just-added ticket a signed token when signing is enabled (flushes to get its id)."""
+    if not current_app.config.get("GUEST_TOKEN_SIGNING"):
+        return
+    db.session.flush()
+    ticket.token = sign_token(ticket.id, ticket.venue_id)
+
+
+def resolve_token(token: str) -> GuestTicket | None:
+    signed = None
+    if "." in token:
+        signed = verify_signed_token(token)
+        if signed is None:
+            return None
+    cached = _tokens.get(token)
+    if cached is not MISSING:
+        return cached
+    if signed:
+        where = Ticket.id == signed[0]
+    else:
+        where = Ticket.token == token
+    row = db.session.execute(
+        select(Ticket.id, Ticket.venue_id, Ticket.closed_at, Ticket.token).where(where)
+    ).first()
+    if row is None or row.token != token:
+        _tokens.set(token, None, ttl=TOKEN_NEGATIVE_TTL)
+        return None
+    ticket = GuestTicket(row.id, row.venue_id, row.closed_at)
+    _tokens.set(token, ticket)
+    return ticket
+
+
+def ticket_for_token(token: str) -> GuestTicket:
+    """resolve_token, or 404 "ticket not found"."""
+    ticket = resolve_token(token)
+    if ticket is None:
+        abort(404, "ticket not found")
+    return ticket
+
+
+def invalidate_tokens(*tokens: str) -> None:
+    for token in tokens:
+        _tokens.pop(token)
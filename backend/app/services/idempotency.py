@@ -0,0 +1,162 @@
+"""
+Client idempotency keys: the result of the first call with a key is stored (status code + JSON
+body) and repeats within IDEMPOTENCY_TTL get that result back instead of running again.
+Keys are namespaced by scope (e.g. "sync:<user id>"), so one client's keys never match
+another's. Expired rows are ignored on lookup and purged by the worker (purge_expired).
+
+Two users:
+- /api/sync stores each queued action's result in the request's own transaction
+  (lookup_many / record_many), so a key is only taken if the work it guards commits.
+- @idempotent views honour an `Idempotency-Key` header: the key is claimed (a pending row,
+  committed) before the view runs and completed with its response after. A repeat gets the
+  stored response with `Idempotent-Replayed: true`, from the per-worker cache when it can,
+  without running the view; a repeat while the first call is still running gets 409.
+  Exceptions and 5xx release the claim, so the client can retry for real.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Response, abort, current_app, g, request
+from sqlalchemy import delete, select, update
+
+from app.extensions import db
+from app.json_provider import dumps
+from app.models import IdempotencyKey
+from app.services.cache import MISSING, TTLCache
+from app.services.upsert import insert_for
+
+IDEMPOTENCY_TTL = timedelta(hours=24)
+# a claim whose worker died mid-request stops blocking retries after this
+PENDING_TTL = timedelta(seconds=60)
+PENDING = 0  # status_code of a claimed key whose response isn't stored yet
+MAX_KEY_LENGTH = 120
+HEADER = "Idempotency-Key"
+PURGE_BATCH = 5000
+
+# completed responses by (scope, key): retry storms are answered from memory
+_completed = TTLCache(maxsize=10000, ttl=300)
+
+
+def lookup_many(scope: str, keys: list[str]) -> dict[str, tuple[int, object]]:
+    """{key: (status_code, body)} for the keys already used in scope (one query)."""
+    if not keys:
+        return {}
+    rows = db.session.execute(
+        select(IdempotencyKey.key, IdempotencyKey.status_code, IdempotencyKey.body)
+        .where(IdempotencyKey.scope == scope, IdempotencyKey.key.in_(set(keys)))
+        .where(IdempotencyKey.expires_at > datetime.utcnow())
+    ).all()
+    return {row.key: (row.status_code, json.loads(row.body)) for row in rows}
+
+
+def record_many(scope: str, results: list[tuple[str, int, object]]) -> None:
+    """Store [(key, status_code, body), ...]; a key another request stored first is left as is."""
+    if not results:
+        return
+    now = datetime.utcnow()
+    stmt = insert_for(IdempotencyKey.__table__).values([
+        {"scope": scope, "key": key, "status_code": status, "body": dumps(body),
+         "created_at": now, "expires_at": now + IDEMPOTENCY_TTL}
+        for key, status, body in results
+    ])
+    db.session.execute(stmt.on_conflict_do_nothing(index_elements=["scope", "key"]))
+
+
+def _header_scope() -> str:
+    """Endpoint + who is calling + which object (view args), so keys never cross them."""
+    user = getattr(g, "user", None)
+    who = f"u{user.id}" if user is not None else "guest"
+    args = ",".join(f"{k}={v}" for k, v in sorted((request.view_args or {}).items()))
+    return f"{request.endpoint}:{hashlib.sha256(f'{who}|{args}'.encode()).hexdigest()[:32]}"
+
+
+def _replay(status_code: int, body: str) -> Response:
+    return Response(body, status=status_code, mimetype="application/json", headers={"Idempotent-Replayed": "true"})
+
+
+def _claim(scope: str, key: str) -> tuple[int, str] | None:
+    """Take the key (committed) and return None, or return the stored (status, body) / PENDING."""
+    now = datetime.utcnow()
+    row = db.session.execute(
+        select(IdempotencyKey.status_code, IdempotencyKey.body, IdempotencyKey.expires_at)
+        .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+    ).first()
+    if row is not None and row.expires_at > now:
+        return row.status_code, row.body
+    if row is not None:
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key))
+    claimed = db.session.execute(
+        insert_for(IdempotencyKey.__table__)
+        .values(scope=scope, key=key, status_code=PENDING, body="", created_at=now, expires_at=now + PENDING_TTL)
+        .on_conflict_do_nothing(index_elements=["scope", "key"])
+    ).rowcount
+    db.session.commit()
+    return None if claimed else (PENDING, "")
+
+
+def _release(scope: str, key: str) -> None:
+    db.session.rollback()
+    db.session.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.scope == scope, IdempotencyKey.key == key, IdempotencyKey.status_code == PENDING,
+    ))
+    db.session.commit()
+
+
+def idempotent(view):
+    """Honour an Idempotency-Key header on view (see module docstring). Apply below auth decorators."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            abort(400, f"{HEADER} longer than {MAX_KEY_LENGTH} characters")
+        scope = _header_scope()
+        cached = _completed.get((scope, key))
+        if cached is not MISSING:
+            return _replay(*cached)
+        stored = _claim(scope, key)
+        if stored is not None:
+            if stored[0] == PENDING:
+                abort(409, "a request with this Idempotency-Key is still in progress")
+            _completed.set((scope, key), stored)
+            return _replay(*stored)
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            _release(scope, key)
+            raise
+        if response.status_code >= 500 or response.is_streamed or response.mimetype != "application/json":
+            _release(scope, key)
+            return response
+        body = response.get_data(as_text=True)
+        now = datetime.utcnow()
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+            .values(status_code=response.status_code, body=body, expires_at=now + IDEMPOTENCY_TTL)
+        )
+        db.session.commit()
+        _completed.set((scope, key), (response.status_code, body))
+        return response
+
+    return wrapper
+
+
+def purge_expired(batch: int = PURGE_BATCH) -> int:
+    """Worker job: delete expired keys in batches (short transactions); returns rows deleted."""
+    total = 0
+    while True:
+        ids = select(IdempotencyKey.id).where(IdempotencyKey.expires_at <= datetime.utcnow()).limit(batch)
+        deleted = db.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        total += deleted
+        if deleted < batch:
+            return total
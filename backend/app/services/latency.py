@@ -0,0 +1,158 @@
+"""
+Latency percentiles (p50/p90/p99) per exit and per valet without scanning raw events.
+
+Each hour, exit/valet and metric (requested -> READY, requested -> PICKED_UP) has a
+log-bucketed histogram (DDSketch-style): a duration of s seconds lands in bin
+ceil(log_GAMMA(s)), so every bin spans +-RELATIVE_ACCURACY around its representative value.
+Bins are stored sparsely as latency_bins rows and incremented with an upsert from the
+request_lifecycle listener, once per request and stage (first time wins there). Merging
+histograms is summing counts per bin, so any window is one GROUP BY over its hours.
+`flask rebuild-latency` re-derives the bins from request_lifecycle (backfill / repair).
+"""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import LatencyBin, Request as CarRequest, RequestLifecycle
+from app.services.rollups import HOUR, floor_bucket
+from app.services.upsert import insert_for
+
+GAMMA = 1.04
+RELATIVE_ACCURACY = (GAMMA - 1) / (GAMMA + 1)  # ~2%
+MAX_SECONDS = 24 * 3600                         # longer samples are clamped into the last bin
+QUANTILES = (0.5, 0.9, 0.99)
+METRICS = ("ready", "picked")
+DIMENSIONS = ("exit", "valet")
+
+_LOG_GAMMA = math.log(GAMMA)
+_MAX_BIN = math.ceil(math.log(MAX_SECONDS) / _LOG_GAMMA)
+
+
+def bin_for(seconds: float) -> int:
+    """Bin index for a duration; everything under a second shares bin 0."""
+    if seconds <= 1:
+        return 0
+    return min(math.ceil(math.log(seconds) / _LOG_GAMMA), _MAX_BIN)
+
+
+def bin_value(index: int) -> float:
+    """Representative duration of a bin (within RELATIVE_ACCURACY of every sample in it)."""
+    if index <= 0:
+        return 1.0
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+def quantiles(bins: dict[int, int], qs=QUANTILES) -> dict:
+    """{"count": n, "p50": s, ...} from a merged {bin: count} histogram (None when empty)."""
+    n = sum(bins.values())
+    out = {"count": n}
+    ordered = sorted(bins.items())
+    for q in qs:
+        name = f"p{q * 100:g}"
+        if not n:
+            out[name] = None
+            continue
+        rank = q * (n - 1)
+        seen = 0
+        for index, count in ordered:
+            seen += count
+            if seen > rank:
+                out[name] = round(bin_value(index), 1)
+                break
+    return out
+
+
+def _upsert(rows: list[dict], connection=None) -> None:
+    """Add row counts onto latency_bins (on the listener's connection, or the session)."""
+    if not rows:
+        return
+    table = LatencyBin.__table__
+    stmt = insert_for(table, bind=connection).values(rows)
+    (connection or db.session).execute(stmt.on_conflict_do_update(
+        index_elements=["venue_id", "metric", "dimension", "bucket_start", "key_id", "bin"],
+        set_={"count": table.c["count"] + stmt.excluded["count"]},
+    ))
+
+
+def _rows(venue_id, metric, at, seconds, exit_id, valet_id) -> list[dict]:
+    base = {"venue_id": venue_id, "metric": metric, "bucket_start": floor_bucket(at, HOUR),
+            "bin": bin_for(seconds), "count": 1}
+    rows = []
+    for dimension, key_id in (("exit", exit_id), ("valet", valet_id)):
+        if key_id is not None:
+            rows.append(dict(base, dimension=dimension, key_id=key_id))
+    return rows
+
+
+def record_sample(connection, request_id: int, venue_id: int | None, exit_id: int | None,
+                  metric: str, at: datetime, seconds: float | None) -> None:
+    """Count one duration (called by the request_lifecycle listener, same transaction)."""
+    if seconds is None or seconds < 0 or venue_id is None:
+        return
+    requests = CarRequest.__table__
+    valet_id = connection.execute(
+        select(requests.c.delivered_by_user_id).where(requests.c.id == request_id)
+    ).scalar()
+    _upsert(_rows(venue_id, metric, at, seconds, exit_id, valet_id), connection)
+
+
+def percentiles(venue_id: int, since: datetime, metric: str = "ready", dimension: str = "exit") -> dict[int, dict]:
+    """
+    {exit_id or user_id: {"count", "p50", "p90", "p99"}} for samples recorded since `since`
+    (rounded down to the hour: the window covers whole hourly histograms).
+    """
+    rows = db.session.execute(
+        select(LatencyBin.key_id, LatencyBin.bin, func.sum(LatencyBin.count))
+        .where(
+            LatencyBin.venue_id == venue_id,
+            LatencyBin.metric == metric,
+            LatencyBin.dimension == dimension,
+            LatencyBin.bucket_start >= floor_bucket(since, HOUR),
+        )
+        .group_by(LatencyBin.key_id, LatencyBin.bin)
+    ).all()
+    merged: dict[int, dict[int, int]] = defaultdict(dict)
+    for key_id, index, count in rows:
+        merged[key_id][index] = int(count)
+    return {key_id: quantiles(bins) for key_id, bins in merged.items()}
+
+
+def rebuild(since: datetime | None = None, batch_size: int = 5000) -> int:
+    """Recount latency_bins from request_lifecycle (optionally only hours since `since`). Returns samples."""
+    since = floor_bucket(since, HOUR) if since else None
+    bins = LatencyBin.query
+    if since is not None:
+        bins = bins.filter(LatencyBin.bucket_start >= since)
+    bins.delete(synchronize_session=False)
+
+    lc = RequestLifecycle
+    q = (
+        select(lc.request_id, lc.venue_id, lc.exit_id, lc.ready_at, lc.ready_seconds,
+               lc.picked_at, lc.picked_seconds, CarRequest.delivered_by_user_id)
+        .join(CarRequest, CarRequest.id == lc.request_id)
+        .where(lc.venue_id.is_not(None))
+        .order_by(lc.request_id)
+    )
+    samples = 0
+    last_id = 0
+    while True:
+        batch = db.session.execute(q.where(lc.request_id > last_id).limit(batch_size)).all()
+        if not batch:
+            break
+        counts: dict[tuple, int] = defaultdict(int)
+        for r in batch:
+            for metric, at, seconds in (("ready", r.ready_at, r.ready_seconds), ("picked", r.picked_at, r.picked_seconds)):
+                if at is None or seconds is None or seconds < 0 or (since is not None and at < since):
+                    continue
+                samples += 1
+                for row in _rows(r.venue_id, metric, at, seconds, r.exit_id, r.delivered_by_user_id):
+                    counts[tuple(sorted((k, v) for k, v in row.items() if k != "count"))] += 1
+        _upsert([dict(key, count=n) for key, n in counts.items()])
+        last_id = batch[-1].request_id
+    db.session.commit()
+    return samples
@@ -0,0 +1,72 @@
+"""
+request_lifecycle maintenance: on every status_events insert (same transaction, like
+exit_load), record the first time the request reached REQUESTED / ASSIGNED / READY /
+PICKED_UP and recompute the requested -> ready / picked durations. One primary-key read and
+one upsert per transition; other transitions (SCHEDULED, RETRIEVING, CLOSED...) are ignored.
+A new ready / picked duration is also counted into the latency histograms (app.services.latency).
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import event, func, select
+
+from app.models import Request as CarRequest, RequestLifecycle, StatusEvent
+from app.services import latency
+from app.services.upsert import insert_for
+
+STAGE_COLUMNS = {
+    "REQUESTED": "requested_at",
+    "ASSIGNED": "assigned_at",
+    "READY": "ready_at",
+    "PICKED_UP": "picked_at",
+}
+
+LATENCY_METRICS = {"ready_at": "ready", "picked_at": "picked"}
+
+
+def _seconds(start: datetime | None, end: datetime | None) -> float | None:
+    if start is None or end is None:
+        return None
+    return (end - start).total_seconds()
+
+
+def record_transition(connection, ev) -> None:
+    column = STAGE_COLUMNS.get(ev.to_status)
+    if column is None:
+        return
+    table = RequestLifecycle.__table__
+    at = ev.created_at or datetime.utcnow()
+
+    row = connection.execute(select(table).where(table.c.request_id == ev.request_id)).mappings().first()
+    if row is None:
+        requests = CarRequest.__table__
+        exit_id = connection.execute(
+            select(requests.c.exit_id).where(requests.c.id == ev.request_id)
+        ).scalar()
+        stages = dict.fromkeys(STAGE_COLUMNS.values())
+        values = {"request_id": ev.request_id, "venue_id": ev.venue_id, "exit_id": exit_id}
+    else:
+        stages = {c: row[c] for c in STAGE_COLUMNS.values()}
+        values = {"request_id": ev.request_id, "venue_id": row["venue_id"], "exit_id": row["exit_id"]}
+    if stages[column] is not None:
+        return  # first time wins (e.g. a repeated ASSIGNED on reassign)
+    stages[column] = at
+    values.update(stages)
+    values["ready_seconds"] = _seconds(stages["requested_at"], stages["ready_at"])
+    values["picked_seconds"] = _seconds(stages["requested_at"], stages["picked_at"])
+
+    stmt = insert_for(table, bind=connection).values(**values)
+    set_ = {name: stmt.excluded[name] for name in ("ready_seconds", "picked_seconds")}
+    set_[column] = func.coalesce(table.c[column], stmt.excluded[column])
+    connection.execute(stmt.on_conflict_do_update(index_elements=["request_id"], set_=set_))
+
+    metric = LATENCY_METRICS.get(column)
+    if metric:
+        latency.record_sample(connection, ev.request_id, values["venue_id"], values["exit_id"],
+                              metric, at, values[f"{metric}_seconds"])
+
+
+@event.listens_for(StatusEvent, "after_insert")
+def _track_lifecycle(mapper, connection, target):
+    record_transition(connection, target)
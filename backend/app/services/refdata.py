@@ -0,0 +1,111 @@
+"""
+Per-venue reference data (venue, active exits, zones) cached per worker, keyed by venue and
+stamped with venues.ref_version.
+
+Writers call bump_version(venue_id) in the same transaction as the exit/zone change; this
+worker's copy is dropped when that transaction commits. Readers re-check the stamp with a
+single primary-key query at most every REF_VERSION_CHECK_SECONDS, so other workers pick up a
+change within that window; the exits/zones queries only run when the stamp moved.
+"""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from sqlalchemy import event, select, update
+
+from app.extensions import db
+from app.models import Exit, Venue, Zone
+from app.serializers import exit_json, venue_json
+from app.services.cache import MISSING, TTLCache
+
+REF_VERSION_CHECK_SECONDS = 5
+REF_DATA_TTL = 3600  # upper bound only; the version check invalidates much sooner
+
+# Canonical exit code order for dropdown (A, B, C)
+EXIT_CODE_ORDER = ("A", "B", "C")
+
+
+class VenueRefData(NamedTuple):
+    venue_id: int
+    version: int
+    venue: dict
+    exits: tuple      # active exits, id order
+    zones: tuple
+
+    @property
+    def exits_by_code(self) -> list[dict]:
+        """One exit per code (first by id), in EXIT_CODE_ORDER."""
+        by_code = {}
+        for e in self.exits:
+            by_code.setdefault(e["code"], e)
+        return [by_code[c] for c in EXIT_CODE_ORDER if c in by_code]
+
+    def etag(self, kind: str) -> str:
+        return f"{kind}-{self.venue_id}-{self.version}"
+
+
+_refdata = TTLCache(maxsize=512, ttl=REF_DATA_TTL)
+_versions = TTLCache(maxsize=512, ttl=REF_VERSION_CHECK_SECONDS)
+
+
+def _current_version(venue_id: int) -> int | None:
+    version = _versions.get(venue_id)
+    if version is MISSING:
+        version = db.session.execute(select(Venue.ref_version).where(Venue.id == venue_id)).scalar()
+        _versions.set(venue_id, version)
+    return version
+
+
+def _load(venue_id: int, version: int) -> VenueRefData:
+    venue = db.session.get(Venue, venue_id)
+    exits = Exit.query.filter_by(venue_id=venue_id, is_active=True).order_by(Exit.id.asc()).all()
+    zones = Zone.query.filter_by(venue_id=venue_id).order_by(Zone.id.asc()).all()
+    return VenueRefData(
+        venue_id=venue_id,
+        version=version,
+        venue=venue_json(venue),
+        exits=tuple(exit_json(e) for e in exits),
+        zones=tuple({"id": z.id, "name": z.name, "default_exit_id": z.default_exit_id} for z in zones),
+    )
+
+
+def get_refdata(venue_id: int) -> VenueRefData | None:
+    """Reference data for a venue, or None if the venue does not exist."""
+    version = _current_version(venue_id)
+    if version is None:
+        return None
+    cached = _refdata.get(venue_id)
+    if cached is not MISSING and cached.version == version:
+        return cached
+    data = _load(venue_id, version)
+    _refdata.set(venue_id, data)
+    return data
+
+
+_BUMPED = "refdata_bumped_venues"  # session.info key: venues to invalidate once committed
+
+
+def bump_version(*venue_ids: int) -> None:
+    """
+    Mark reference data for these venues as changed. Call before commit, in the writing transaction.
+    This worker's caches are dropped after the commit: dropping them earlier would let a
+    concurrent reader re-cache the old rows and ref_version until REF_DATA_TTL.
+    """
+    if not venue_ids:
+        return
+    db.session.execute(
+        update(Venue).where(Venue.id.in_(venue_ids)).values(ref_version=Venue.ref_version + 1)
+    )
+    db.session.info.setdefault(_BUMPED, set()).update(venue_ids)
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidate_bumped(session) -> None:
+    for venue_id in session.info.pop(_BUMPED, ()):
+        _refdata.pop(venue_id)
+        _versions.pop(venue_id)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_bumped(session) -> None:
+    session.info.pop(_BUMPED, None)
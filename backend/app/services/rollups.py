@@ -0,0 +1,248 @@
+"""
+Time-bucketed per-exit rollups (exit_rollups) for long analytics windows and trend charts.
+
+The worker (run_compaction) turns request_lifecycle rows into 5-minute buckets once a bucket
+has settled (every request in it had ROLLUP_MAX_SECONDS to finish), folds settled 5-minute
+buckets into 1-hour buckets, samples live queue depth into the open 5-minute bucket's
+peak_queue, and prunes old 5-minute rows. Each granularity has a watermark
+(rollup_watermarks), so a run only touches buckets it has not compacted yet.
+
+Readers combine compacted hours with request_lifecycle for the ragged edges of a window
+(window_totals), so results match the per-request queries exactly.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select
+
+from app.extensions import db
+from app.models import ExitLoad, ExitRollup, RequestLifecycle, RollupWatermark
+from app.services.upsert import insert_for
+
+FIVE_MINUTES = 300
+HOUR = 3600
+ROLLUP_MAX_SECONDS = 1800                    # duration samples above this are not summed
+SETTLE_SECONDS = ROLLUP_MAX_SECONDS + 60
+MAX_BUCKETS_PER_RUN = 288                    # one day of 5-minute buckets; catch-up continues next run
+FIVE_MINUTE_RETENTION = timedelta(days=14)
+
+_EPOCH = datetime(1970, 1, 1)
+_KEY = ("bucket_seconds", "venue_id", "exit_id", "bucket_start")
+_SUMS = (
+    "requests", "completions",
+    "ready_seconds_sum", "ready_seconds_count", "picked_seconds_sum", "picked_seconds_count",
+)
+
+
+def floor_bucket(ts: datetime, seconds: int) -> datetime:
+    offset = int((ts - _EPOCH).total_seconds()) % seconds
+    return ts.replace(microsecond=0) - timedelta(seconds=offset)
+
+
+def _watermark(bucket_seconds: int) -> datetime | None:
+    row = db.session.get(RollupWatermark, bucket_seconds)
+    return row.compacted_until if row else None
+
+
+def _set_watermark(bucket_seconds: int, until: datetime) -> None:
+    row = db.session.get(RollupWatermark, bucket_seconds)
+    if row is None:
+        db.session.add(RollupWatermark(bucket_seconds=bucket_seconds, compacted_until=until))
+    else:
+        row.compacted_until = until
+
+
+def _upsert(rows: list[dict], set_columns=_SUMS) -> None:
+    if not rows:
+        return
+    table = ExitRollup.__table__
+    stmt = insert_for(table).values(rows)
+    set_ = {name: stmt.excluded[name] for name in set_columns}
+    set_["peak_queue"] = case(
+        (table.c.peak_queue >= stmt.excluded.peak_queue, table.c.peak_queue), else_=stmt.excluded.peak_queue
+    )
+    db.session.execute(stmt.on_conflict_do_update(index_elements=list(_KEY), set_=set_))
+
+
+def _empty(bucket_seconds: int, venue_id: int, exit_id: int, bucket_start: datetime) -> dict:
+    row = dict.fromkeys(_SUMS, 0)
+    row.update(bucket_seconds=bucket_seconds, venue_id=venue_id, exit_id=exit_id,
+               bucket_start=bucket_start, peak_queue=0)
+    return row
+
+
+def compact_five_minute(now: datetime) -> int:
+    until = floor_bucket(now - timedelta(seconds=SETTLE_SECONDS), FIVE_MINUTES)
+    start = _watermark(FIVE_MINUTES)
+    if start is None:
+        first = db.session.execute(select(func.min(RequestLifecycle.requested_at))).scalar()
+        start = floor_bucket(first, FIVE_MINUTES) if first else until
+    end = min(until, start + timedelta(seconds=FIVE_MINUTES * MAX_BUCKETS_PER_RUN))
+    if end <= start:
+        return 0
+
+    lc = RequestLifecycle
+    rows = db.session.execute(
+        select(lc.venue_id, lc.exit_id, lc.requested_at, lc.ready_at, lc.ready_seconds, lc.picked_seconds)
+        .where(lc.requested_at >= start, lc.requested_at < end)
+    ).all()
+    buckets: dict[tuple, dict] = {}
+    for r in rows:
+        if r.venue_id is None or r.exit_id is None:
+            continue
+        key = (r.venue_id, r.exit_id, floor_bucket(r.requested_at, FIVE_MINUTES))
+        b = buckets.get(key) or buckets.setdefault(key, _empty(FIVE_MINUTES, *key))
+        b["requests"] += 1
+        if r.ready_at is not None:
+            b["completions"] += 1
+        if r.ready_seconds is not None and 0 <= r.ready_seconds <= ROLLUP_MAX_SECONDS:
+            b["ready_seconds_sum"] += r.ready_seconds
+            b["ready_seconds_count"] += 1
+        if r.picked_seconds is not None and 0 <= r.picked_seconds <= ROLLUP_MAX_SECONDS:
+            b["picked_seconds_sum"] += r.picked_seconds
+            b["picked_seconds_count"] += 1
+    _upsert(list(buckets.values()))
+    _set_watermark(FIVE_MINUTES, end)
+    return len(buckets)
+
+
+def compact_hourly() -> int:
+    five_wm = _watermark(FIVE_MINUTES)
+    if five_wm is None:
+        return 0
+    until = floor_bucket(five_wm, HOUR)
+    start = _watermark(HOUR)
+    if start is None:
+        first = db.session.execute(
+            select(func.min(ExitRollup.bucket_start)).where(ExitRollup.bucket_seconds == FIVE_MINUTES)
+        ).scalar()
+        start = floor_bucket(first, HOUR) if first else until
+    if until <= start:
+        return 0
+
+    rows = ExitRollup.query.filter(
+        ExitRollup.bucket_seconds == FIVE_MINUTES,
+        ExitRollup.bucket_start >= start,
+        ExitRollup.bucket_start < until,
+    ).all()
+    hours: dict[tuple, dict] = {}
+    for r in rows:
+        key = (r.venue_id, r.exit_id, floor_bucket(r.bucket_start, HOUR))
+        h = hours.get(key) or hours.setdefault(key, _empty(HOUR, *key))
+        for name in _SUMS:
+            h[name] += getattr(r, name)
+        h["peak_queue"] = max(h["peak_queue"], r.peak_queue)
+    _upsert(list(hours.values()))
+    _set_watermark(HOUR, until)
+    return len(hours)
+
+
+def sample_queue_peaks(now: datetime) -> int:
+    """Record live queue depth as a candidate peak for the open 5-minute (and hour) bucket."""
+    loads = ExitLoad.query.filter(ExitLoad.queue_depth > 0).all()
+    rows = []
+    for load in loads:
+        for seconds in (FIVE_MINUTES, HOUR):
+            row = _empty(seconds, load.venue_id, load.exit_id, floor_bucket(now, seconds))
+            row["peak_queue"] = load.queue_depth
+            rows.append(row)
+    _upsert(rows, set_columns=())
+    return len(loads)
+
+
+def run_compaction(now: datetime | None = None) -> dict:
+    """Worker job: sample peaks, compact settled buckets, prune old 5-minute rows."""
+    now = now or datetime.utcnow()
+    result = {
+        "sampled": sample_queue_peaks(now),
+        "five_minute": compact_five_minute(now),
+        "hourly": compact_hourly(),
+    }
+    result["pruned"] = ExitRollup.query.filter(
+        ExitRollup.bucket_seconds == FIVE_MINUTES,
+        ExitRollup.bucket_start < now - FIVE_MINUTE_RETENTION,
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return result
+
+
+def _lifecycle_totals(venue_id: int, start: datetime, end: datetime | None, max_seconds: int) -> dict:
+    lc = RequestLifecycle
+    ready_ok = lc.ready_seconds <= max_seconds
+    picked_ok = lc.picked_seconds <= max_seconds
+    q = select(
+        func.sum(case((ready_ok, lc.ready_seconds), else_=0)),
+        func.count(case((ready_ok, 1))),
+        func.sum(case((picked_ok, lc.picked_seconds), else_=0)),
+        func.count(case((picked_ok, 1))),
+    ).where(lc.venue_id == venue_id, lc.requested_at >= start)
+    if end is not None:
+        q = q.where(lc.requested_at < end)
+    ready_sum, ready_n, picked_sum, picked_n = db.session.execute(q).one()
+    return {"ready_sum": float(ready_sum or 0), "ready_n": int(ready_n or 0),
+            "picked_sum": float(picked_sum or 0), "picked_n": int(picked_n or 0)}
+
+
+def window_totals(venue_id: int, since: datetime, max_seconds: int = ROLLUP_MAX_SECONDS) -> dict:
+    """
+    Duration sums/counts for requests made since `since`. Whole compacted hours come from
+    hourly rollups; the partial hour at the start and everything after the hourly watermark
+    come from request_lifecycle. Custom max_seconds can't use the rollups (sums are capped at
+    ROLLUP_MAX_SECONDS), so it reads request_lifecycle for the whole window.
+    """
+    hour_wm = _watermark(HOUR)
+    first_hour = floor_bucket(since, HOUR)
+    if first_hour < since:
+        first_hour += timedelta(seconds=HOUR)
+    if max_seconds != ROLLUP_MAX_SECONDS or hour_wm is None or hour_wm <= first_hour:
+        return _lifecycle_totals(venue_id, since, None, max_seconds)
+
+    r = db.session.execute(
+        select(
+            func.sum(ExitRollup.ready_seconds_sum), func.sum(ExitRollup.ready_seconds_count),
+            func.sum(ExitRollup.picked_seconds_sum), func.sum(ExitRollup.picked_seconds_count),
+        ).where(
+            ExitRollup.venue_id == venue_id,
+            ExitRollup.bucket_seconds == HOUR,
+            ExitRollup.bucket_start >= first_hour,
+            ExitRollup.bucket_start < hour_wm,
+        )
+    ).one()
+    totals = {"ready_sum": float(r[0] or 0), "ready_n": int(r[1] or 0),
+              "picked_sum": float(r[2] or 0), "picked_n": int(r[3] or 0)}
+    for start, end in ((since, first_hour), (hour_wm, None)):
+        part = _lifecycle_totals(venue_id, start, end, max_seconds)
+        for k in totals:
+            totals[k] += part[k]
+    return totals
+
+
+def trend(venue_id: int, granularity: str, since: datetime, exit_id: int | None = None) -> list[dict]:
+    """Hourly or daily series from hourly rollups (compacted buckets only)."""
+    q = ExitRollup.query.filter(
+        ExitRollup.venue_id == venue_id,
+        ExitRollup.bucket_seconds == HOUR,
+        ExitRollup.bucket_start >= floor_bucket(since, HOUR),
+    )
+    if exit_id is not None:
+        q = q.filter(ExitRollup.exit_id == exit_id)
+    series: dict[datetime, dict] = defaultdict(lambda: dict.fromkeys(_SUMS + ("peak_queue",), 0))
+    for r in q.order_by(ExitRollup.bucket_start.asc()).all():
+        start = r.bucket_start if granularity == "hour" else r.bucket_start.replace(hour=0)
+        point = series[start]
+        for name in _SUMS:
+            point[name] += getattr(r, name)
+        point["peak_queue"] = max(point["peak_queue"], r.peak_queue)
+    out = []
+    for start, p in sorted(series.items()):
+        out.append({
+            "bucket_start": start,
+            "requests": p["requests"],
+            "completions": p["completions"],
+            "avg_req_to_ready_seconds": p["ready_seconds_sum"] / p["ready_seconds_count"] if p["ready_seconds_count"] else None,
+            "avg_req_to_picked_seconds": p["picked_seconds_sum"] / p["picked_seconds_count"] if p["picked_seconds_count"] else None,
+            "peak_queue": p["peak_queue"],
+        })
+    return out
@@ -0,0 +1,107 @@
+"""
+Request state transitions as compare-and-set writes, shared by the guest, staff and scheduler
+paths.
+
+transition() validates the steps against ALLOWED_TRANSITIONS, then runs one
+UPDATE requests SET status=..., version=version+1 WHERE id=? AND status=? AND version=?
+and checks the rowcount. If another writer got there first (two valets tapping at once, a
+guest cancel racing the scheduler tick), nothing is written and TransitionConflict (409) is
+raised instead of a second "successful" transition. The step StatusEvents are flushed in the
+same transaction right after the UPDATE (for batches, all together after the last UPDATE),
+so exit_load / request_lifecycle listeners see the new row. No row is read FOR UPDATE: the
+only lock is the UPDATE's own, held until commit.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+from werkzeug.exceptions import BadRequest, Conflict
+
+from app.extensions import db
+from app.models import Request as CarRequest, StatusEvent
+
+ALLOWED_TRANSITIONS = {
+    "SCHEDULED": {"REQUESTED", "CANCELED"},
+    "REQUESTED": {"ASSIGNED", "RETRIEVING"},
+    "ASSIGNED": {"RETRIEVING"},
+    "RETRIEVING": {"READY"},
+    "READY": {"PICKED_UP"},
+    "PICKED_UP": {"CLOSED"},
+    "CLOSED": set(),
+    "CANCELED": set(),
+}
+
+
+class TransitionConflict(Conflict):
+    description = "request was changed by someone else; reload and retry"
+
+
+class InvalidTransition(BadRequest):
+    """400 "invalid transition: X -> Y" (the description)."""
+
+
+def check_steps(current: str, steps: Iterable[tuple[str, str | None]], allow_same: bool = False) -> str:
+    """Final status after steps, or InvalidTransition. allow_same permits X -> X (reassign, reschedule)."""
+    status = current
+    for to_status, _ in steps:
+        if not (allow_same and to_status == status) and to_status not in ALLOWED_TRANSITIONS.get(status, ()):
+            raise InvalidTransition(f"invalid transition: {status} -> {to_status}")
+        status = to_status
+    return status
+
+
+def transition(
+    r: CarRequest,
+    steps: list[tuple[str, str | None]],
+    values: dict | None = None,
+    allow_same: bool = False,
+    pending: list[StatusEvent] | None = None,
+) -> list[StatusEvent]:
+    """
+    Move r through steps [(status, note), ...] in one guarded UPDATE (also setting `values`),
+    record one StatusEvent per step and return them (flushed, with ids). r is updated in place.
+    Batch callers pass `pending`: the events are appended there instead, unflushed and not yet
+    in the session, and the caller inserts them all with one add_all + flush (listeners and
+    event ids follow that flush). Raises InvalidTransition for steps ALLOWED_TRANSITIONS
+    forbids, TransitionConflict when r's status/version no longer match the database.
+    The caller commits.
+    """
+    current = str(r.status)
+    final = check_steps(current, steps, allow_same=allow_same)
+    now = datetime.utcnow()
+    new_values = {"status": final, "updated_at": now, **(values or {})}
+    result = db.session.execute(
+        update(CarRequest)
+        .where(CarRequest.id == r.id, CarRequest.status == current, CarRequest.version == r.version)
+        .values(version=CarRequest.version + 1, **new_values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise TransitionConflict()
+    for key, value in new_values.items():
+        set_committed_value(r, key, value)
+    set_committed_value(r, "version", r.version + 1)
+
+    events = []
+    from_status = current
+    for to_status, note in steps:
+        events.append(StatusEvent(
+            ticket_id=r.ticket_id,
+            venue_id=r.venue_id,
+            request_id=r.id,
+            from_status=from_status,
+            to_status=to_status,
+            note=note,
+            created_at=now,
+        ))
+        from_status = to_status
+    if pending is not None:
+        # kept out of the session: the next item's UPDATE would autoflush them one by one
+        pending.extend(events)
+        return events
+    db.session.add_all(events)
+    db.session.flush()
+    return events
@@ -0,0 +1,31 @@
+"""
+Single-statement upserts for counters/rollups (INSERT ... ON CONFLICT DO UPDATE).
+Postgres in production, SQLite in local tests; both support the same ON CONFLICT syntax.
+"""
+from __future__ import annotations
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def insert_for(table, bind=None):
+    """Dialect-specific insert() with on_conflict_do_update; bind defaults to the session's."""
+    dialect = (bind or db.session.get_bind()).dialect.name
+    try:
+        return _INSERTS[dialect](table)
+    except KeyError:
+        raise NotImplementedError(f"upsert not supported on {dialect}") from None
+
+
+def upsert_add(model, keys: dict, amounts: dict) -> None:
+    """Insert keys + amounts, or add amounts onto the existing row for keys (unique constraint)."""
+    table = model.__table__
+    stmt = insert_for(table).values(**keys, **amounts)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: table.c[name] + stmt.excluded[name] for name in amounts},
+    )
+    db.session.execute(stmt)
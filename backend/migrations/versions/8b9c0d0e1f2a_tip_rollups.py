@@ -0,0 +1,47 @@
+"""per-valet per-day tip rollups
+
+Revision ID: 8b9c0d0e1f2a
+Revises: 7a8b9c0d0e1f
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "8b9c0d0e1f2a"
+down_revision = "7a8b9c0d0e1f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tip_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("venue_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("total_cents", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("tip_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["venue_id"], ["venues.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("venue_id", "user_id", "day", name="uq_tip_rollups_venue_user_day"),
+    )
+    # Backfill from existing tips (one GROUP BY; tips table is small at this point)
+    op.execute(
+        """
+        INSERT INTO tip_rollups (venue_id, user_id, day, total_cents, tip_count)
+        SELECT tk.venue_id, r.delivered_by_user_id, date(t.created_at), SUM(t.amount_cents), COUNT(*)
+        FROM tips t
+        JOIN requests r ON r.id = t.request_id
+        JOIN tickets tk ON tk.id = r.ticket_id
+        WHERE r.delivered_by_user_id IS NOT NULL
+        GROUP BY tk.venue_id, r.delivered_by_user_id, date(t.created_at)
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("tip_rollups")
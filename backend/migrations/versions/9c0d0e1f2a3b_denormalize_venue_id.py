@@ -0,0 +1,54 @@
+"""denormalized venue_id on requests and status_events
+
+Revision ID: 9c0d0e1f2a3b
+Revises: 8b9c0d0e1f2a
+Create Date: 2026-10-18
+
+Online: columns are added nullable (no table rewrite) and committed, then backfilled from
+tickets in autocommit batches (each UPDATE is its own short transaction), then indexed
+CONCURRENTLY (app.migration_ops). The app writes venue_id on every new row, so the
+columns stay nullable and rows created during the backfill are already populated.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migration_ops import batched_backfill, create_index_concurrently, drop_index_concurrently
+
+
+revision = "9c0d0e1f2a3b"
+down_revision = "8b9c0d0e1f2a"
+branch_labels = None
+depends_on = None
+
+
+def _backfill(table: str) -> None:
+    batched_backfill(
+        table,
+        "venue_id = tickets.venue_id",
+        from_sql="tickets",
+        where_sql=f"tickets.id = {table}.ticket_id AND {table}.venue_id IS NULL",
+    )
+
+
+def upgrade():
+    op.add_column("requests", sa.Column("venue_id", sa.Integer(), nullable=True))
+    op.create_foreign_key("fk_requests_venue_id", "requests", "venues", ["venue_id"], ["id"])
+    op.add_column("status_events", sa.Column("venue_id", sa.Integer(), nullable=True))
+    op.create_foreign_key("fk_status_events_venue_id", "status_events", "venues", ["venue_id"], ["id"])
+
+    _backfill("requests")
+    _backfill("status_events")
+
+    create_index_concurrently("ix_requests_venue_status_id", "requests", ["venue_id", "status", "id"])
+    create_index_concurrently("ix_requests_venue_created_at", "requests", ["venue_id", "created_at"])
+    create_index_concurrently("ix_status_events_venue_created_at", "status_events", ["venue_id", "created_at", "id"])
+
+
+def downgrade():
+    drop_index_concurrently("ix_status_events_venue_created_at", "status_events")
+    drop_index_concurrently("ix_requests_venue_created_at", "requests")
+    drop_index_concurrently("ix_requests_venue_status_id", "requests")
+    op.drop_constraint("fk_status_events_venue_id", "status_events", type_="foreignkey")
+    op.drop_column("status_events", "venue_id")
+    op.drop_constraint("fk_requests_venue_id", "requests", type_="foreignkey")
+    op.drop_column("requests", "venue_id")
@@ -0,0 +1,34 @@
+"""hot-path indexes (ticket lookups, scheduler, SSE, outbox drain)
+
+Revision ID: a0d0e1f2a3b4
+Revises: 9c0d0e1f2a3b
+Create Date: 2026-10-18
+
+Built CONCURRENTLY on Postgres (app.migration_ops) so writes continue during the build.
+"""
+from app.migration_ops import create_index_concurrently, drop_index_concurrently
+
+
+revision = "a0d0e1f2a3b4"
+down_revision = "9c0d0e1f2a3b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_index_concurrently("ix_requests_ticket_id_id", "requests", ["ticket_id", "id"])
+    create_index_concurrently("ix_requests_scheduled_due", "requests", ["scheduled_for"], where="status = 'SCHEDULED'")
+    create_index_concurrently("ix_status_events_ticket_id_id", "status_events", ["ticket_id", "id"])
+    create_index_concurrently("ix_status_events_request_id_created_at", "status_events", ["request_id", "created_at"])
+    create_index_concurrently(
+        "ix_notification_outbox_state_id", "notification_outbox", ["state", "id"],
+        where="state IN ('PENDING', 'FAILED')",
+    )
+
+
+def downgrade():
+    drop_index_concurrently("ix_notification_outbox_state_id", "notification_outbox")
+    drop_index_concurrently("ix_status_events_request_id_created_at", "status_events")
+    drop_index_concurrently("ix_status_events_ticket_id_id", "status_events")
+    drop_index_concurrently("ix_requests_scheduled_due", "requests")
+    drop_index_concurrently("ix_requests_ticket_id_id", "requests")
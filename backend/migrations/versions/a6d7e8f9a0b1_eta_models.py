@@ -0,0 +1,40 @@
+"""eta_models: fitted per-exit, per-hour-of-week ETA parameters
+
+Revision ID: a6d7e8f9a0b1
+Revises: f5c6d7e8f9a0
+Create Date: 2026-10-18
+
+Empty on creation (recommendations keep the queue-penalty heuristic); `flask fit-eta` fills it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a6d7e8f9a0b1"
+down_revision = "f5c6d7e8f9a0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "eta_models",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("venue_id", sa.Integer(), nullable=False),
+        sa.Column("exit_id", sa.Integer(), nullable=False),
+        sa.Column("hour_of_week", sa.SmallInteger(), nullable=False),
+        sa.Column("base_seconds", sa.Float(), nullable=False),
+        sa.Column("queue_slope_seconds", sa.Float(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=False),
+        sa.Column("fitted_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["venue_id"], ["venues.id"]),
+        sa.ForeignKeyConstraint(["exit_id"], ["exits.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("exit_id", "hour_of_week", name="uq_eta_models_exit_hour"),
+    )
+    op.create_index("ix_eta_models_venue_id", "eta_models", ["venue_id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_eta_models_venue_id", table_name="eta_models")
+    op.drop_table("eta_models")
@@ -0,0 +1,24 @@
+"""venues.ref_version (reference-data cache stamp)
+
+Revision ID: b1e2f3a4b5c6
+Revises: a0d0e1f2a3b4
+Create Date: 2026-10-18
+
+Constant server default: metadata-only on Postgres 11+, no table rewrite.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b1e2f3a4b5c6"
+down_revision = "a0d0e1f2a3b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("venues", sa.Column("ref_version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade():
+    op.drop_column("venues", "ref_version")
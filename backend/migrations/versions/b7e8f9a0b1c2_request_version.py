@@ -0,0 +1,24 @@
+"""requests.version for compare-and-set transitions
+
+Revision ID: b7e8f9a0b1c2
+Revises: a6d7e8f9a0b1
+Create Date: 2026-10-18
+
+Constant server default: a metadata-only ADD COLUMN on Postgres 11+, no table rewrite.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b7e8f9a0b1c2"
+down_revision = "a6d7e8f9a0b1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("requests", sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    op.drop_column("requests", "version")
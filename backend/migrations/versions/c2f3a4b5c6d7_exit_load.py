@@ -0,0 +1,64 @@
+"""exit_load: live per-exit queue depth and EWMA ETA
+
+Revision ID: c2f3a4b5c6d7
+Revises: b1e2f3a4b5c6
+Create Date: 2026-10-18
+
+Seeded from current data: queue depth = active requests per exit, ETA = mean
+REQUESTED -> READY seconds over the last 24 h (samples over 1800 s dropped), which is what
+recommendations showed before the switch. The app keeps it current from then on.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c2f3a4b5c6d7"
+down_revision = "b1e2f3a4b5c6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "exit_load",
+        sa.Column("exit_id", sa.Integer(), nullable=False),
+        sa.Column("venue_id", sa.Integer(), nullable=False),
+        sa.Column("queue_depth", sa.Integer(), nullable=False),
+        sa.Column("eta_seconds", sa.Float(), nullable=True),
+        sa.Column("eta_samples", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["exit_id"], ["exits.id"]),
+        sa.ForeignKeyConstraint(["venue_id"], ["venues.id"]),
+        sa.PrimaryKeyConstraint("exit_id"),
+    )
+    op.create_index("ix_exit_load_venue_id", "exit_load", ["venue_id"], unique=False)
+
+    op.execute(
+        """
+        INSERT INTO exit_load (exit_id, venue_id, queue_depth, eta_seconds, eta_samples, updated_at)
+        SELECT e.id, e.venue_id, COALESCE(q.n, 0), eta.avg_seconds, COALESCE(eta.n, 0), now() AT TIME ZONE 'utc'
+        FROM exits e
+        LEFT JOIN (
+            SELECT exit_id, COUNT(*) AS n FROM requests
+            WHERE status IN ('SCHEDULED', 'REQUESTED', 'ASSIGNED', 'RETRIEVING', 'READY')
+            GROUP BY exit_id
+        ) q ON q.exit_id = e.id
+        LEFT JOIN (
+            SELECT exit_id, COUNT(*) AS n, AVG(seconds) AS avg_seconds FROM (
+                SELECT r.exit_id,
+                       EXTRACT(EPOCH FROM MIN(se.created_at) FILTER (WHERE se.to_status = 'READY')
+                                        - MIN(se.created_at) FILTER (WHERE se.to_status = 'REQUESTED')) AS seconds
+                FROM status_events se JOIN requests r ON r.id = se.request_id
+                WHERE se.created_at >= (now() AT TIME ZONE 'utc') - interval '24 hours'
+                GROUP BY se.request_id, r.exit_id
+            ) per_req
+            WHERE seconds IS NOT NULL AND seconds BETWEEN 0 AND 1800
+            GROUP BY exit_id
+        ) eta ON eta.exit_id = e.id
+        """
+    )
+
+
+def downgrade():
+    op.drop_index("ix_exit_load_venue_id", table_name="exit_load")
+    op.drop_table("exit_load")
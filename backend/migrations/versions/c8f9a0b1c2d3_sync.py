@@ -0,0 +1,47 @@
+"""offline valet sync: tickets.updated_at, (venue_id, updated_at) indexes, idempotency_keys
+
+Revision ID: c8f9a0b1c2d3
+Revises: b7e8f9a0b1c2
+Create Date: 2026-10-18
+
+tickets.updated_at is nullable with no default: a metadata-only ADD COLUMN, no rewrite. Rows
+untouched since then keep NULL and only reach devices through a full sync, which doesn't
+filter on it. Indexes are built CONCURRENTLY on Postgres (app.migration_ops).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migration_ops import create_index_concurrently, drop_index_concurrently
+
+
+revision = "c8f9a0b1c2d3"
+down_revision = "b7e8f9a0b1c2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("tickets", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
+        sa.Column("scope", sa.String(length=80), nullable=False),
+        sa.Column("key", sa.String(length=120), nullable=False),
+        sa.Column("status_code", sa.SmallInteger(), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+    )
+    op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+    create_index_concurrently("ix_requests_venue_updated_at", "requests", ["venue_id", "updated_at"])
+    create_index_concurrently("ix_tickets_venue_updated_at", "tickets", ["venue_id", "updated_at"])
+
+
+def downgrade():
+    drop_index_concurrently("ix_tickets_venue_updated_at", "tickets")
+    drop_index_concurrently("ix_requests_venue_updated_at", "requests")
+    op.drop_index("ix_idempotency_keys_expires_at", table_name="idempotency_keys")
+    op.drop_table("idempotency_keys")
+    op.drop_column("tickets", "updated_at")
@@ -0,0 +1,65 @@
+"""request_lifecycle fact table (one row per request, stage timestamps + durations)
+
+Revision ID: d3a4b5c6d7e8
+Revises: c2f3a4b5c6d7
+Create Date: 2026-10-18
+
+Backfilled from status_events in request-id batches (app.migration_ops.batched_insert):
+first REQUESTED / ASSIGNED / READY / PICKED_UP time per request. The app writes new rows on
+every transition, so rows created during the fill are skipped via ON CONFLICT DO NOTHING.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migration_ops import batched_insert, create_index_concurrently
+
+
+revision = "d3a4b5c6d7e8"
+down_revision = "c2f3a4b5c6d7"
+branch_labels = None
+depends_on = None
+
+FILL_SQL = """
+(request_id, venue_id, exit_id, requested_at, assigned_at, ready_at, picked_at, ready_seconds, picked_seconds)
+SELECT request_id, venue_id, exit_id, requested_at, assigned_at, ready_at, picked_at,
+       EXTRACT(EPOCH FROM ready_at - requested_at), EXTRACT(EPOCH FROM picked_at - requested_at)
+FROM (
+    SELECT r.id AS request_id, r.venue_id, r.exit_id,
+           MIN(se.created_at) FILTER (WHERE se.to_status = 'REQUESTED') AS requested_at,
+           MIN(se.created_at) FILTER (WHERE se.to_status = 'ASSIGNED') AS assigned_at,
+           MIN(se.created_at) FILTER (WHERE se.to_status = 'READY') AS ready_at,
+           MIN(se.created_at) FILTER (WHERE se.to_status = 'PICKED_UP') AS picked_at
+    FROM requests r JOIN status_events se ON se.request_id = r.id
+    WHERE r.id > :start AND r.id <= :end
+    GROUP BY r.id, r.venue_id, r.exit_id
+) stages
+WHERE requested_at IS NOT NULL OR assigned_at IS NOT NULL OR ready_at IS NOT NULL OR picked_at IS NOT NULL
+ON CONFLICT (request_id) DO NOTHING
+"""
+
+
+def upgrade():
+    op.create_table(
+        "request_lifecycle",
+        sa.Column("request_id", sa.Integer(), nullable=False),
+        sa.Column("venue_id", sa.Integer(), nullable=True),
+        sa.Column("exit_id", sa.Integer(), nullable=True),
+        sa.Column("requested_at", sa.DateTime(), nullable=True),
+        sa.Column("assigned_at", sa.DateTime(), nullable=True),
+        sa.Column("ready_at", sa.DateTime(), nullable=True),
+        sa.Column("picked_at", sa.DateTime(), nullable=True),
+        sa.Column("ready_seconds", sa.Float(), nullable=True),
+        sa.Column("picked_seconds", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["request_id"], ["requests.id"]),
+        sa.ForeignKeyConstraint(["venue_id"], ["venues.id"]),
+        sa.ForeignKeyConstraint(["exit_id"], ["exits.id"]),
+        sa.PrimaryKeyConstraint("request_id"),
+    )
+    batched_insert("request_lifecycle", FILL_SQL, source_table="requests")
+    create_index_concurrently(
+        "ix_request_lifecycle_venue_requested_at", "request_lifecycle", ["venue_id", "requested_at"]
+    )
+
+
+def downgrade():
+    op.drop_table("request_lifecycle")
@@ -0,0 +1,58 @@
+"""exit_rollups (5 min / 1 h buckets) and rollup_watermarks
+
+Revision ID: e4b5c6d7e8f9
+Revises: d3a4b5c6d7e8
+Create Date: 2026-10-18
+
+Empty on creation: the worker's compaction job fills buckets from request_lifecycle,
+catching up MAX_BUCKETS_PER_RUN buckets per pass.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migration_ops import create_index_concurrently, drop_index_concurrently
+
+
+revision = "e4b5c6d7e8f9"
+down_revision = "d3a4b5c6d7e8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "exit_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("bucket_seconds", sa.Integer(), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("venue_id", sa.Integer(), nullable=False),
+        sa.Column("exit_id", sa.Integer(), nullable=False),
+        sa.Column("requests", sa.Integer(), nullable=False),
+        sa.Column("completions", sa.Integer(), nullable=False),
+        sa.Column("ready_seconds_sum", sa.Float(), nullable=False),
+        sa.Column("ready_seconds_count", sa.Integer(), nullable=False),
+        sa.Column("picked_seconds_sum", sa.Float(), nullable=False),
+        sa.Column("picked_seconds_count", sa.Integer(), nullable=False),
+        sa.Column("peak_queue", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["venue_id"], ["venues.id"]),
+        sa.ForeignKeyConstraint(["exit_id"], ["exits.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("bucket_seconds", "venue_id", "exit_id", "bucket_start", name="uq_exit_rollups_bucket"),
+    )
+    op.create_index(
+        "ix_exit_rollups_venue_bucket", "exit_rollups", ["venue_id", "bucket_seconds", "bucket_start"], unique=False
+    )
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("bucket_seconds", sa.Integer(), nullable=False),
+        sa.Column("compacted_until", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("bucket_seconds"),
+    )
+    create_index_concurrently("ix_request_lifecycle_requested_at", "request_lifecycle", ["requested_at"])
+
+
+def downgrade():
+    drop_index_concurrently("ix_request_lifecycle_requested_at", "request_lifecycle")
+    op.drop_table("rollup_watermarks")
+    op.drop_index("ix_exit_rollups_venue_bucket", table_name="exit_rollups")
+    op.drop_table("exit_rollups")
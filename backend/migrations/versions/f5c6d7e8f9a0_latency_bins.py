@@ -0,0 +1,40 @@
+"""latency_bins: hourly latency histograms per exit / valet
+
+Revision ID: f5c6d7e8f9a0
+Revises: e4b5c6d7e8f9
+Create Date: 2026-10-18
+
+Empty on creation; new READY / PICKED_UP transitions fill it. Backfill history with
+`flask rebuild-latency` (or `--days N` for recent history only).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f5c6d7e8f9a0"
+down_revision = "e4b5c6d7e8f9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "latency_bins",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("venue_id", sa.Integer(), nullable=False),
+        sa.Column("metric", sa.String(length=10), nullable=False),
+        sa.Column("dimension", sa.String(length=10), nullable=False),
+        sa.Column("key_id", sa.Integer(), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("bin", sa.SmallInteger(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["venue_id"], ["venues.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "venue_id", "metric", "dimension", "bucket_start", "key_id", "bin", name="uq_latency_bins_key"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("latency_bins")
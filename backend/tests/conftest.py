@@ -14,6 +14,7 @@ from sqlalchemy import text
 
 from app import create_app
 from app.extensions import db
+from app.services.cache import clear_all as clear_caches
 from app.models import (
     Venue, Exit, Zone, Ticket, Request as CarRequest, User,
     Role, RequestStatus,
@@ -22,6 +23,8 @@ from app.models import (
 
 @pytest.fixture
 def app():
+    # In-process caches outlive the per-test database; start every test cold.
+    clear_caches()
     # CI: use DATABASE_URL as-is (Postgres) so scheduler tick tests run.
     # Local: force in-memory SQLite so no Postgres required.
     url = os.environ.get("DATABASE_URL", "")
@@ -58,10 +61,13 @@ def app_context(app):
 def db_tables(app, app_context):
     url = os.environ.get("DATABASE_URL", "")
     if "postgresql" in url:
-        # CI: schema from migrations; truncate so each test run has clean data
+        # CI: schema from migrations; truncate so each test run has clean data. Every table is
+        # listed: CASCADE only reaches tables with a foreign key to one named here, and
+        # rollup_watermarks / idempotency_keys have none.
         db.session.execute(text(
-            "TRUNCATE notification_outbox, notification_subscriptions, status_events, "
-            "requests, zones, tickets, users, exits, venues RESTART IDENTITY CASCADE"
+            "TRUNCATE notification_outbox, notification_subscriptions, tips, tip_rollups, "
+            "exit_load, request_lifecycle, exit_rollups, latency_bins, eta_models, rollup_watermarks, "
+            "idempotency_keys, status_events, requests, zones, tickets, users, exits, venues RESTART IDENTITY CASCADE"
         ))
         db.session.commit()
     else:
@@ -141,10 +147,23 @@ def seed_data(db_tables, venue, exit_a, ticket, manager_user, valet_user):
     }
 
 
+@pytest.fixture
+def make_request(seed_data):
+    """Factory: make_request(status, **columns) commits a request on the seed ticket and exit."""
+    def make(status="REQUESTED", **kw):
+        t, ex = seed_data["ticket"], seed_data["exit"]
+        r = CarRequest(ticket_id=t.id, venue_id=t.venue_id, exit_id=ex.id, status=status, **kw)
+        db.session.add(r)
+        db.session.commit()
+        return r
+    return make
+
+
 def jwt_for_user(app, user):
     from flask_jwt_extended import create_access_token
+    from app.auth import token_claims
     with app.app_context():
-        return create_access_token(identity=str(user.id))
+        return create_access_token(identity=str(user.id), additional_claims=token_claims(user))
 
 
 @pytest.fixture
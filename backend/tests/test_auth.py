@@ -0,0 +1,33 @@
+"""
+Role/venue claims in access tokens: staff endpoints authorize without a users query;
+tokens issued without claims still work via the cached user lookup.
+"""
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from tests.conftest import auth_headers
+from tests.test_query_counts import count_queries
+
+
+def test_me_and_authorization_come_from_token_claims(app, client, seed_data, valet_jwt):
+    with count_queries() as statements:
+        resp = client.get("/me", headers=auth_headers(valet_jwt))
+    assert resp.status_code == 200
+    assert resp.get_json()["role"] == "VALET" and resp.get_json()["venue_id"] == seed_data["venue"].id
+    assert not [s for s in statements if "users" in s]
+
+    # valet token is rejected by a manager-only endpoint, still without touching users
+    with count_queries() as statements:
+        assert client.post("/auth/register", json={}, headers=auth_headers(valet_jwt)).status_code == 403
+    assert not statements
+
+
+def test_token_without_claims_falls_back_to_user_lookup(app, client, seed_data):
+    with app.app_context():
+        legacy = create_access_token(identity=str(seed_data["manager"].id))
+    db.session.expunge_all()  # no identity-map hits: every lookup would be a real query
+    with count_queries() as statements:
+        for _ in range(3):
+            resp = client.get("/me", headers=auth_headers(legacy))
+            assert resp.get_json()["role"] == "MANAGER"
+    assert len([s for s in statements if "users" in s]) == 1
@@ -0,0 +1,62 @@
+"""
+POST /api/requests/batch: several assign / status operations in one transaction, with a
+result per item; failed items write nothing and don't undo the others.
+"""
+from app.extensions import db
+from app.models import NotificationOutbox, NotificationSubscription, Request as CarRequest, StatusEvent
+from tests.conftest import auth_headers
+from tests.test_query_counts import count_queries
+
+
+def test_batch_applies_items_independently(client, seed_data, valet_jwt, make_request):
+    rows = [make_request(s) for s in ("REQUESTED", "RETRIEVING", "CLOSED")]
+    db.session.add(NotificationSubscription(ticket_id=seed_data["ticket"].id, channel="sms", target="5551234",
+                                            is_active=True))
+    db.session.commit()
+    assigned, retrieving, closed = (r.id for r in rows)
+
+    resp = client.post("/api/requests/batch", headers=auth_headers(valet_jwt), json={"operations": [
+        {"id": assigned, "action": "assign"},
+        {"id": retrieving, "status": "READY"},
+        {"id": retrieving, "status": "PICKED_UP"},   # same request again, sees the READY above
+        {"id": closed, "status": "READY"},
+        {"id": 999999, "status": "READY"},
+        {"id": assigned, "action": "teleport"},
+    ]})
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert [(r["ok"], r.get("status")) for r in results] == [
+        (True, None), (True, None), (True, None), (False, 400), (False, 404), (False, 400),
+    ]
+    assert results[0]["request"]["status"] == "ASSIGNED"
+    assert results[2]["request"]["status"] == "CLOSED"
+    assert "invalid transition" in results[3]["error"]
+
+    db.session.expire_all()
+    assert db.session.get(CarRequest, closed).version == 0
+    assert StatusEvent.query.filter_by(request_id=closed).count() == 0
+    assert StatusEvent.query.filter_by(request_id=retrieving).count() == 3  # READY, PICKED_UP, CLOSED
+    assert NotificationOutbox.query.filter_by(request_id=retrieving).count() == 1
+
+
+def test_batch_validates_envelope(client, seed_data, valet_jwt):
+    headers = auth_headers(valet_jwt)
+    assert client.post("/api/requests/batch", headers=headers, json={"operations": []}).status_code == 400
+    too_many = [{"id": i, "status": "READY"} for i in range(51)]
+    assert client.post("/api/requests/batch", headers=headers, json={"operations": too_many}).status_code == 400
+
+
+def test_batch_inserts_status_events_after_all_updates(client, seed_data, valet_jwt, make_request):
+    rows = [make_request("RETRIEVING") for _ in range(5)]
+    ops = [{"id": r.id, "status": "READY"} for r in rows]
+    with count_queries() as statements:
+        resp = client.post("/api/requests/batch", headers=auth_headers(valet_jwt), json={"operations": ops})
+    assert all(r["ok"] for r in resp.get_json()["results"])
+    kinds = [s.split("(")[0].split(" SET")[0].strip() for s in statements]
+    inserts = [i for i, k in enumerate(kinds) if k == "INSERT INTO status_events"]
+    updates = [i for i, k in enumerate(kinds) if k == "UPDATE requests"]
+    # every compare-and-set first, then the events together (no per-item flush in between)
+    assert len(updates) == 5 and inserts and min(inserts) > max(updates)
+    if db.engine.dialect.name == "postgresql":
+        assert len(inserts) == 1  # insertmanyvalues; SQLite can't return ordered ids, so one per row
+    assert StatusEvent.query.filter(StatusEvent.request_id.in_([r.id for r in rows])).count() == 5
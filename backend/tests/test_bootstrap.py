@@ -0,0 +1,48 @@
+"""
+GET /t/<token>/bootstrap: the guest page's first render in one response, matching the
+separate endpoints, in two queries once caches are warm, and revalidated by ETag.
+"""
+from app.extensions import db
+from app.models import NotificationSubscription
+from tests.conftest import auth_headers
+from tests.test_query_counts import count_queries
+
+
+def test_bootstrap_matches_separate_calls(client, seed_data, make_request):
+    t = seed_data["ticket"]
+    make_request()
+    db.session.add(NotificationSubscription(ticket_id=t.id, channel="SMS", target="5551234", is_active=True))
+    db.session.commit()
+
+    body = client.get(f"/t/{t.token}/bootstrap").get_json()
+    ticket = client.get(f"/t/{t.token}").get_json()
+    assert body["ticket"] == ticket["ticket"] and body["request"] == ticket["request"]
+    assert body["exits"] == client.get(f"/t/{t.token}/exits").get_json()
+    recs = client.get(f"/t/{t.token}/recommendations").get_json()
+    assert body["recommendation"] == {"recommended": recs["recommended"], "options": recs["options"]}
+    assert [(s["channel"], s["is_active"]) for s in body["subscriptions"]] == [("SMS", True)]
+
+    with count_queries() as statements:
+        assert client.get(f"/t/{t.token}/bootstrap").status_code == 200
+    assert len(statements) == 2
+
+
+def test_bootstrap_etag_follows_ticket_version(client, seed_data, valet_jwt, make_request):
+    t = seed_data["ticket"]
+    r = make_request()
+    url = f"/t/{t.token}/bootstrap"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    assert client.post(f"/api/requests/{r.id}/assign", json={}, headers=auth_headers(valet_jwt)).status_code == 200
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.get_json()["version"] != first.get_json()["version"]
+    assert changed.get_json()["request"]["status"] == "ASSIGNED"
+
+
+def test_bootstrap_without_request(client, seed_data):
+    body = client.get(f"/t/{seed_data['ticket'].token}/bootstrap").get_json()
+    assert body["request"] is None and body["ticket"]["id"] == seed_data["ticket"].id
+    assert client.get("/t/nope/bootstrap").status_code == 404
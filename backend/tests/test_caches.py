@@ -0,0 +1,149 @@
+"""
+In-process caches on public hot paths:
+- Venue slug resolution: negative caching, invalidation on create_venue
+- Venue reference data (exits/zones): ETag/304, version bump on writes, cross-worker version check
+- Guest token resolution: unknown tokens cached as misses, closing a ticket invalidates;
+  signed tokens (GUEST_TOKEN_SIGNING) reject forgeries without a query
+- Analytics results: single flight for concurrent misses, stale-while-revalidate, per-venue TTL
+"""
+import threading
+import time
+
+from app.extensions import db
+from app.models import Exit, Venue, Request as CarRequest
+from app.services import refdata
+from app.services.cache import MISSING, SingleFlightCache
+from app.services.guest_tokens import resolve_token
+from tests.conftest import auth_headers
+from tests.test_query_counts import count_queries
+
+
+def test_unknown_slug_is_negatively_cached_until_venue_created(client, manager_jwt):
+    """Unknown slug 404s; creating the venue invalidates the cached miss."""
+    r1 = client.post("/v/pop-up/claim/start", json={"phone": "5551234"})
+    assert r1.status_code == 404
+
+    r2 = client.post("/api/venues", json={"name": "Pop Up", "slug": "pop-up"}, headers=auth_headers(manager_jwt))
+    assert r2.status_code == 201
+
+    r3 = client.post("/v/pop-up/claim/start", json={"phone": "5551234"})
+    assert r3.status_code == 200
+
+
+def test_exits_served_from_versioned_refdata_cache(client, seed_data, manager_jwt):
+    venue_id = seed_data["venue"].id
+    url = f"/api/venues/{venue_id}/exits"
+    r1 = client.get(url)
+    assert [e["code"] for e in r1.get_json()] == ["A"]
+    assert r1.headers["ETag"] and "public" in r1.headers["Cache-Control"]
+    with count_queries() as statements:
+        assert client.get(url, headers={"If-None-Match": r1.headers["ETag"]}).status_code == 304
+    assert not statements
+
+    # write on this worker: version bump, new ETag, new exit visible immediately
+    client.post(f"/api/venues/{venue_id}/exits", json={"name": "Side", "code": "B"}, headers=auth_headers(manager_jwt))
+    r2 = client.get(url, headers={"If-None-Match": r1.headers["ETag"]})
+    assert r2.status_code == 200 and r2.headers["ETag"] != r1.headers["ETag"]
+    assert [e["code"] for e in r2.get_json()] == ["A", "B"]
+
+    # write on another worker: picked up once the version check window lapses
+    db.session.add(Exit(venue_id=venue_id, code="C", name="Patio"))
+    db.session.execute(db.update(Venue).where(Venue.id == venue_id).values(ref_version=Venue.ref_version + 1))
+    db.session.commit()
+    assert [e["code"] for e in client.get(url).get_json()] == ["A", "B"]
+    refdata._versions.clear()
+    assert [e["code"] for e in client.get(url).get_json()] == ["A", "B", "C"]
+
+
+def test_refdata_invalidated_only_after_commit(seed_data):
+    venue_id = seed_data["venue"].id
+    refdata.get_refdata(venue_id)
+    refdata.bump_version(venue_id)
+    # uncommitted: readers in this worker keep the committed copy
+    assert refdata._refdata.get(venue_id) is not MISSING
+    db.session.rollback()
+    assert refdata._refdata.get(venue_id) is not MISSING
+
+    refdata.bump_version(venue_id)
+    db.session.commit()
+    assert refdata._refdata.get(venue_id) is MISSING and refdata._versions.get(venue_id) is MISSING
+
+
+def test_guest_token_resolution_is_cached_and_invalidated_on_close(client, seed_data):
+    with count_queries() as statements:
+        for _ in range(3):
+            assert client.get("/t/no-such-token/exits").status_code == 404
+    assert len(statements) == 1
+
+    ticket = seed_data["ticket"]
+    r = CarRequest(ticket_id=ticket.id, exit_id=seed_data["exit"].id, status="READY")
+    db.session.add(r)
+    db.session.commit()
+    assert resolve_token(ticket.token).closed_at is None
+    assert client.post(f"/t/{ticket.token}/request/{r.id}/picked-up").status_code == 200
+    assert resolve_token(ticket.token).closed_at is not None
+
+
+def test_signed_guest_tokens(app, client, seed_data):
+    app.config["GUEST_TOKEN_SIGNING"] = True
+    venue_id = seed_data["venue"].id
+    token = client.post("/api/tickets", json={"venue_id": venue_id}).get_json()["guest_path"].rsplit("/", 1)[1]
+    ticket_id, signed_venue, mac = token.split(".")
+    assert int(signed_venue) == venue_id
+    assert client.get(f"/t/{token}").get_json()["ticket"]["id"] == int(ticket_id)
+
+    forged = f"{ticket_id}.{venue_id}.{'A' * len(mac)}"
+    with count_queries() as statements:
+        assert client.get(f"/t/{forged}").status_code == 404
+        assert client.get(f"/t/{int(ticket_id) + 1}.{venue_id}.{mac}").status_code == 404
+        assert client.get(f"/t/\u00b2.{venue_id}.{mac}").status_code == 404  # "²".isdigit(), int() rejects it
+    assert not statements
+
+    # links issued before signing was turned on keep working
+    assert client.get(f"/t/{seed_data['ticket'].token}").status_code == 200
+
+
+def test_single_flight_collapses_concurrent_misses_and_serves_stale():
+    cache = SingleFlightCache(ttl=0.05, stale_ttl=10)
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return len(calls)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", slow))) for _ in range(8)]
+    for th in threads:
+        th.start()
+    time.sleep(0.05)
+    release.set()
+    for th in threads:
+        th.join()
+    assert calls == [1] and results == [1] * 8
+
+    # expired: one caller recomputes, a concurrent caller gets the stale value without waiting
+    time.sleep(0.06)
+    release.clear()
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", slow)))
+    leader.start()
+    time.sleep(0.05)
+    assert cache.get_or_compute("k", slow) == 1
+    release.set()
+    leader.join()
+    assert results[-1] == 2 and cache.get_or_compute("k", slow) == 2
+
+
+def test_analytics_endpoints_share_one_computation_per_venue(client, seed_data, manager_jwt):
+    venue_id = seed_data["venue"].id
+    headers = auth_headers(manager_jwt)
+    url = f"/api/metrics?venue_id={venue_id}"
+    recs_url = f"/t/{seed_data['ticket'].token}/recommendations"
+    first = client.get(url, headers=headers).get_json()
+    first_recs = client.get(recs_url).get_json()
+    with count_queries() as queries:
+        assert client.get(url, headers=headers).get_json() == first
+        assert client.get(recs_url).get_json() == first_recs
+        assert client.get(recs_url + "?queue_penalty=60").get_json()["queue_penalty"] == 60
+    assert not [q for q in queries if "exit_load" in q or "request_lifecycle" in q or "requests" in q]
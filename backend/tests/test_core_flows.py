@@ -126,6 +126,16 @@ def test_second_request_returns_idempotent(client, seed_data, exit_a):
     assert data["request"]["status"] == RequestStatus.REQUESTED.value
 
 
+def test_request_and_events_carry_venue_id(client, seed_data, exit_a):
+    """Denormalized venue_id is written on requests and status events."""
+    ticket = seed_data["ticket"]
+    db.session.commit()
+    r = client.post(f"/t/{ticket.token}/request", json={"exit_id": exit_a.id})
+    req = db.session.get(CarRequest, r.get_json()["request"]["id"])
+    assert req.venue_id == seed_data["venue"].id
+    assert [ev.venue_id for ev in req.events] == [seed_data["venue"].id]
+
+
 # --- Auth boundaries ---
 
 
@@ -0,0 +1,89 @@
+"""
+flask fit-eta: per-exit queue-slope model fitted from request_lifecycle, replayed against the
+queue-penalty heuristic, and used by /t/<token>/recommendations.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models import EtaModel, Exit, Request as CarRequest, RequestLifecycle
+from app.services import eta_model
+
+
+def _history(exit_obj, ticket, base, slope, n=80, seed=1):
+    """Requests whose ready time is exactly base + slope * (cars ahead still active)."""
+    rng = random.Random(seed)
+    t = datetime.utcnow() - timedelta(days=8)
+    left = []
+    for _ in range(n):
+        # bursts of arrivals (queues build up), then a quiet gap
+        t += timedelta(seconds=rng.randint(20, 400) if rng.random() > 0.2 else 6 * 3600)
+        queue = sum(1 for done in left if done > t)
+        seconds = base + slope * queue
+        left.append(t + timedelta(seconds=seconds))
+        r = CarRequest(ticket_id=ticket.id, venue_id=ticket.venue_id, exit_id=exit_obj.id, status="CLOSED")
+        db.session.add(r)
+        db.session.flush()
+        db.session.add(RequestLifecycle(
+            request_id=r.id, venue_id=ticket.venue_id, exit_id=exit_obj.id,
+            requested_at=t, ready_at=left[-1], ready_seconds=seconds,
+        ))
+    db.session.commit()
+
+
+@pytest.fixture
+def fitted_history(seed_data):
+    venue, ticket = seed_data["venue"], seed_data["ticket"]
+    exit_b = Exit(venue_id=venue.id, code="B", name="Exit B", is_active=True)
+    db.session.add(exit_b)
+    db.session.commit()
+    _history(seed_data["exit"], ticket, base=100, slope=60)
+    _history(exit_b, ticket, base=200, slope=10, seed=2)
+    return seed_data["exit"], exit_b
+
+
+def test_fit_recovers_parameters_and_beats_heuristic(fitted_history):
+    exit_a, exit_b = fitted_history
+    summary = eta_model.fit(datetime.utcnow() - timedelta(days=30), holdout_days=2)
+    assert summary["rows"] == 160 and summary["exits"] == 2
+    assert summary["holdout_samples"] > 0
+    assert summary["model_mae"] < summary["heuristic_mae"]
+
+    rows = {r.exit_id: r for r in EtaModel.query.filter_by(hour_of_week=eta_model.ALL_HOURS)}
+    assert rows[exit_a.id].base_seconds == pytest.approx(100) and rows[exit_a.id].queue_slope_seconds == pytest.approx(60)
+    assert rows[exit_b.id].base_seconds == pytest.approx(200) and rows[exit_b.id].queue_slope_seconds == pytest.approx(10)
+
+
+def test_numpy_and_pure_python_fits_agree(fitted_history, monkeypatch):
+    pytest.importorskip("numpy")
+    with_numpy = eta_model.fit(datetime.utcnow() - timedelta(days=30), save=False)
+    monkeypatch.setattr(eta_model, "np", None)
+    assert eta_model.fit(datetime.utcnow() - timedelta(days=30), save=False) == dict(with_numpy, numpy=False)
+
+
+def test_numpy_queue_matches_pure_python(monkeypatch):
+    pytest.importorskip("numpy")
+    rng = random.Random(3)
+    h = eta_model.History()
+    for _ in range(500):
+        t = float(rng.randint(0, 5000))  # integer seconds: plenty of ties
+        h.exit_id.append(rng.choice((7, 3, 11)))
+        h.requested.append(t)
+        h.left.append(None if rng.random() < 0.1 else t + rng.randint(0, 600))
+    vectorized = [int(q) for q in eta_model._queue_at_request(h)]
+    monkeypatch.setattr(eta_model, "np", None)
+    assert vectorized == eta_model._queue_at_request(h)
+
+
+def test_recommendations_use_fitted_model(client, seed_data, fitted_history):
+    exit_a, _ = fitted_history
+    recs = client.get(f"/t/{seed_data['ticket'].token}/recommendations").get_json()
+    assert all("predicted_seconds" not in o for o in recs["options"])  # heuristic until fitted
+
+    eta_model.fit(datetime.utcnow() - timedelta(days=30), holdout_days=0)
+    recs = client.get(f"/t/{seed_data['ticket'].token}/recommendations").get_json()
+    by_exit = {o["exit_id"]: o for o in recs["options"]}
+    assert by_exit[exit_a.id]["predicted_seconds"] == pytest.approx(100 + 60 * by_exit[exit_a.id]["queue"], abs=0.1)
+    assert recs["recommended"]["exit_id"] == exit_a.id
@@ -0,0 +1,56 @@
+"""
+Live exit load: queue depth and EWMA ETA maintained on status transitions; recommendations
+and auto exit selection read it instead of aggregating status_events.
+"""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import ExitLoad, Exit, Request as CarRequest, StatusEvent
+from app.services import exit_load
+from tests.conftest import auth_headers
+
+
+def _load(exit_id):
+    db.session.expire_all()
+    return db.session.get(ExitLoad, exit_id)
+
+
+def test_transitions_maintain_queue_depth_and_eta(client, seed_data, valet_jwt):
+    ticket, ex = seed_data["ticket"], seed_data["exit"]
+    rid = client.post(f"/t/{ticket.token}/request", json={"exit_id": ex.id}).get_json()["request"]["id"]
+    assert _load(ex.id).queue_depth == 1
+
+    # pretend the request was made 4 minutes ago so READY yields a 240 s sample
+    StatusEvent.query.filter_by(request_id=rid).update({"created_at": datetime.utcnow() - timedelta(minutes=4)})
+    db.session.commit()
+    for status in ("RETRIEVING", "READY"):
+        resp = client.patch(f"/api/requests/{rid}/status", json={"status": status}, headers=auth_headers(valet_jwt))
+        assert resp.status_code == 200
+    load = _load(ex.id)
+    assert load.queue_depth == 1 and load.eta_samples == 1
+    assert 235 <= load.eta_seconds <= 245
+
+    client.post(f"/t/{ticket.token}/request/{rid}/picked-up")
+    assert _load(ex.id).queue_depth == 0
+
+    recs = client.get(f"/t/{ticket.token}/recommendations").get_json()
+    assert recs["recommended"]["exit_id"] == ex.id
+    assert recs["options"][0]["queue"] == 0 and recs["options"][0]["eta_samples"] == 1
+
+
+def test_live_stats_and_recount_repairs_drift(seed_data):
+    venue, ex_a = seed_data["venue"], seed_data["exit"]
+    ex_b = Exit(venue_id=venue.id, code="B", name="Side")
+    db.session.add(ex_b)
+    db.session.commit()
+    db.session.add(ExitLoad(exit_id=ex_a.id, venue_id=venue.id, queue_depth=5, eta_samples=0,
+                            updated_at=datetime.utcnow()))
+    db.session.commit()
+
+    best = min(exit_load.live_exit_stats(venue.id), key=lambda s: s["queue"])
+    assert best["exit_id"] == ex_b.id
+
+    # the 5 queued on A were never real requests: recount brings A back to 0
+    assert exit_load.recount(venue.id) == 1
+    assert _load(ex_a.id).queue_depth == 0
+    assert CarRequest.query.count() == 0
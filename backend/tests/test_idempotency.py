@@ -0,0 +1,66 @@
+"""
+Idempotency-Key header: a repeated key replays the stored response without running the view
+again (from the worker cache or the idempotency_keys table); expired keys are purged.
+"""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import IdempotencyKey, StatusEvent, Tip
+from app.services import idempotency
+from tests.conftest import auth_headers
+
+
+def test_repeated_tip_is_recorded_once(client, seed_data, make_request):
+    r = make_request("CLOSED", delivered_by_user_id=seed_data["valet"].id)
+    url = f"/t/{seed_data['ticket'].token}/request/{r.id}/tip"
+    headers = {"Idempotency-Key": "tip-1"}
+    first = client.post(url, json={"amount_cents": 500}, headers=headers)
+    assert first.status_code == 201 and "Idempotent-Replayed" not in first.headers
+
+    idempotency._completed.clear()  # another worker: replayed from the table
+    again = client.post(url, json={"amount_cents": 500}, headers=headers)
+    cached = client.post(url, json={"amount_cents": 500}, headers=headers)
+    for resp in (again, cached):
+        assert resp.status_code == 201 and resp.headers["Idempotent-Replayed"] == "true"
+        assert resp.get_json() == first.get_json()
+    assert Tip.query.filter_by(request_id=r.id).count() == 1
+
+    assert client.post(url, json={"amount_cents": 500}, headers={"Idempotency-Key": "tip-2"}).status_code == 201
+    assert Tip.query.filter_by(request_id=r.id).count() == 2
+
+
+def test_status_retry_replays_and_errors_release_the_key(client, seed_data, valet_jwt, make_request):
+    r = make_request("RETRIEVING")
+    url = f"/api/requests/{r.id}/status"
+    headers = {**auth_headers(valet_jwt), "Idempotency-Key": "s-1"}
+    assert client.patch(url, json={"status": "READY"}, headers=headers).status_code == 200
+    retry = client.patch(url, json={"status": "READY"}, headers=headers)
+    assert retry.status_code == 200 and retry.headers["Idempotent-Replayed"] == "true"
+    assert StatusEvent.query.filter_by(request_id=r.id).count() == 1
+
+    # an error isn't stored: the same key runs again once the client fixes the call
+    bad = {**auth_headers(valet_jwt), "Idempotency-Key": "s-2"}
+    assert client.patch(url, json={"status": "NOPE"}, headers=bad).status_code == 400
+    assert client.patch(url, json={"status": "PICKED_UP"}, headers=bad).status_code == 200
+
+
+def test_in_flight_key_conflicts_and_expired_keys_are_purged(client, seed_data):
+    url = f"/t/{seed_data['ticket'].token}/request"
+    scope = "core.request_car:" + "0" * 32
+    now = datetime.utcnow()
+    db.session.add_all([
+        IdempotencyKey(scope=scope, key="old", status_code=200, body="{}", expires_at=now - timedelta(seconds=1)),
+        IdempotencyKey(scope=scope, key="new", status_code=200, body="{}", expires_at=now + timedelta(hours=1)),
+    ])
+    db.session.commit()
+    assert idempotency.purge_expired(batch=1) == 1
+    assert [k.key for k in IdempotencyKey.query.all()] == ["new"]
+
+    first = client.post(url, json={"exit_id": seed_data["exit"].id}, headers={"Idempotency-Key": "r-1"})
+    assert first.status_code == 201
+    # simulate the first call still running on another worker
+    idempotency._completed.clear()
+    row = IdempotencyKey.query.filter_by(key="r-1").one()
+    row.status_code = idempotency.PENDING
+    db.session.commit()
+    assert client.post(url, json={"exit_id": seed_data["exit"].id}, headers={"Idempotency-Key": "r-1"}).status_code == 409
@@ -0,0 +1,22 @@
+"""
+App JSON provider: same output with orjson and with the stdlib fallback; datetimes as ISO 8601.
+"""
+from datetime import datetime
+
+import pytest
+
+from app import json_provider
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_jsonify_encodes_datetimes_as_iso(app, monkeypatch, fast):
+    if not fast:
+        monkeypatch.setattr(json_provider, "orjson", None)
+    elif json_provider.orjson is None:
+        pytest.skip("orjson not installed")
+    ts = datetime(2026, 2, 1, 12, 30, 5, 123456)
+    with app.test_request_context():
+        resp = app.json.response({"at": ts, "none": None, "name": "Café"})
+    assert resp.mimetype == "application/json"
+    assert app.json.loads(resp.get_data()) == {"at": ts.isoformat(), "none": None, "name": "Café"}
+    assert json_provider.dumps({"at": ts}) == '{"at":"2026-02-01T12:30:05.123456"}'
@@ -0,0 +1,55 @@
+"""
+Latency histograms: bins stay within the advertised relative error, merge by summing counts,
+are written on READY / PICKED_UP and serve /api/latency; rebuild recounts the same bins.
+"""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import LatencyBin, RequestLifecycle, StatusEvent
+from app.services import latency
+from tests.conftest import auth_headers
+
+
+def test_bins_are_accurate_and_mergeable():
+    for seconds in (2, 45, 300, 1799, 7200):
+        assert abs(latency.bin_value(latency.bin_for(seconds)) - seconds) <= latency.RELATIVE_ACCURACY * seconds + 1e-9
+
+    first, second = {}, {}
+    for s in range(1, 901):
+        h = first if s % 2 else second
+        h[latency.bin_for(s)] = h.get(latency.bin_for(s), 0) + 1
+    merged = {k: first.get(k, 0) + second.get(k, 0) for k in set(first) | set(second)}
+    q = latency.quantiles(merged)
+    assert q["count"] == 900
+    for name, exact in (("p50", 450), ("p90", 810), ("p99", 891)):
+        assert abs(q[name] - exact) <= 0.03 * exact
+    assert latency.quantiles({})["p99"] is None
+
+
+def test_transitions_feed_latency_endpoint_and_rebuild(client, seed_data, valet_jwt, manager_jwt):
+    ticket, ex, venue_id = seed_data["ticket"], seed_data["exit"], seed_data["venue"].id
+    rid = client.post(f"/t/{ticket.token}/request", json={"exit_id": ex.id}).get_json()["request"]["id"]
+    requested_at = datetime.utcnow() - timedelta(minutes=5)
+    StatusEvent.query.filter_by(request_id=rid).update({"created_at": requested_at})
+    RequestLifecycle.query.filter_by(request_id=rid).update({"requested_at": requested_at})
+    db.session.commit()
+
+    headers = auth_headers(valet_jwt)
+    for status in ("RETRIEVING", "READY", "PICKED_UP"):
+        assert client.patch(f"/api/requests/{rid}/status", json={"status": status}, headers=headers).status_code == 200
+
+    # ready + picked, each for the exit and the delivering valet
+    assert LatencyBin.query.count() == 4
+    items = client.get("/api/latency", headers=headers).get_json()["items"]
+    assert [i["exit_id"] for i in items] == [ex.id]
+    assert items[0]["count"] == 1 and abs(items[0]["p99"] - 300) <= 0.03 * 300
+
+    by_valet = client.get(
+        f"/api/latency?venue_id={venue_id}&by=valet&metric=picked", headers=auth_headers(manager_jwt)
+    ).get_json()["items"]
+    assert [i["user_id"] for i in by_valet] == [seed_data["valet"].id]
+    assert client.get("/api/latency?by=zone", headers=headers).status_code == 400
+
+    before = sorted((b.metric, b.dimension, b.bin, b.count) for b in LatencyBin.query.all())
+    assert latency.rebuild() == 2
+    assert sorted((b.metric, b.dimension, b.bin, b.count) for b in LatencyBin.query.all()) == before
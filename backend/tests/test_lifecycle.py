@@ -0,0 +1,36 @@
+"""
+request_lifecycle is written on each transition (first time per stage, durations) and backs
+the analytics endpoints.
+"""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import RequestLifecycle, StatusEvent
+from tests.conftest import auth_headers
+
+
+def test_lifecycle_row_follows_transitions_and_feeds_metrics(client, seed_data, valet_jwt, manager_jwt):
+    ticket, ex, venue_id = seed_data["ticket"], seed_data["exit"], seed_data["venue"].id
+    rid = client.post(f"/t/{ticket.token}/request", json={"exit_id": ex.id}).get_json()["request"]["id"]
+    requested_at = datetime.utcnow() - timedelta(minutes=5)
+    StatusEvent.query.filter_by(request_id=rid).update({"created_at": requested_at})
+    RequestLifecycle.query.filter_by(request_id=rid).update({"requested_at": requested_at})
+    db.session.commit()
+
+    headers = auth_headers(valet_jwt)
+    client.post(f"/api/requests/{rid}/assign", json={}, headers=headers)
+    for status in ("RETRIEVING", "READY", "PICKED_UP"):
+        assert client.patch(f"/api/requests/{rid}/status", json={"status": status}, headers=headers).status_code == 200
+
+    db.session.expire_all()
+    row = db.session.get(RequestLifecycle, rid)
+    assert row.venue_id == venue_id and row.exit_id == ex.id
+    assert row.assigned_at and row.ready_at and row.picked_at
+    assert 295 <= row.ready_seconds <= row.picked_seconds <= 305
+
+    metrics = client.get(f"/api/metrics?venue_id={venue_id}", headers=auth_headers(manager_jwt)).get_json()
+    assert 295 <= metrics["avg_req_to_ready_seconds"] <= 305
+    stats = client.get("/api/stats", headers=headers).get_json()
+    assert stats["requests_today"] == 1 and stats["avg_time_to_ready_min"] == 5.0
+    exits = client.get("/api/exit-stats", headers=headers).get_json()["exits"]
+    assert exits[0]["eta_samples"] == 1 and exits[0]["queue"] == 0
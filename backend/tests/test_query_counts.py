@@ -0,0 +1,77 @@
+"""
+List endpoints issue a constant number of queries regardless of page size (no N+1 lazy loads).
+"""
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import Ticket, Request as CarRequest, StatusEvent, Tip, Zone
+from tests.conftest import auth_headers
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _add_rows(seed, n, status="REQUESTED"):
+    venue, ex, valet = seed["venue"], seed["exit"], seed["valet"]
+    zone = Zone.query.filter_by(venue_id=venue.id).first()
+    if zone is None:
+        zone = Zone(venue_id=venue.id, name="Bar", default_exit_id=ex.id)
+        db.session.add(zone)
+        db.session.flush()
+    now = datetime.utcnow()
+    for i in range(n):
+        t = Ticket(venue_id=venue.id, token=Ticket.new_token(), car_number=f"CAR{i}",
+                   claimed_phone="5550001234", claimed_at=now)
+        db.session.add(t)
+        db.session.flush()
+        r = CarRequest(ticket_id=t.id, exit_id=ex.id, zone_id=zone.id, status=status,
+                       delivered_by_user_id=valet.id if status == "CLOSED" else None)
+        db.session.add(r)
+        db.session.flush()
+        db.session.add(StatusEvent(ticket_id=t.id, request_id=r.id, to_status=status))
+        if status == "CLOSED":
+            db.session.add(Tip(request_id=r.id, amount_cents=500))
+    db.session.commit()
+
+
+def _query_count(client, url, jwt):
+    with count_queries() as statements:
+        resp = client.get(url, headers=auth_headers(jwt))
+    assert resp.status_code == 200
+    return len(statements)
+
+
+def test_list_endpoints_query_count_is_constant(client, seed_data, manager_jwt):
+    venue_id = seed_data["venue"].id
+    urls = [
+        f"/api/requests?venue_id={venue_id}&scope=active",
+        f"/api/requests?venue_id={venue_id}&scope=history",
+        f"/api/audit?venue_id={venue_id}",
+        f"/api/tips?venue_id={venue_id}",
+        f"/api/received-tickets?venue_id={venue_id}",
+    ]
+
+    _add_rows(seed_data, 2)
+    _add_rows(seed_data, 2, status="CLOSED")
+    small = [_query_count(client, u, manager_jwt) for u in urls]
+
+    _add_rows(seed_data, 8)
+    _add_rows(seed_data, 8, status="CLOSED")
+    large = [_query_count(client, u, manager_jwt) for u in urls]
+
+    assert small == large
@@ -0,0 +1,75 @@
+"""
+POST /api/sync: queued offline actions applied in order with per-action results, replayed
+idempotency keys, and a compact venue delta since the client's last version.
+"""
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models import StatusEvent, Ticket
+from tests.conftest import auth_headers
+
+
+def _rows(block, key="id"):
+    i = block["columns"].index(key)
+    return {row[i]: dict(zip(block["columns"], row)) for row in block["rows"]}
+
+
+def test_sync_applies_queue_and_replays_keys(client, seed_data, valet_jwt, make_request):
+    t = seed_data["ticket"]
+    r = make_request()
+    headers = auth_headers(valet_jwt)
+    actions = [
+        {"key": "k3", "at": 3000, "type": "status", "id": r.id, "status": "READY"},
+        {"key": "k1", "at": 1000, "type": "car_number", "ticket_id": t.id, "car_number": " AB12 "},
+        {"key": "k2", "at": 2000, "type": "assign", "id": r.id},
+        {"key": "k4", "at": 4000, "type": "status", "id": r.id, "status": "RETRIEVING"},
+        {"key": "k5", "at": 5000, "type": "teleport", "id": r.id},
+    ]
+    body = client.post("/api/sync", headers=headers, json={"actions": actions}).get_json()
+    # at order: car number, assign, READY (invalid from ASSIGNED), RETRIEVING
+    assert [(x["key"], x["ok"], x.get("status")) for x in body["results"]] == [
+        ("k1", True, None), ("k2", True, None), ("k3", False, 400), ("k4", True, None), ("k5", False, 400),
+    ]
+    assert body["full"] is True
+    row = _rows(body["requests"])[r.id]
+    assert row["status"] == "RETRIEVING" and row["car_number"] == "AB12" and row["version"] == 2
+
+    # the response was lost: the device resends the whole queue plus one new action
+    actions.append({"key": "k6", "at": 6000, "type": "status", "id": r.id, "status": "READY"})
+    again = client.post("/api/sync", headers=headers,
+                        json={"since": body["version"], "actions": actions}).get_json()
+    assert [x.get("replayed", False) for x in again["results"]] == [True] * 5 + [False]
+    assert again["results"][2] == {**body["results"][2], "replayed": True}
+    assert again["results"][5]["ok"] is True
+    assert StatusEvent.query.filter_by(request_id=r.id).count() == 3  # ASSIGNED, RETRIEVING, READY
+
+
+def test_sync_delta_since_version(client, seed_data, valet_jwt, make_request):
+    t = seed_data["ticket"]
+    make_request()
+    done = make_request("READY")
+    headers = auth_headers(valet_jwt)
+    db.session.execute(text("UPDATE requests SET updated_at = :t"), {"t": datetime(2020, 1, 1)})
+    db.session.commit()
+
+    version = client.post("/api/sync", headers=headers, json={}).get_json()["version"]
+    assert client.patch(f"/api/requests/{done.id}/status", json={"status": "PICKED_UP"},
+                        headers=headers).status_code == 200
+
+    delta = client.post("/api/sync", headers=headers, json={"since": version}).get_json()
+    assert delta["full"] is False
+    assert set(_rows(delta["requests"])) == {done.id}  # closed rows are sent so devices drop them
+    assert _rows(delta["requests"])[done.id]["status"] == "CLOSED"
+    tickets = _rows(delta["tickets"])
+    assert tickets[t.id]["closed_at"] is not None
+    db.session.expire_all()
+    assert db.session.get(Ticket, t.id).updated_at is not None
+
+
+def test_sync_validates_actions(client, seed_data, valet_jwt):
+    headers = auth_headers(valet_jwt)
+    assert client.post("/api/sync", headers=headers, json={"actions": [{"at": 1}]}).status_code == 400
+    assert client.post("/api/sync", headers=headers, json={"actions": [{"key": "a"}]}).status_code == 400
+    assert client.post("/api/sync", headers=headers, json={"since": "yesterday"}).status_code == 400
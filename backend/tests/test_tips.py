@@ -0,0 +1,22 @@
+"""
+Tip totals per valet come from the per-day rollup maintained by guest_create_tip.
+"""
+from app.extensions import db
+from app.models import Request as CarRequest, TipRollup
+from tests.conftest import auth_headers
+
+
+def test_tip_rollup_totals(client, seed_data, manager_jwt):
+    ticket, valet = seed_data["ticket"], seed_data["valet"]
+    r = CarRequest(ticket_id=ticket.id, exit_id=seed_data["exit"].id, status="CLOSED", delivered_by_user_id=valet.id)
+    db.session.add(r)
+    db.session.commit()
+
+    for amount in (500, 250):
+        resp = client.post(f"/t/{ticket.token}/request/{r.id}/tip", json={"amount_cents": amount})
+        assert resp.status_code == 201
+    assert TipRollup.query.count() == 1
+
+    data = client.get(f"/api/tips?venue_id={seed_data['venue'].id}", headers=auth_headers(manager_jwt)).get_json()
+    assert data["by_valet"] == [{"user_id": valet.id, "email": valet.email, "total_cents": 750, "count": 2}]
+    assert len(data["tips"]) == 2
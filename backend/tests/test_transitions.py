@@ -0,0 +1,63 @@
+"""
+Compare-and-set transitions: a write based on a stale read is rejected (409) without writing,
+every transition bumps requests.version and records its events, and guest/staff/scheduler
+paths share the engine.
+"""
+import pytest
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models import Request as CarRequest, StatusEvent
+from app.services.transitions import InvalidTransition, TransitionConflict, transition
+from tests.conftest import auth_headers
+
+
+def test_stale_read_conflicts_instead_of_overwriting(make_request):
+    r = make_request()
+    # another valet's assign commits after we loaded r
+    db.session.execute(
+        text("UPDATE requests SET status = 'ASSIGNED', assigned_to = 'other', version = version + 1 WHERE id = :id"),
+        {"id": r.id},
+    )
+    with pytest.raises(TransitionConflict):
+        transition(r, [("ASSIGNED", "Assigned to me")], values={"assigned_to": "me"})
+    db.session.commit()
+
+    db.session.expire_all()
+    row = db.session.get(CarRequest, r.id)
+    assert row.assigned_to == "other" and row.version == 1
+    assert StatusEvent.query.filter_by(request_id=r.id).count() == 0
+
+    with pytest.raises(InvalidTransition):
+        transition(row, [("READY", None)])
+
+
+def test_transitions_bump_version_and_record_steps(client, seed_data, valet_jwt, make_request):
+    r = make_request()
+    headers = auth_headers(valet_jwt)
+    assert client.post(f"/api/requests/{r.id}/assign", json={}, headers=headers).status_code == 200
+    for status in ("RETRIEVING", "READY", "PICKED_UP"):
+        resp = client.patch(f"/api/requests/{r.id}/status", json={"status": status}, headers=headers)
+        assert resp.status_code == 200
+    assert resp.get_json()["request"]["status"] == "CLOSED"
+    assert client.patch(f"/api/requests/{r.id}/status", json={"status": "READY"}, headers=headers).status_code == 400
+
+    db.session.expire_all()
+    row = db.session.get(CarRequest, r.id)
+    assert row.version == 4 and row.delivered_by_user_id == seed_data["valet"].id
+    events = StatusEvent.query.filter_by(request_id=r.id).order_by(StatusEvent.id).all()
+    assert [(e.from_status, e.to_status) for e in events] == [
+        ("REQUESTED", "ASSIGNED"), ("ASSIGNED", "RETRIEVING"), ("RETRIEVING", "READY"),
+        ("READY", "PICKED_UP"), ("PICKED_UP", "CLOSED"),
+    ]
+
+
+def test_guest_cancel_shares_engine(client, seed_data, make_request):
+    r = make_request("SCHEDULED")
+    token = seed_data["ticket"].token
+    # scheduler promoted it after the guest's page loaded: cancel is refused, nothing written
+    db.session.execute(text("UPDATE requests SET status = 'REQUESTED', version = version + 1 WHERE id = :id"),
+                       {"id": r.id})
+    db.session.commit()
+    assert client.post(f"/t/{token}/request/{r.id}/cancel").status_code == 400
+    assert StatusEvent.query.filter_by(request_id=r.id, to_status="CANCELED").count() == 0
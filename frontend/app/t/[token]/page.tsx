@@ -16,6 +16,7 @@ type TicketResp = {
     tip_eligible?: boolean;
   };
 };
+type BootstrapResp = TicketResp & { exits: ExitT[] };
 
 const STATUS_CONFIG: Record<string, { label: string; sublabel: string; bg: string; text: string }> = {
   "No request yet": {
@@ -123,9 +124,10 @@ export default function TicketPage() {
   const [tipSubmitted, setTipSubmitted] = useState(false);
   const reqRef = useRef<TicketResp["request"] | null>(null);
 
-  const load = async () => {
+  // path "" polls ticket + request; "/bootstrap" also returns exits (first render, one round trip)
+  const load = async <T extends TicketResp = TicketResp>(path = ""): Promise<T> => {
     try {
-      const r = await fetch(`${API}/t/${token}`);
+      const r = await fetch(`${API}/t/${token}${path}`);
       if (!r.ok) {
         const text = await r.text();
         let msg = "Ticket not found (invalid token).";
@@ -137,12 +139,13 @@ export default function TicketPage() {
         }
         throw new Error(msg);
       }
-      const data: TicketResp = await r.json();
+      const data: T = await r.json();
       setTicket(data.ticket);
       setReq(data.request);
       reqRef.current = data.request;
       setStatusLine(data.request?.status ?? "No request yet");
       if (data.request?.exit_id) setSelectedExit(data.request.exit_id);
+      return data;
     } catch (e) {
       if (typeof navigator !== "undefined" && !navigator.onLine) {
         throw new Error("Can't load. Check your connection.");
@@ -151,12 +154,10 @@ export default function TicketPage() {
     }
   };
 
-  const loadExits = async () => {
-    const r = await fetch(`${API}/t/${token}/exits`);
-    if (!r.ok) throw new Error(await r.text());
-    const data: ExitT[] = await r.json();
-    setExits(data);
-    if (!selectedExit && data.length) setSelectedExit(data[0].id);
+  const bootstrap = async () => {
+    const data = await load<BootstrapResp>("/bootstrap");
+    setExits(data.exits);
+    if (!data.request?.exit_id && data.exits.length) setSelectedExit(data.exits[0].id);
   };
 
   const requestCar = async (delayMinutes?: number) => {
@@ -182,13 +183,9 @@ export default function TicketPage() {
     }
   };
 
-  useEffect(() => {
-    load().catch((e) => setStatusLine(String(e)));
-  }, [token]);
-
   useEffect(() => {
     if (!token) return;
-    loadExits().catch((e) => setStatusLine(String(e)));
+    bootstrap().catch((e) => setStatusLine(String(e)));
     const interval = setInterval(() => load().catch(() => {}), 4000);
     return () => clearInterval(interval);
   }, [token]);
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ORM + serializer vs Core read model for a 100-row /api/requests page.
+Runs in-process against a seeded in-memory SQLite database; no server or Postgres needed.
+Usage: python3 scripts/bench_read_path.py [--rows 100] [--iterations 200]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+
+from app import create_app, read_models  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Venue, Exit, Zone, Ticket, Request as CarRequest  # noqa: E402
+from app.serializers import REQUEST  # noqa: E402
+
+
+def seed(rows: int) -> int:
+    v = Venue(name="Bench Venue", slug="bench-venue")
+    db.session.add(v)
+    db.session.flush()
+    ex = Exit(venue_id=v.id, code="A", name="Main Gate")
+    db.session.add(ex)
+    db.session.flush()
+    zone = Zone(venue_id=v.id, name="Bar", default_exit_id=ex.id)
+    db.session.add(zone)
+    db.session.flush()
+    for i in range(rows):
+        t = Ticket(venue_id=v.id, token=Ticket.new_token(), car_number=f"CAR{i:04d}", claimed_phone="5550001234")
+        db.session.add(t)
+        db.session.flush()
+        db.session.add(CarRequest(ticket_id=t.id, venue_id=v.id, exit_id=ex.id, zone_id=zone.id, status="REQUESTED"))
+    db.session.commit()
+    return v.id
+
+
+def orm_page(venue_id: int, limit: int) -> list[dict]:
+    q = (
+        CarRequest.query.filter(CarRequest.venue_id == venue_id)
+        .order_by(CarRequest.id.desc())
+        .limit(limit)
+    )
+    out = REQUEST.many(REQUEST.apply(q).all())
+    db.session.expunge_all()  # each API call starts with an empty identity map
+    return out
+
+
+def core_page(venue_id: int, limit: int) -> list[dict]:
+    q = (
+        read_models.select_requests()
+        .where(CarRequest.venue_id == venue_id)
+        .order_by(CarRequest.id.desc())
+        .limit(limit)
+    )
+    return [r.as_json() for r in read_models.fetch_requests(q)]
+
+
+def measure(name: str, fn, iterations: int) -> None:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:<6} {elapsed / iterations * 1000:8.2f} ms/page   peak alloc {peak / 1024:8.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        venue_id = seed(args.rows)
+        assert orm_page(venue_id, args.rows) == core_page(venue_id, args.rows)
+        print(f"{args.rows}-row page, {args.iterations} iterations")
+        measure("orm", lambda: orm_page(venue_id, args.rows), args.iterations)
+        measure("core", lambda: core_page(venue_id, args.rows), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
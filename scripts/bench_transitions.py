@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent valets racing to assign the same requests, compare-and-set vs the old
+read-check-write. Every thread reads the request, waits until all racers have read it, then
+writes. Counts winners per request (must be 1), lost updates and write latency.
+Runs against a temporary SQLite file by default; set DATABASE_URL to a scratch Postgres
+database to measure row-lock waits (sampled from pg_locks).
+Usage: python3 scripts/bench_transitions.py [--requests 200] [--racers 4] [--mode cas|rmw|both]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+if "postgresql" not in os.environ.get("DATABASE_URL", ""):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+from sqlalchemy import text  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Venue, Exit, Ticket, Request as CarRequest, StatusEvent  # noqa: E402
+from app.services.transitions import TransitionConflict, transition  # noqa: E402
+
+
+def seed(rows: int) -> list[int]:
+    v = Venue(name="Bench Venue", slug=f"bench-{time.time_ns()}")
+    db.session.add(v)
+    db.session.flush()
+    ex = Exit(venue_id=v.id, code="A", name="Main Gate")
+    db.session.add(ex)
+    db.session.flush()
+    ids = []
+    for _ in range(rows):
+        t = Ticket(venue_id=v.id, token=Ticket.new_token())
+        db.session.add(t)
+        db.session.flush()
+        r = CarRequest(ticket_id=t.id, venue_id=v.id, exit_id=ex.id, status="REQUESTED")
+        db.session.add(r)
+        db.session.flush()
+        ids.append(r.id)
+    db.session.commit()
+    return ids
+
+
+def assign_cas(r, valet: str) -> bool:
+    try:
+        transition(r, [("ASSIGNED", f"Assigned to {valet}")],
+                   values={"assigned_to": valet, "assigned_at": datetime.utcnow()})
+    except TransitionConflict:
+        db.session.rollback()
+        return False
+    db.session.commit()
+    return True
+
+
+def assign_rmw(r, valet: str) -> bool:
+    """What assign_request did before: check in Python, then write whatever we read."""
+    if r.assigned_to and r.assigned_to != valet:
+        return False
+    old = r.status
+    r.assigned_to = valet
+    r.status = "ASSIGNED"
+    db.session.add(StatusEvent(ticket_id=r.ticket_id, venue_id=r.venue_id, request_id=r.id,
+                               from_status=str(old), to_status="ASSIGNED", note=f"Assigned to {valet}"))
+    db.session.commit()
+    return True
+
+
+def race(app, request_ids: list[int], racers: int, assign) -> dict:
+    wins = {rid: 0 for rid in request_ids}
+    latencies = []
+    lock = threading.Lock()
+
+    def racer(n: int, rid: int, barrier: threading.Barrier):
+        with app.app_context():
+            r = db.session.get(CarRequest, rid)
+            barrier.wait()
+            started = time.perf_counter()
+            won = assign(r, f"valet{n}@bench")
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                wins[rid] += won
+            db.session.remove()
+
+    started = time.perf_counter()
+    for rid in request_ids:
+        barrier = threading.Barrier(racers)
+        threads = [threading.Thread(target=racer, args=(n, rid, barrier)) for n in range(racers)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    total = time.perf_counter() - started
+
+    with app.app_context():
+        events = dict(db.session.execute(
+            db.select(StatusEvent.request_id, db.func.count())
+            .where(StatusEvent.to_status == "ASSIGNED", StatusEvent.request_id.in_(request_ids))
+            .group_by(StatusEvent.request_id)
+        ).all())
+    latencies.sort()
+    return {
+        "double_assigned": sum(1 for n in wins.values() if n > 1),
+        "lost_updates": sum(n - 1 for n in events.values() if n > 1),
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "races_per_s": len(request_ids) / total,
+    }
+
+
+class LockWaitSampler(threading.Thread):
+    """Postgres only: max number of ungranted row/tuple locks seen while the race runs."""
+
+    def __init__(self, app):
+        super().__init__(daemon=True)
+        self.app, self.max_waiting, self.running = app, 0, True
+
+    def run(self):
+        with self.app.app_context():
+            while self.running:
+                waiting = db.session.execute(text("SELECT COUNT(*) FROM pg_locks WHERE NOT granted")).scalar()
+                db.session.rollback()
+                self.max_waiting = max(self.max_waiting, waiting)
+                time.sleep(0.001)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--racers", type=int, default=4)
+    parser.add_argument("--mode", choices=("cas", "rmw", "both"), default="both")
+    args = parser.parse_args()
+
+    app = create_app()
+    postgres = "postgresql" in os.environ["DATABASE_URL"]
+    with app.app_context():
+        db.create_all()
+    modes = ("cas", "rmw") if args.mode == "both" else (args.mode,)
+    print(f"{args.requests} requests x {args.racers} racing valets on {'postgres' if postgres else 'sqlite'}")
+    for mode in modes:
+        with app.app_context():
+            ids = seed(args.requests)
+        sampler = LockWaitSampler(app) if postgres else None
+        if sampler:
+            sampler.start()
+        result = race(app, ids, args.racers, assign_cas if mode == "cas" else assign_rmw)
+        if sampler:
+            sampler.running = False
+            sampler.join()
+            result["max_lock_waiters"] = sampler.max_waiting
+        print(f"  {mode:<4} " + "  ".join(
+            f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()
+        ))
+
+
+if __name__ == "__main__":
+    main()